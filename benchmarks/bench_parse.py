@@ -0,0 +1,250 @@
+"""Offline parse benchmark: replay saved review pages through the extractors, no network.
+
+    python benchmarks/bench_parse.py                    # every site with every installed parser
+    python benchmarks/bench_parse.py --site trustpilot --parser selectolax
+    python benchmarks/bench_parse.py --save before.json # ...change the code...
+    python benchmarks/bench_parse.py --compare before.json
+    python benchmarks/bench_parse.py --update-golden    # after an intended change of the output
+    python benchmarks/bench_parse.py --record-from .http_cache  # use pages cached by a real --cache run
+
+Every configuration is checked against the golden JSON first, so a speedup
+that changes the extracted reviews shows up as a failure, not a win. Each
+site's fixtures/<site>/source.json says whether its pages were recorded from
+the site or are synthetic; on synthetic pages the golden check only shows the
+parser modes agree with each other, not that they read the real markup.
+"""
+import argparse
+import contextlib
+import gzip
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import scrapy  # noqa: E402  (the scraper module next to this directory)
+
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+GOLDEN_DIR = os.path.join(BENCH_DIR, "golden")
+SITES = ["g2", "capterra", "trustpilot"]
+
+# Listing-page URLs in the response cache that --record-from turns into fixtures
+LISTING_URLS = {
+    "g2": re.compile(r"g2\.com/products/[^/]+/reviews\?page=(\d+)"),
+    "capterra": re.compile(r"capterra\.com/p/\d+/[^/]+/reviews/\?page=(\d+)"),
+    "trustpilot": re.compile(r"trustpilot\.com/review/[^?]+\?page=(\d+)")
+}
+
+# Wide enough that every review on every fixture page is in range
+WINDOW = (datetime(1900, 1, 1), datetime(2100, 1, 1))
+
+def fixture_source(site):
+    """Return the site's fixtures/<site>/source.json ({"recorded": False, ...} if missing)"""
+    return scrapy.load_json_file(os.path.join(FIXTURES_DIR, site, "source.json"), {"recorded": False})
+
+def load_pages(site):
+    """Return [(page number, html)] for a site's fixtures, in page order"""
+    pages = []
+    for name in os.listdir(os.path.join(FIXTURES_DIR, site)):
+        match = re.match(r"page-(\d+)\.html\.gz$", name)
+        if match:
+            with gzip.open(os.path.join(FIXTURES_DIR, site, name), "rt", encoding="utf-8") as f:
+                pages.append((int(match.group(1)), f.read()))
+    return sorted(pages)
+
+# Chunk size the stream mode feeds pages in, like --stream reads them off the network
+STREAM_CHUNK_SIZE = 16 * 1024
+
+def configurations(sites, parsers):
+    """Yield (site, parser, mode) combinations to measure"""
+    for site in sites:
+        # The embedded JSON path builds no DOM, so the parser backend doesn't matter for it
+        if scrapy.EXTRACTORS[site].embedded:
+            yield site, parsers[0], "embedded"
+        for parser in parsers:
+            yield site, parser, "dom"
+        for parser in parsers:
+            yield site, parser, "stream"
+
+def parse(site, html, page, parser, mode, restrict_parsing):
+    if mode == "stream":
+        chunks = (html[i:i + STREAM_CHUNK_SIZE] for i in range(0, len(html), STREAM_CHUNK_SIZE))
+        return scrapy.EXTRACTORS[site].parse_stream(chunks, page, *WINDOW, parser)
+    return scrapy.parse_page(site, html, page, *WINDOW, parser, restrict_parsing, mode == "embedded")
+
+def run_pass(site, pages, parser, mode, restrict_parsing):
+    """Parse every page once; returns (Reviews, cards seen)"""
+    records = []
+    cards = 0
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for page, html in pages:
+            result = parse(site, html, page, parser, mode, restrict_parsing)
+            if result is None:
+                continue
+            records.extend(result[0])
+            cards += len(result[1])
+    return records, cards
+
+def first_difference(records, golden):
+    """Describe where records stop matching the golden output"""
+    for i, (record, expected) in enumerate(zip(records, golden)):
+        if record != expected:
+            fields = [name for name in expected if record.get(name) != expected[name]]
+            return f"record {i} differs in {', '.join(fields) or 'field order'}"
+    return f"{len(records)} records instead of {len(golden)}"
+
+def measure(site, pages, parser, mode, restrict_parsing, repeat):
+    """Check one configuration against the golden output and time it"""
+    reviews, cards = run_pass(site, pages, parser, mode, restrict_parsing)  # also warms up
+    records = [review.to_dict() for review in reviews]
+    with open(os.path.join(GOLDEN_DIR, f"{site}.json"), encoding="utf-8") as f:
+        golden = json.load(f)
+
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run_pass(site, pages, parser, mode, restrict_parsing)
+        times.append(time.perf_counter() - started)
+
+    # Memory is traced in a separate pass because tracemalloc slows everything down
+    tracemalloc.start()
+    run_pass(site, pages, parser, mode, restrict_parsing)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    best = min(times)
+    return {
+        "site": site,
+        "parser": "json" if mode == "embedded" else parser,
+        "mode": mode,
+        "pages": len(pages),
+        "cards": cards,
+        "recorded": fixture_source(site).get("recorded", False),
+        "golden": records == golden,
+        "golden_error": None if records == golden else first_difference(records, golden),
+        "best_s": round(best, 6),
+        "median_s": round(statistics.median(times), 6),
+        "pages_per_s": round(len(pages) / best, 1),
+        "us_per_card": round(best / max(cards, 1) * 1e6, 1),
+        "peak_kib": round(peak / 1024, 1)
+    }
+
+def config_key(result):
+    return f"{result['site']}/{result['parser']}/{result['mode']}"
+
+def print_results(results, baseline=None):
+    previous = {config_key(result): result for result in (baseline or {}).get("results", [])}
+    print(f"{'configuration':<32} {'pages/s':>9} {'µs/card':>9} {'peak KiB':>9}  golden")
+    for result in results:
+        line = (f"{config_key(result):<32} {result['pages_per_s']:>9.1f} {result['us_per_card']:>9.1f} "
+                f"{result['peak_kib']:>9.1f}  {'✅' if result['golden'] else '❌ ' + result['golden_error']}")
+        before = previous.get(config_key(result))
+        if before:
+            change = (before["us_per_card"] - result["us_per_card"]) / before["us_per_card"] * 100
+            line += f"  ({'+' if change >= 0 else ''}{change:.1f}% vs {before['us_per_card']:.1f} µs/card)"
+        print(line)
+    synthetic = sorted({result["site"] for result in results if not result.get("recorded")})
+    if synthetic:
+        print(f"\n⚠️ Synthetic fixtures for {', '.join(synthetic)}: the golden check there only shows the parser "
+              f"modes agree, not that they read the real site. Record real pages with --record-from.")
+
+def update_golden(sites):
+    """Write the reference output (html.parser, DOM path) of every site's fixtures"""
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+    for site in sites:
+        reviews, _ = run_pass(site, load_pages(site), "html.parser", "dom", True)
+        records = [review.to_dict() for review in reviews]
+        scrapy.write_pretty_json(records, os.path.join(GOLDEN_DIR, f"{site}.json"))
+        print(f"📝 Wrote {len(records)} golden records for {site}")
+
+def record_from_cache(cache_dir, sites):
+    """Replace fixtures with listing pages a real run stored in its response cache"""
+    index = scrapy.load_json_file(os.path.join(cache_dir, "index.json"), {})
+    for site in sites:
+        found = {}
+        for url, entry in index.items():
+            match = LISTING_URLS[site].search(url)
+            if match and entry["status"] == 200:
+                found[int(match.group(1))] = url, entry["body"]
+        if not found:
+            print(f"⚠️ No cached {site} listing pages in {cache_dir}")
+            continue
+        site_dir = os.path.join(FIXTURES_DIR, site)
+        os.makedirs(site_dir, exist_ok=True)
+        for name in os.listdir(site_dir):
+            os.remove(os.path.join(site_dir, name))
+        urls = {}
+        for page, (url, digest) in sorted(found.items()):
+            with open(os.path.join(cache_dir, "objects", digest[:2], digest), "rb") as f:
+                body = f.read()
+            with gzip.open(os.path.join(site_dir, f"page-{page}.html.gz"), "wb") as f:
+                f.write(body)
+            urls[page] = url
+        stored_at = datetime.fromtimestamp(max(index[url]["stored_at"] for url in urls.values()))
+        scrapy.save_json_file(os.path.join(site_dir, "source.json"), {
+            "recorded": True,
+            "recorded_at": f"{stored_at:%Y-%m-%d}",
+            "urls": [urls[page] for page in sorted(urls)]
+        })
+        print(f"📼 Recorded {len(found)} {site} pages; run --update-golden once the output looks right")
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=BENCH_DIR).stdout.strip() or None
+    except OSError:
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark review extraction on saved pages")
+    parser.add_argument("--site", action="append", choices=SITES, help="Site to benchmark (default: all)")
+    parser.add_argument("--parser", action="append", choices=scrapy.PARSER_BACKENDS,
+                        help="Parser backend to benchmark (default: every installed one)")
+    parser.add_argument("--full-parse", action="store_true", help="Build the whole DOM instead of only the cards")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed passes per configuration (best is reported)")
+    parser.add_argument("--save", help="Write the results as JSON for a later --compare")
+    parser.add_argument("--compare", help="Show the change against results saved with --save")
+    parser.add_argument("--update-golden", action="store_true", help="Rewrite the golden JSON from the fixtures")
+    parser.add_argument("--record-from", metavar="CACHE_DIR", help="Turn cached listing pages into fixtures")
+    args = parser.parse_args()
+
+    sites = args.site or SITES
+    if args.record_from:
+        record_from_cache(args.record_from, sites)
+        sys.exit(0)
+    if args.update_golden:
+        update_golden(sites)
+        sys.exit(0)
+
+    parsers = []
+    for backend in args.parser or scrapy.PARSER_BACKENDS:
+        try:
+            parsers.append(scrapy.resolve_parser(backend))
+        except ValueError as e:
+            if args.parser:
+                raise
+            print(f"⏭️ Skipping {backend}: {e}")
+
+    print(f"🐍 Python {platform.python_version()}, commit {git_commit() or 'unknown'}, "
+          f"best of {args.repeat} passes\n")
+    results = []
+    for site, backend, mode in configurations(sites, parsers):
+        results.append(measure(site, load_pages(site), backend, mode, not args.full_parse, args.repeat))
+
+    baseline = scrapy.load_json_file(args.compare, None) if args.compare else None
+    print_results(results, baseline)
+
+    if args.save:
+        scrapy.save_json_file(args.save, {"commit": git_commit(), "python": platform.python_version(),
+                                          "full_parse": args.full_parse, "results": results})
+        print(f"\n📝 Saved results to {args.save}")
+    if not all(result["golden"] for result in results):
+        sys.exit(1)
@@ -1,15 +1,107 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
+import abc
 import json
+import gzip
+import hashlib
+import io
+import itertools
+import os
 import argparse
-from datetime import datetime
+import bisect
+import codecs
+import contextlib
+import contextvars
+import csv
+import heapq
+import logging
+import multiprocessing
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from html import escape as escape_html
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
 import random
+import re
+import socket
+import sqlite3
+import sys
 import time
+import threading
 import urllib3
+import soupsieve
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, wait, FIRST_COMPLETED, as_completed
+
+try:
+    import zstandard
+except ImportError:  # Optional: only needed for --compress zstd
+    zstandard = None
+
+try:
+    import lxml
+except ImportError:  # Optional: faster BeautifulSoup backend
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # Optional: only needed for --parser selectolax
+    LexborHTMLParser = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Optional: only needed for Parquet/Arrow output
+    pyarrow = None
+
+try:
+    import numpy
+except ImportError:  # Optional: only needed for the stats command
+    numpy = None
 
 # Disable SSL warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Per-review lines go through this logger at DEBUG level; everything else is printed as before
+log = logging.getLogger("scrapy")
+
+# Proxy health checks: endpoint that echoes our IP, and where results are cached between runs
+PROXY_CHECK_URL = 'http://httpbin.org/ip'
+PROXY_HEALTH_CACHE = '.proxy_health.json'
+
+# Where fetched pages are cached when --cache or --offline is used
+HTTP_CACHE_DIR = '.http_cache'
+
+# Where watermarks and resume checkpoints are kept between runs
+STATE_DIR = '.scrape_state'
+
+# Fingerprints of every review already written, inside the state directory (used with --dedupe)
+SEEN_REVIEWS_FILE = 'seen_reviews.sqlite3'
+
+# Task queue shared by the enqueue and worker commands
+QUEUE_FILE = 'queue.sqlite3'
+
+# Confirmed slugs and Capterra product IDs, inside the state directory
+RESOLUTIONS_FILE = 'resolutions.json'
+
+# Review listing of a company on each source, by page
+LISTING_URLS = {
+    "g2": "https://www.g2.com/products/{company}/reviews?page={page}",
+    "capterra": "https://www.capterra.com/p/{product_id}/{product_slug}/reviews/?page={page}",
+    "trustpilot": "https://www.trustpilot.com/review/{company}?page={page}"
+}
+
+# Host every listing request of a source goes to (used for per-domain politeness)
+SOURCE_DOMAINS = {
+    "g2": "www.g2.com",
+    "capterra": "www.capterra.com",
+    "trustpilot": "www.trustpilot.com"
+}
+
+# HTML parsers that can be picked per source with --parser
+PARSER_BACKENDS = ["html.parser", "lxml", "selectolax"]
+
 def get_proxy_session(proxy_list=None):
     """Create a requests session with proxy configuration"""
     session = requests.Session()
@@ -45,24 +137,459 @@ def get_proxy_session(proxy_list=None):
     
     # Disable SSL verification for proxies that might have issues
     session.verify = False
+
+    # Time each request's DNS lookup, connect, time to first byte and download
+    session.mount("http://", TimedHTTPAdapter())
+    session.mount("https://", TimedHTTPAdapter())
     
     return session
 
-def test_proxy(proxy):
-    """Test if a proxy is working"""
+# Timings of the request being sent on this thread, filled in by the timed connections
+_request_timings = threading.local()
+
+class TimedConnection:
+    """Mixin for urllib3 connections that adds DNS and connect time to the current request's timings"""
+
+    def _new_conn(self):
+        timings = getattr(_request_timings, "current", None)
+        if timings is None:
+            return super()._new_conn()
+        host = self._dns_host
+        started = time.perf_counter()
+        try:
+            addresses = list(dict.fromkeys(info[4][0] for info in socket.getaddrinfo(host, self.port, 0,
+                                                                                       socket.SOCK_STREAM)))
+        except OSError:
+            addresses = [host]  # Let urllib3 report the lookup failure as usual
+        timings["dns"] += time.perf_counter() - started
+
+        # Connect to the resolved addresses in order, like create_connection() would: an address
+        # that times out, refuses or is unreachable moves on to the next one
+        error = None
+        for address in addresses:
+            self._dns_host = address
+            try:
+                return super()._new_conn()
+            except (urllib3.exceptions.NewConnectionError, urllib3.exceptions.ConnectTimeoutError, OSError) as e:
+                error = e
+            finally:
+                self._dns_host = host
+        if error is None:
+            error = urllib3.exceptions.NewConnectionError(self, f"Failed to establish a new connection: "
+                                                                f"{host} resolved to no addresses")
+        raise error
+
+    def connect(self):
+        timings = getattr(_request_timings, "current", None)
+        if timings is None:
+            return super().connect()
+        started = time.perf_counter()
+        dns_before = timings["dns"]
+        try:
+            return super().connect()
+        finally:
+            # TCP handshake, proxy tunnel and TLS handshake, without the DNS lookup
+            timings["connect"] += time.perf_counter() - started - (timings["dns"] - dns_before)
+
+class TimedHTTPConnection(TimedConnection, urllib3.connection.HTTPConnection):
+    pass
+
+class TimedHTTPSConnection(TimedConnection, urllib3.connection.HTTPSConnection):
+    pass
+
+class TimedHTTPConnectionPool(urllib3.HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+TIMED_POOL_CLASSES = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """Transport adapter that attaches per-phase timings to every response as `res.timings`.
+
+    dns and connect are only non-zero when a new connection was opened
+    (keep-alive reuse skips both), ttfb runs from sending the request to
+    receiving the headers and download covers reading the body. The four
+    phases add up to the request's wall-clock time. SOCKS proxies use their
+    own connection classes and only get ttfb/download.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = TIMED_POOL_CLASSES
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        if not proxy.lower().startswith("socks"):
+            manager.pool_classes_by_scheme = TIMED_POOL_CLASSES
+        return manager
+
+    def send(self, request, stream=False, **kwargs):
+        timings = {"dns": 0.0, "connect": 0.0}
+        _request_timings.current = timings
+        started = time.perf_counter()
+        try:
+            res = super().send(request, stream=True, **kwargs)
+        finally:
+            _request_timings.current = None
+        headers_at = time.perf_counter()
+        if not stream:
+            res.content
+        timings["ttfb"] = max(0.0, headers_at - started - timings["dns"] - timings["connect"])
+        timings["download"] = time.perf_counter() - headers_at
+        res.timings = timings
+        return res
+
+def check_proxy(proxy, check_url=PROXY_CHECK_URL, timeout=15):
+    """Test one proxy and return its health record (ok, latency, checked_at)"""
+    health = {
+        "ok": False,
+        "latency": None,
+        "checked_at": time.time(),
+        "error": None
+    }
     try:
+        started = time.monotonic()
         response = requests.get(
-            'http://httpbin.org/ip', 
+            check_url, 
             proxies={'http': proxy, 'https': proxy}, 
-            timeout=15,
+            timeout=timeout,
             verify=False
         )
+        health["latency"] = round(time.monotonic() - started, 3)
         if response.status_code == 200:
-            print(f"✅ Proxy {proxy} is working")
-            return True
+            health["ok"] = True
+            print(f"✅ Proxy {proxy} is working ({health['latency']:.2f}s)")
+        else:
+            health["error"] = f"HTTP {response.status_code}"
+            print(f"❌ Proxy {proxy} failed: HTTP {response.status_code}")
     except Exception as e:
+        health["error"] = str(e)
         print(f"❌ Proxy {proxy} failed: {str(e)}")
-        return False
+    return health
+
+def test_proxy(proxy, check_url=PROXY_CHECK_URL):
+    """Test if a proxy is working"""
+    return check_proxy(proxy, check_url)["ok"]
+
+def load_json_file(filename, default):
+    """Read a JSON state file, falling back to `default` if it is missing or corrupt"""
+    try:
+        with open(filename, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return default
+
+def save_json_file(filename, data):
+    """Write a JSON state file atomically so a crash never leaves it half-written"""
+    tmp_name = f"{filename}.tmp"
+    with open(tmp_name, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_name, filename)
+
+def check_proxies(proxies, check_url=PROXY_CHECK_URL, workers=20, cache_file=PROXY_HEALTH_CACHE, ttl=3600):
+    """Health-check proxies in parallel, reusing cached results younger than `ttl` seconds.
+
+    Returns {proxy: health record} for every proxy in `proxies`.
+    """
+    cache = load_json_file(cache_file, {}) if cache_file else {}
+    now = time.time()
+    health = {}
+    for proxy in proxies:
+        cached = cache.get(proxy)
+        if (cached and cached.get("check_url") == check_url
+                and now - cached.get("checked_at", 0) < ttl):
+            health[proxy] = cached
+
+    stale = [proxy for proxy in proxies if proxy not in health]
+    if health:
+        print(f"♻️ Reusing {len(health)} cached proxy checks (younger than {ttl}s)")
+    if stale:
+        print(f"🔍 Testing {len(stale)} proxies against {check_url} ({min(workers, len(stale))} at a time)...")
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(stale)))) as pool:
+            for proxy, result in zip(stale, pool.map(lambda p: check_proxy(p, check_url), stale)):
+                result["check_url"] = check_url
+                health[proxy] = cache[proxy] = result
+        if cache_file:
+            save_json_file(cache_file, cache)
+
+    return health
+
+class ProxyPool:
+    """Hand out a proxy per request instead of pinning one proxy for the whole run.
+
+    Each proxy gets its own keep-alive session. Latency and the share of
+    403/429 answers are tracked per proxy, fast healthy proxies are picked
+    more often, and a proxy that fails `max_failures` times in a row is put
+    into a cool-down window. Exposes get() so it can stand in for a session.
+    """
+
+    def __init__(self, proxy_list, health=None, cooldown=300, max_failures=3):
+        health = health or {}
+        self.cooldown = cooldown
+        self.max_failures = max_failures
+        self.sessions = {}
+        self.stats = {
+            proxy: {
+                "latency": (health.get(proxy) or {}).get("latency") or 1.0,
+                "block_rate": 0.0,
+                "requests": 0,
+                "blocked": 0,
+                "errors": 0,
+                "failures": 0,
+                "cooldown_until": 0.0
+            }
+            for proxy in proxy_list
+        }
+        self.lock = threading.Lock()
+
+    def _session(self, proxy):
+        with self.lock:
+            if proxy not in self.sessions:
+                self.sessions[proxy] = get_proxy_session([proxy])
+            return self.sessions[proxy]
+
+    def pick(self, avoid=()):
+        """Choose a proxy, weighting fast proxies with few blocks higher (and skipping `avoid` if possible)"""
+        now = time.time()
+        with self.lock:
+            available = [p for p, s in self.stats.items() if s["cooldown_until"] <= now and p not in avoid]
+            if not available:
+                # Everything is cooling down: use whichever comes back first
+                return min(self.stats, key=lambda p: self.stats[p]["cooldown_until"])
+            weights = [
+                1.0 / (max(self.stats[p]["latency"], 0.05) * (1 + 10 * self.stats[p]["block_rate"]))
+                for p in available
+            ]
+            return random.choices(available, weights=weights)[0]
+
+    def record(self, proxy, latency=None, status=None, error=False):
+        """Update a proxy's score after a request and cool it down if it keeps failing"""
+        blocked = status in (403, 429)
+        with self.lock:
+            stats = self.stats[proxy]
+            stats["requests"] += 1
+            if latency is not None:
+                stats["latency"] = 0.7 * stats["latency"] + 0.3 * latency
+            stats["block_rate"] = 0.8 * stats["block_rate"] + (0.2 if blocked else 0.0)
+            if blocked:
+                stats["blocked"] += 1
+            if error:
+                stats["errors"] += 1
+
+            if blocked or error:
+                stats["failures"] += 1
+                if stats["failures"] >= self.max_failures:
+                    stats["failures"] = 0
+                    stats["cooldown_until"] = time.time() + self.cooldown
+                    print(f"🧊 Proxy {proxy} cooling down for {self.cooldown}s")
+            else:
+                stats["failures"] = 0
+
+    def get(self, url, avoid=(), **kwargs):
+        """Send a GET through the best available proxy; the response's .proxy says which one"""
+        proxy = self.pick(avoid)
+        started = time.monotonic()
+        try:
+            res = self._session(proxy).get(url, **kwargs)
+        except requests.exceptions.RequestException:
+            self.record(proxy, error=True)
+            raise
+        self.record(proxy, time.monotonic() - started, res.status_code)
+        res.proxy = proxy
+        return res
+
+    def report(self):
+        """Print per-proxy request, block and latency counts"""
+        print("📊 Proxy usage:")
+        for proxy, stats in sorted(self.stats.items(), key=lambda item: -item[1]["requests"]):
+            if stats["requests"]:
+                print(f"   - {proxy}: {stats['requests']} requests, {stats['blocked']} blocked, "
+                      f"{stats['errors']} errors, {stats['latency']:.2f}s avg latency")
+
+class CachedSession:
+    """Wrap a session (or ProxyPool) with an on-disk HTTP response cache.
+
+    Bodies are stored content-addressed under `cache_dir/objects` (identical
+    pages share one file) and an index maps each URL to its body, status,
+    validators and timestamps. Fresh entries are served without touching the
+    network, stale ones are revalidated with If-None-Match /
+    If-Modified-Since, and the least recently used entries are evicted once
+    the cache grows past `max_bytes`. In offline mode only the cache is used.
+    With a `shared_lock`, other processes may use the same cache directory:
+    the index is merged with the copy on disk before every save. The index
+    is saved every INDEX_SAVE_EVERY stores and by flush() / close().
+    """
+
+    CACHEABLE_STATUSES = (200, 404)
+    INDEX_SAVE_EVERY = 50
+
+    def __init__(self, session, cache_dir=HTTP_CACHE_DIR, ttl=3600, max_bytes=200 * 1024 * 1024, offline=False,
+                 shared_lock=None):
+        self.session = session
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.index_file = os.path.join(cache_dir, "index.json")
+        self.index = load_json_file(self.index_file, {})
+        self.lock = threading.Lock()
+        self.shared_lock = shared_lock
+        self.dirty = False
+        self.unsaved = 0
+        self.hits = self.revalidated = self.misses = 0
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+
+    def _body_path(self, digest):
+        return os.path.join(self.cache_dir, "objects", digest[:2], digest)
+
+    def is_cached(self, url):
+        """True if get(url) will be answered from disk without a network request"""
+        entry = self.index.get(url)
+        if not entry:
+            return self.offline
+        return self.offline or time.time() - entry["stored_at"] < self.ttl
+
+    def _response(self, url, entry):
+        try:
+            with open(self._body_path(entry["body"]), "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        res = requests.Response()
+        res.status_code = entry["status"]
+        res._content = content
+        res._content_consumed = True  # So iter_content() serves the cached body too
+        res.headers.update(entry["headers"])
+        res.encoding = requests.utils.get_encoding_from_headers(res.headers)
+        res.url = url
+        res.from_cache = True
+        with self.lock:
+            entry["last_used"] = time.time()
+            self.dirty = True
+        return res
+
+    def _offline_miss(self, url):
+        res = requests.Response()
+        res.status_code = 504
+        res._content = b""
+        res._content_consumed = True
+        res.url = url
+        res.reason = "Not in offline cache"
+        print(f"📴 Offline: {url} is not cached")
+        return res
+
+    def _store(self, url, res):
+        digest = hashlib.sha256(res.content).hexdigest()
+        path = self._body_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_name = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_name, "wb") as f:
+                f.write(res.content)
+            os.replace(tmp_name, path)
+
+        headers = {name: res.headers[name] for name in ("Content-Type", "ETag", "Last-Modified") if name in res.headers}
+        now = time.time()
+        with self.lock:
+            self.index[url] = {
+                "status": res.status_code,
+                "headers": headers,
+                "body": digest,
+                "size": len(res.content),
+                "stored_at": now,
+                "last_used": now
+            }
+            self.dirty = True
+            self.unsaved += 1
+            # Rewriting the whole index on every store would make a long run quadratic in its size
+            if self.unsaved >= self.INDEX_SAVE_EVERY:
+                self._save_index()
+
+    def _save_index(self):
+        # Caller holds self.lock
+        if self.shared_lock is None:
+            self._evict()
+            save_json_file(self.index_file, self.index)
+        else:
+            with self.shared_lock:
+                for url, entry in load_json_file(self.index_file, {}).items():
+                    mine = self.index.get(url)
+                    if mine is None or entry["stored_at"] > mine["stored_at"]:
+                        self.index[url] = entry
+                self._evict()
+                save_json_file(self.index_file, self.index)
+        self.dirty = False
+        self.unsaved = 0
+
+    def _evict(self):
+        # Sizes are counted per unique body, since identical pages share a file;
+        # a body is deleted once no entry refers to it any more
+        sizes, references = {}, {}
+        for entry in self.index.values():
+            sizes[entry["body"]] = entry["size"]
+            references[entry["body"]] = references.get(entry["body"], 0) + 1
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+
+        for url, entry in sorted(self.index.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            del self.index[url]
+            references[entry["body"]] -= 1
+            if not references[entry["body"]]:
+                total -= entry["size"]
+                try:
+                    os.remove(self._body_path(entry["body"]))
+                except FileNotFoundError:
+                    pass
+
+    def get(self, url, **kwargs):
+        """GET through the cache"""
+        entry = self.index.get(url)
+        if entry and self.is_cached(url):
+            res = self._response(url, entry)
+            if res is not None:
+                self.hits += 1
+                return res
+        if self.offline:
+            self.misses += 1
+            return self._offline_miss(url)
+
+        # Stale entry: ask the server whether our copy is still current
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry:
+            if entry["headers"].get("ETag"):
+                headers["If-None-Match"] = entry["headers"]["ETag"]
+            if entry["headers"].get("Last-Modified"):
+                headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+
+        res = self.session.get(url, headers=headers, **kwargs)
+        if res.status_code == 304 and entry:
+            with self.lock:
+                entry["stored_at"] = time.time()
+            cached = self._response(url, entry)
+            if cached is not None:
+                self.revalidated += 1
+                return cached
+
+        self.misses += 1
+        if res.status_code in self.CACHEABLE_STATUSES:
+            self._store(url, res)
+        return res
+
+    def flush(self):
+        """Save the index if anything changed since the last save"""
+        with self.lock:
+            if self.dirty:
+                self._save_index()
+
+    def close(self):
+        """Persist new entries and last-used times and print hit counts"""
+        self.flush()
+        print(f"💾 HTTP cache: {self.hits} hits, {self.revalidated} revalidated, {self.misses} misses")
 
 def find_company_slug(company_name, source):
     """Help find the correct company slug by testing different variations"""
@@ -80,595 +607,2290 @@ def find_company_slug(company_name, source):
     
     return variations[0]  # Return the first variation as default
 
-def scrape_g2(company, start_date, end_date, session):
-    reviews = []
-    page = 1
-    
-    # Test the URL first
-    test_url = f"https://www.g2.com/products/{company}"
-    try:
-        test_response = session.get(test_url, timeout=30)
-        print(f"🔍 Testing G2 URL: {test_url} - Status: {test_response.status_code}")
-        
-        if test_response.status_code == 404:
-            print(f"❌ Company '{company}' not found on G2. Try checking the correct slug.")
-            suggested = find_company_slug(company, "G2")
-            print(f"💡 Try: python script.py --company {suggested} ...")
-            return reviews
-        elif test_response.status_code == 403:
-            print("❌ G2 is blocking requests. The site may have anti-bot protection.")
-            return reviews
-    except Exception as e:
-        print(f"❌ Error testing G2 URL: {e}")
-        return reviews
-    
-    while True:
-        url = f"https://www.g2.com/products/{company}/reviews?page={page}"
-        try:
-            # Add random delay between requests
-            time.sleep(random.uniform(3, 8))
-            
-            res = session.get(url, timeout=30)
-            print(f"Page {page}: {res.status_code}")
-            
-            if res.status_code != 200:
-                if res.status_code == 403:
-                    print("❌ Access forbidden. G2 detected scraping attempt.")
-                break
+# Default number of review pages kept in flight per host. Kept low on purpose:
+# these sites rate-limit aggressively and more parallelism mostly buys 403s.
+DEFAULT_CONCURRENCY = {
+    "g2": 2,
+    "capterra": 2,
+    "trustpilot": 3
+}
 
-            soup = BeautifulSoup(res.text, "html.parser")
-            
-            # Try multiple selectors as G2 might use different ones
-            selectors = [
-                ".review-card",
-                "[data-testid='review-card']",
-                ".paper--white",
-                ".review"
-            ]
-            
-            review_cards = []
-            for selector in selectors:
-                review_cards = soup.select(selector)
-                if review_cards:
-                    print(f"✅ Found {len(review_cards)} reviews using selector: {selector}")
-                    break
-            
-            if not review_cards:
-                print(f"❌ No review cards found on page {page}")
-                if page == 1:
-                    print("🔍 Available elements on page:")
-                    # Debug: print some elements to understand page structure
-                    for elem in soup.find_all(['div', 'article'], limit=5):
-                        classes = elem.get('class', [])
-                        if classes:
-                            print(f"   - Element with classes: {' '.join(classes)}")
-                break
+# Seconds between requests per in-flight page that the adaptive rate limit starts
+# from (the mean of the random 3-8 s sleep every request used to take)
+BASE_REQUEST_INTERVAL = 5.5
 
-            for card in review_cards:
-                try:
-                    # Try multiple date selectors
-                    date_text = None
-                    for date_selector in ["time", "[datetime]", ".review-date"]:
-                        date_elem = card.select_one(date_selector)
-                        if date_elem:
-                            date_text = date_elem
-                            break
-                    
-                    if not date_text:
-                        continue
-                    
-                    # Try different date formats
-                    date_attr = date_text.get("datetime") or date_text.get_text(strip=True)
-                    try:
-                        review_date = datetime.strptime(date_attr, "%Y-%m-%d")
-                    except:
-                        try:
-                            review_date = datetime.strptime(date_attr, "%Y-%m-%dT%H:%M:%S")
-                        except:
-                            continue
-                    
-                    if not (start_date <= review_date <= end_date):
-                        continue
-
-                    # Try multiple selectors for each field
-                    title_selectors = [".review-title", "[data-testid='review-title']", "h3", "h4"]
-                    body_selectors = [".review-body", "[data-testid='review-body']", ".review-content", "p"]
-                    name_selectors = [".reviewer-name", "[data-testid='reviewer-name']", ".author-name"]
-                    rating_selectors = [".star-rating", "[data-rating]", ".stars"]
-
-                    title = ""
-                    for selector in title_selectors:
-                        elem = card.select_one(selector)
-                        if elem:
-                            title = elem.get_text(strip=True)
-                            break
-
-                    description = ""
-                    for selector in body_selectors:
-                        elem = card.select_one(selector)
-                        if elem:
-                            description = elem.get_text(strip=True)
-                            break
-
-                    reviewer_name = ""
-                    for selector in name_selectors:
-                        elem = card.select_one(selector)
-                        if elem:
-                            reviewer_name = elem.get_text(strip=True)
-                            break
-
-                    rating = None
-                    for selector in rating_selectors:
-                        elem = card.select_one(selector)
-                        if elem:
-                            rating = elem.get("data-rating") or elem.get("aria-label")
-                            break
-
-                    reviews.append({
-                        "title": title,
-                        "description": description,
-                        "date": review_date.strftime("%Y-%m-%d"),
-                        "reviewer_name": reviewer_name,
-                        "rating": rating,
-                        "source": "G2"
-                    })
-                except Exception as e:
-                    print(f"⚠️ Skipping a review due to error: {e}")
-            
-            page += 1
-            if page > 10:  # Limit pages to avoid infinite loops
-                print("🛑 Reached page limit (10 pages)")
-                break
-                
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Request failed for page {page}: {e}")
-            break
-    
-    return reviews
+class ScrapeOptions:
+    """Tunable knobs shared by the scrape_* functions"""
 
-def find_capterra_product_url(company, session):
-    """Search Capterra for the company and extract the product URL"""
-    search_url = f"https://www.capterra.com/search/?query={company}"
-    
-    try:
-        print(f"🔍 Searching Capterra for '{company}': {search_url}")
-        time.sleep(random.uniform(2, 4))
-        
-        res = session.get(search_url, timeout=30)
-        print(f"Search results status: {res.status_code}")
-        
-        if res.status_code != 200:
-            print(f"❌ Failed to search Capterra: HTTP {res.status_code}")
-            return None
-            
-        soup = BeautifulSoup(res.text, "html.parser")
-        
-        # Look for product cards in search results
-        product_cards = soup.select('[data-testid="search-product-card"]')
-        
-        if not product_cards:
-            print("❌ No product cards found in search results")
-            return None
-        
-        print(f"✅ Found {len(product_cards)} product(s) in search results")
-        
-        # Look for the best matching product
-        for card in product_cards:
-            try:
-                # Extract product name and URL
-                product_name_elem = card.select_one('[data-testid="product-name"]')
-                if not product_name_elem:
-                    continue
-                    
-                product_name = product_name_elem.get_text(strip=True).lower()
-                product_url = product_name_elem.get('href')
-                
-                if not product_url:
-                    continue
-                
-                print(f"📦 Found product: '{product_name}' - {product_url}")
-                
-                # Check if this matches our search (simple matching)
-                if company.lower() in product_name or product_name in company.lower():
-                    print(f"✅ Best match found: {product_name}")
-                    return product_url
-                    
-            except Exception as e:
-                print(f"⚠️ Error processing product card: {e}")
-                continue
-        
-        # If no exact match, return the first result
-        first_card = product_cards[0]
-        first_product_elem = first_card.select_one('[data-testid="product-name"]')
-        if first_product_elem:
-            first_url = first_product_elem.get('href')
-            first_name = first_product_elem.get_text(strip=True)
-            print(f"⚠️ No exact match found, using first result: {first_name}")
-            return first_url
-            
-        return None
-        
-    except Exception as e:
-        print(f"❌ Error searching Capterra: {e}")
-        return None
+    def __init__(self, concurrency=1, max_pages=None, first_page=1, on_page=None, keep_reviews=True,
+                 parser="html.parser", restrict_parsing=True, embedded_json=True, throttle=None, retry=None,
+                 on_failed_page=None, metrics=None, resolutions=None, stream=False, parse_pool=None):
+        self.concurrency = max(1, concurrency)
+        # Optional budget of pages to fetch from the first page that overlaps the window (None: the whole listing)
+        self.max_pages = max_pages
+        # Parser backend, and whether to build only the review-card subtrees
+        self.parser = parser
+        self.restrict_parsing = restrict_parsing
+        # Read reviews from JSON embedded in the page when the site ships it
+        self.embedded_json = embedded_json
+        # Parse pages after the first while they download and stop reading once the review list ends
+        self.stream = stream
+        # Optional ParsePool parsing pages in worker processes while the next ones download
+        self.parse_pool = parse_pool
+        # Resume point, and a callback(page, page_reviews) run after each page is done
+        self.first_page = first_page
+        self.on_page = on_page
+        # Streaming callers hand every page to on_page and don't need a list back
+        self.keep_reviews = keep_reviews
+        # Adaptive per-domain request rate, shared by every scrape that uses the same RateLimiter
+        self.throttle = throttle if throttle is not None else RateLimiter()
+        # Retries of transient failures, and a callback(page, url, reason) for pages that still failed
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.on_failed_page = on_failed_page
+        # Optional Metrics collecting request, sleep and parse timings
+        self.metrics = metrics
+        # Company -> slug / product ID resolutions, persisted between runs when given a file-backed cache
+        self.resolutions = resolutions if resolutions is not None else ResolutionCache()
 
-def scrape_capterra(company, start_date, end_date, session):
-    reviews = []
-    
-    # First, search for the company to get the correct product URL
-    product_url = find_capterra_product_url(company, session)
-    
-    if not product_url:
-        print(f"❌ Could not find product URL for '{company}' on Capterra")
-        return reviews
-    
-    # Extract the product ID and slug from the URL
-    # URL format: https://www.capterra.com/p/135003/Slack/
-    try:
-        import re
-        url_match = re.search(r'/p/(\d+)/([^/]+)/', product_url)
-        if url_match:
-            product_id = url_match.group(1)
-            product_slug = url_match.group(2)
-            print(f"✅ Extracted product info - ID: {product_id}, Slug: {product_slug}")
-        else:
-            print(f"❌ Could not extract product info from URL: {product_url}")
-            return reviews
-    except Exception as e:
-        print(f"❌ Error parsing product URL: {e}")
-        return reviews
-    
-    # Test the product page first
-    try:
-        test_response = session.get(product_url, timeout=30)
-        print(f"🔍 Testing product page: {product_url} - Status: {test_response.status_code}")
-        
-        if test_response.status_code != 200:
-            print(f"❌ Product page not accessible: HTTP {test_response.status_code}")
-            return reviews
-    except Exception as e:
-        print(f"❌ Error testing product page: {e}")
-        return reviews
-    
-    # Now scrape reviews from the reviews page
-    page = 1
-    while True:
-        # Build reviews URL using the extracted product info
-        reviews_url = f"https://www.capterra.com/p/{product_id}/{product_slug}/reviews/?page={page}"
-        
-        try:
-            time.sleep(random.uniform(3, 8))
-            res = session.get(reviews_url, timeout=30)
-            print(f"Page {page}: {res.status_code} - {reviews_url}")
-            
-            if res.status_code != 200:
-                if res.status_code == 404 and page == 1:
-                    print("❌ Reviews page not found. Product might not have reviews.")
-                break
+def classify_status(status):
+    """How a response status is handled: ok, retry (429/5xx), rotate (403: another proxy), stop (404/410) or fail"""
+    if status < 400:
+        return "ok"
+    if status in (404, 410):
+        return "stop"
+    if status == 403:
+        return "rotate"
+    if status == 429 or status >= 500:
+        return "retry"
+    return "fail"
 
-            soup = BeautifulSoup(res.text, "html.parser")
-            
-            # Look for review cards with multiple selectors
-            review_selectors = [
-                '[data-testid="review-card"]',
-                '.review-card',
-                '[data-testid="review"]',
-                '.review',
-                '.user-review',
-                '[data-review-id]'
-            ]
-            
-            review_cards = []
-            for selector in review_selectors:
-                review_cards = soup.select(selector)
-                if review_cards:
-                    print(f"✅ Found {len(review_cards)} reviews using selector: {selector}")
-                    break
-            
-            if not review_cards:
-                print(f"❌ No review cards found on page {page}")
-                if page == 1:
-                    print("🔍 Available elements on page:")
-                    # Debug: print some elements to understand page structure
-                    for elem in soup.find_all(['div', 'article'], limit=10):
-                        classes = elem.get('class', [])
-                        test_id = elem.get('data-testid', '')
-                        if classes or test_id:
-                            print(f"   - Element: classes={classes}, testid={test_id}")
-                break
+class RetryPolicy:
+    """Exponential backoff with full jitter, capped by a retry budget per run.
 
-            for card in review_cards:
-                try:
-                    # Extract date
-                    date_elem = None
-                    for date_selector in ["time[datetime]", ".review-date", "[data-testid='review-date']", ".date"]:
-                        date_elem = card.select_one(date_selector)
-                        if date_elem:
-                            break
-                    
-                    if not date_elem:
-                        continue
-                    
-                    # Try to parse the date
-                    date_text = date_elem.get("datetime") or date_elem.get_text(strip=True)
-                    try:
-                        if 'T' in date_text:
-                            review_date = datetime.strptime(date_text.split('T')[0], "%Y-%m-%d")
-                        else:
-                            # Try different date formats
-                            for fmt in ["%Y-%m-%d", "%m/%d/%Y", "%B %d, %Y"]:
-                                try:
-                                    review_date = datetime.strptime(date_text, fmt)
-                                    break
-                                except:
-                                    continue
-                            else:
-                                continue
-                    except:
-                        continue
-                    
-                    # Check if date is within range
-                    if not (start_date <= review_date <= end_date):
-                        continue
-
-                    # Extract title
-                    title = ""
-                    title_selectors = [
-                        ".review-title", 
-                        "[data-testid='review-title']", 
-                        "h3", "h4", 
-                        ".title",
-                        ".review-header"
-                    ]
-                    for selector in title_selectors:
-                        title_elem = card.select_one(selector)
-                        if title_elem:
-                            title = title_elem.get_text(strip=True)
-                            break
-
-                    # Extract review text/description
-                    description = ""
-                    text_selectors = [
-                        ".review-body", 
-                        "[data-testid='review-body']", 
-                        ".review-content", 
-                        ".review-text",
-                        "p"
-                    ]
-                    for selector in text_selectors:
-                        text_elem = card.select_one(selector)
-                        if text_elem:
-                            description = text_elem.get_text(strip=True)
-                            break
-
-                    # Extract reviewer name
-                    reviewer_name = ""
-                    name_selectors = [
-                        ".reviewer-name", 
-                        "[data-testid='reviewer-name']", 
-                        ".author-name",
-                        ".user-name",
-                        ".reviewer"
-                    ]
-                    for selector in name_selectors:
-                        name_elem = card.select_one(selector)
-                        if name_elem:
-                            reviewer_name = name_elem.get_text(strip=True)
-                            break
-
-                    # Extract rating
-                    rating = None
-                    rating_selectors = [
-                        ".star-rating[data-rating]",
-                        "[data-rating]",
-                        ".stars",
-                        ".rating"
-                    ]
-                    for selector in rating_selectors:
-                        rating_elem = card.select_one(selector)
-                        if rating_elem:
-                            rating = rating_elem.get("data-rating")
-                            if not rating:
-                                # Try to extract from aria-label or text
-                                aria_label = rating_elem.get("aria-label", "")
-                                if "star" in aria_label.lower():
-                                    import re
-                                    rating_match = re.search(r'(\d+(?:\.\d+)?)', aria_label)
-                                    if rating_match:
-                                        rating = rating_match.group(1)
-                            break
-
-                    # Only add review if we have essential data
-                    if description and reviewer_name:
-                        review_data = {
-                            "title": title,
-                            "description": description,
-                            "date": review_date.strftime("%Y-%m-%d"),
-                            "reviewer_name": reviewer_name,
-                            "rating": rating,
-                            "source": "Capterra"
-                        }
-                        
-                        reviews.append(review_data)
-                        print(f"✅ Extracted review from {reviewer_name} - Rating: {rating}")
+    A request is tried up to `attempts` times; retry n waits a random time
+    of up to min(`cap`, `base` * 2**n) seconds. All retries of a run draw on
+    one `budget`, so a site that is down costs a few extra requests rather
+    than `attempts` times every page.
+    """
 
-                except Exception as e:
-                    print(f"⚠️ Skipping a review due to error: {e}")
-            
-            page += 1
-            if page > 10:
-                print("🛑 Reached page limit (10 pages)")
-                break
-                
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Request failed for page {page}: {e}")
-            break
-    
-    return reviews
+    def __init__(self, attempts=4, base=2.0, cap=60.0, budget=30):
+        self.attempts = max(1, attempts)
+        self.base = base
+        self.cap = cap
+        self.budget = budget
+        self.retries = 0
+        self.lock = threading.Lock()
 
-def scrape_trustpilot(company, start_date, end_date, session):
-    reviews = []
-    
-    # Test URL first
-    test_url = f"https://www.trustpilot.com/review/{company}"
-    try:
-        test_response = session.get(test_url, timeout=30)
-        print(f"🔍 Testing Trustpilot URL: {test_url} - Status: {test_response.status_code}")
-        
-        if test_response.status_code == 404:
-            print(f"❌ Company '{company}' not found on Trustpilot.")
-            # For Trustpilot, company might be a domain like slack.com
-            if not company.endswith('.com'):
-                suggested = f"{company}.com"
-                print(f"💡 Try: python script.py --company {suggested} --source trustpilot ...")
-            return reviews
-    except Exception as e:
-        print(f"❌ Error testing Trustpilot URL: {e}")
-        return reviews
-    
-    page = 1
-    while True:
-        url = f"https://www.trustpilot.com/review/{company}?page={page}"
-        try:
-            time.sleep(random.uniform(3, 8))
-            res = session.get(url, timeout=30)
-            print(f"Page {page}: {res.status_code}")
-            
-            if res.status_code != 200:
-                break
+    def allow(self, attempt):
+        """Take a retry from the budget if try number `attempt` (0-based) may be retried"""
+        with self.lock:
+            if attempt + 1 >= self.attempts:
+                return False
+            if self.retries >= self.budget:
+                if self.retries == self.budget:
+                    self.retries += 1
+                    print(f"⚠️ Retry budget of {self.budget} used up, failing pages are no longer retried")
+                return False
+            self.retries += 1
+            return True
 
-            soup = BeautifulSoup(res.text, "html.parser")
-            
-            # Updated selectors based on the new HTML structure
-            review_cards = soup.select('article[data-service-review-card-paper="true"]')
-            
-            if not review_cards:
-                # Try alternative selectors
-                review_cards = soup.select('.styles_reviewCard__Qwhpy, .CDS_Card_card__485220')
-                
-            if not review_cards:
-                print(f"❌ No review cards found on page {page}")
-                if page == 1:
-                    print("🔍 Available elements on page:")
-                    # Debug: print some elements to understand page structure
-                    for elem in soup.find_all(['article', 'div'], class_=lambda x: x and 'review' in str(x).lower(), limit=5):
-                        classes = elem.get('class', [])
-                        if classes:
-                            print(f"   - Element with classes: {' '.join(classes)}")
-                break
+    def backoff(self, attempt):
+        """Seconds to wait before retry number `attempt` (0-based)"""
+        return random.uniform(0, min(self.cap, self.base * 2 ** attempt))
 
-            print(f"✅ Found {len(review_cards)} reviews on page {page}")
+# Histogram bucket bounds in seconds: from a single field extraction up to a long Retry-After pause
+METRIC_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                  5.0, 10.0, 30.0, 60.0)
 
-            for card in review_cards:
-                try:
-                    # Extract date - look for time element with datetime attribute
-                    date_elem = card.select_one("time[data-service-review-date-time-ago='true']")
-                    if not date_elem:
-                        date_elem = card.select_one("time[datetime]")
-                    
-                    if not date_elem:
-                        continue
-                    
-                    # Get datetime attribute and parse it
-                    date_attr = date_elem.get("datetime")
-                    if not date_attr:
-                        continue
-                    
-                    try:
-                        # Parse ISO format datetime (e.g., "2025-01-21T16:46:14.000Z")
-                        if 'T' in date_attr:
-                            review_date = datetime.strptime(date_attr.split('T')[0], "%Y-%m-%d")
-                        else:
-                            review_date = datetime.strptime(date_attr, "%Y-%m-%d")
-                    except ValueError:
-                        continue
-                    
-                    # Check if date is within range
-                    if not (start_date <= review_date <= end_date):
-                        continue
-
-                    # Extract reviewer name
-                    reviewer_name = ""
-                    name_elem = card.select_one("[data-consumer-name-typography='true']")
-                    if name_elem:
-                        reviewer_name = name_elem.get_text(strip=True)
-
-                    # Extract rating from star image alt text
-                    rating = None
-                    star_img = card.select_one(".CDS_StarRating_starRating__614d2e")
-                    if star_img:
-                        alt_text = star_img.get("alt", "")
-                        # Extract number from "Rated X out of 5 stars"
-                        import re
-                        rating_match = re.search(r'Rated (\d+) out of 5 stars', alt_text)
-                        if rating_match:
-                            rating = rating_match.group(1)
-
-                    # Extract review title (now available in the new structure)
-                    title = ""
-                    title_elem = card.select_one("[data-service-review-title-typography='true']")
-                    if title_elem:
-                        title = title_elem.get_text(strip=True)
-
-                    # Extract review text
-                    review_text = ""
-                    text_elem = card.select_one("[data-service-review-text-typography='true']")
-                    if text_elem:
-                        review_text = text_elem.get_text(strip=True)
-
-                    # Extract additional info like country and review count
-                    country = ""
-                    country_elem = card.select_one("[data-consumer-country-typography='true']")
-                    if country_elem:
-                        country = country_elem.get_text(strip=True)
-
-                    review_count = ""
-                    count_elem = card.select_one("[data-consumer-reviews-count-typography='true']")
-                    if count_elem:
-                        review_count = count_elem.get_text(strip=True)
-
-                    # Extract experience date from badge if available
-                    experience_date = ""
-                    badge_date_elem = card.select_one('[data-testid="review-badge-date"] .CDS_Badge_badgeText__9995a1')
-                    if badge_date_elem:
-                        experience_date = badge_date_elem.get_text(strip=True)
-
-                    # Check if review is unprompted
-                    is_unprompted = bool(card.select_one('[data-testid="review-badge-unprompted"]'))
-
-                    # Only add review if we have essential data
-                    if review_text and reviewer_name:
-                        review_data = {
-                            "title": title,
-                            "description": review_text,
-                            "date": review_date.strftime("%Y-%m-%d"),
-                            "reviewer_name": reviewer_name,
-                            "rating": rating,
-                            "source": "Trustpilot",
-                            "country": country,
-                            "reviewer_total_reviews": review_count,
-                            "experience_date": experience_date,
-                            "is_unprompted": is_unprompted
-                        }
-                        
-                        reviews.append(review_data)
-                        print(f"✅ Extracted review from {reviewer_name} ({country}) - Rating: {rating}/5")
-                        print(f"   Title: {title[:50]}...")
-                        print(f"   Experience Date: {experience_date}")
+# Every metric a run records: name -> (Prometheus type, help text)
+METRIC_HELP = {
+    "scraper_requests_total": ("counter", "HTTP requests sent, by domain and status"),
+    "scraper_cached_responses_total": ("counter", "Requests answered from the response cache"),
+    "scraper_response_bytes_total": ("counter", "Response body bytes downloaded"),
+    "scraper_retries_total": ("counter", "Requests retried, by reason"),
+    "scraper_pages_total": ("counter", "Listing pages handled, by outcome"),
+    "scraper_reviews_total": ("counter", "Reviews extracted inside the date window"),
+    "scraper_duplicates_total": ("counter", "Reviews dropped as already written by this or an earlier run"),
+    "scraper_http_phase_seconds": ("histogram", "Request time by phase: dns, connect (TCP/TLS), ttfb, download"),
+    "scraper_sleep_seconds": ("histogram", "Time spent waiting: throttle (rate limit) or backoff (before a retry)"),
+    "scraper_parse_seconds": ("histogram", "Time to parse one listing page and extract its reviews"),
+    "scraper_dom_seconds": ("histogram", "Time to build a page's DOM and find its review cards"),
+    "scraper_field_seconds": ("histogram", "Time to extract one field from one review card"),
+    "scraper_stage_busy_seconds_total": ("counter", "Seconds each pipeline stage spent working: fetch, parse, write"),
+    "scraper_parse_queue_depth": ("histogram", "Pages downloaded and not yet parsed, sampled as each one is queued")
+}
 
-                except Exception as e:
-                    print(f"⚠️ Skipping a review due to error: {e}")
-            
-            page += 1
-            if page > 10:
-                print("🛑 Reached page limit (10 pages)")
+class Metrics:
+    """Counters and latency histograms showing where a run's wall-clock time goes.
+
+    Every value is keyed by metric name plus its labels. Thread-safe; batch
+    workers hand a snapshot() back with each job and the parent merge()s
+    them. Exported as a JSON run report and a Prometheus text-format file.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.time()
+        self.lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                # Per-bucket counts (the last one is +Inf), sum, count
+                histogram = self.histograms[key] = [[0] * (len(METRIC_BUCKETS) + 1), 0.0, 0]
+            histogram[0][bisect.bisect_left(METRIC_BUCKETS, seconds)] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    def snapshot(self, reset=False):
+        """Return a picklable copy of every value (and start over if `reset`)"""
+        with self.lock:
+            data = {
+                "counters": dict(self.counters),
+                "histograms": {key: [list(h[0]), h[1], h[2]] for key, h in self.histograms.items()}
+            }
+            if reset:
+                self.counters, self.histograms = {}, {}
+        return data
+
+    def merge(self, data):
+        """Add a snapshot() taken elsewhere (e.g. in a batch worker) to these metrics"""
+        with self.lock:
+            for key, value in data["counters"].items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for key, (buckets, total, count) in data["histograms"].items():
+                histogram = self.histograms.setdefault(key, [[0] * (len(METRIC_BUCKETS) + 1), 0.0, 0])
+                histogram[0] = [a + b for a, b in zip(histogram[0], buckets)]
+                histogram[1] += total
+                histogram[2] += count
+
+    @staticmethod
+    def _quantile(buckets, count, q):
+        # Upper bound of the bucket holding the q-quantile, like Prometheus' histogram_quantile
+        seen = 0
+        for bound, bucket in zip(METRIC_BUCKETS + (None,), buckets):
+            seen += bucket
+            if seen >= q * count:
+                return bound
+        return None
+
+    def time_breakdown(self):
+        """Total seconds per timed phase, summed over domains, sources and parsers, largest first"""
+        totals = {}
+        for (name, labels), (_, total, _) in self.histograms.items():
+            if not name.endswith("_seconds"):
+                continue
+            detail = ",".join(f"{k}={v}" for k, v in labels if k not in ("domain", "source", "parser"))
+            phase = f"{name}{{{detail}}}" if detail else name
+            totals[phase] = totals.get(phase, 0.0) + total
+        return dict(sorted(((phase, round(total, 6)) for phase, total in totals.items()), key=lambda item: -item[1]))
+
+    def report(self, **run):
+        """The JSON run report: `run` details, counters, histogram summaries and the time breakdown"""
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, [list(h[0]), h[1], h[2]]) for key, h in self.histograms.items())
+        return {
+            "run": dict(run, started_at=datetime.fromtimestamp(self.started, timezone.utc).isoformat(),
+                        elapsed_seconds=round(time.time() - self.started, 3)),
+            "time_breakdown": self.time_breakdown(),
+            "counters": [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in counters],
+            "histograms": [
+                {"name": name, "labels": dict(labels), "count": count, "sum": round(total, 6),
+                 "mean": round(total / count, 6) if count else None,
+                 "p50": self._quantile(buckets, count, 0.5), "p90": self._quantile(buckets, count, 0.9),
+                 "p99": self._quantile(buckets, count, 0.99)}
+                for (name, labels), (buckets, total, count) in histograms
+            ]
+        }
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+    def prometheus(self):
+        """Render every metric in the Prometheus text exposition format"""
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, [list(h[0]), h[1], h[2]]) for key, h in self.histograms.items())
+        lines = []
+        for name, (kind, help_text) in METRIC_HELP.items():
+            series = [(labels, value) for (n, labels), value in (counters if kind == "counter" else histograms)
+                      if n == name]
+            if not series:
+                continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for labels, value in series:
+                if kind == "counter":
+                    lines.append(f"{name}{self._labels(labels)} {value}")
+                    continue
+                buckets, total, count = value
+                cumulative = 0
+                for bound, bucket in zip(METRIC_BUCKETS + ("+Inf",), buckets):
+                    cumulative += bucket
+                    lines.append(f"{name}_bucket{self._labels(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_sum{self._labels(labels)} {total:.6f}")
+                lines.append(f"{name}_count{self._labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, report_file=None, prometheus_file=None, **run):
+        """Save the JSON run report and/or the Prometheus text file"""
+        if report_file:
+            save_json_file(report_file, self.report(**run))
+            print(f"📝 Wrote run report to {report_file}")
+        if prometheus_file:
+            tmp_name = f"{prometheus_file}.tmp"
+            with open(tmp_name, "w", encoding="utf-8") as f:
+                f.write(self.prometheus())
+            os.replace(tmp_name, prometheus_file)
+            print(f"📝 Wrote Prometheus metrics to {prometheus_file}")
+
+    def print_summary(self, limit=8):
+        """Print the phases that took the most time, plus bytes and retries"""
+        breakdown = list(self.time_breakdown().items())[:limit]
+        if not breakdown:
+            return
+        print("⏱️ Where the time went:")
+        for phase, total in breakdown:
+            print(f"   - {phase}: {total:.3f}s")
+        with self.lock:
+            downloaded = sum(v for (n, _), v in self.counters.items() if n == "scraper_response_bytes_total")
+            retries = sum(v for (n, _), v in self.counters.items() if n == "scraper_retries_total")
+        print(f"   {downloaded / 1024 / 1024:.2f} MiB downloaded, {retries} retries")
+
+def fetch_page(session, url, delay=(3, 8), throttle=None, retry=None, metrics=None, stream=False):
+    """Fetch one page once the rate limiter allows it (or after a random delay without one).
+
+    With a RetryPolicy, connection errors, 429 and 5xx answers are retried
+    with backoff and a 403 is retried through a different proxy when the
+    session rotates proxies. The last response is returned (or the last
+    error raised) once the retries run out. With `stream`, the body of the
+    returned response is left unread (see response_chunks).
+    """
+    domain = urlsplit(url).hostname or ""
+    # Pages served from the response cache cost no request, so skip the delay
+    is_cached = getattr(session, "is_cached", None)
+    if is_cached and is_cached(url):
+        if metrics:
+            metrics.inc("scraper_cached_responses_total", domain=domain)
+        return session.get(url, timeout=30, stream=stream)
+
+    blocked_proxies = set()
+    attempt = 0
+    while True:
+        started = time.perf_counter()
+        if throttle:
+            throttle.wait(url)
+        elif delay:
+            time.sleep(random.uniform(*delay))
+        if metrics:
+            metrics.observe("scraper_sleep_seconds", time.perf_counter() - started, domain=domain, kind="throttle")
+        try:
+            res = session.get(url, timeout=30, stream=stream,
+                              **({"avoid": blocked_proxies} if blocked_proxies else {}))
+        except requests.exceptions.RequestException as e:
+            if metrics:
+                metrics.inc("scraper_requests_total", domain=domain, status=type(e).__name__)
+            if not (retry and retry.allow(attempt)):
+                raise
+            reason, wait_for = type(e).__name__, retry.backoff(attempt)
+        else:
+            if metrics:
+                record_response(metrics, domain, res, stream)
+            if throttle:
+                throttle.feedback(url, res.status_code, res.headers.get("Retry-After"))
+            action = classify_status(res.status_code)
+            proxy = getattr(res, "proxy", None)
+            # A 403 is only worth retrying from another IP, and then right away
+            if action == "rotate" and proxy and retry and retry.allow(attempt):
+                blocked_proxies.add(proxy)
+                reason, wait_for = f"HTTP 403 from {proxy}", 0.0
+            elif action == "retry" and retry and retry.allow(attempt):
+                reason, wait_for = f"HTTP {res.status_code}", retry.backoff(attempt)
+            else:
+                return res
+            if stream:
+                res.close()
+
+        print(f"🔁 {reason} for {url}, retry {attempt + 1}/{retry.attempts - 1} in {wait_for:.1f}s")
+        if metrics:
+            metrics.inc("scraper_retries_total", domain=domain, reason=reason.split(" from ")[0])
+            metrics.observe("scraper_sleep_seconds", wait_for, domain=domain, kind="backoff")
+        time.sleep(wait_for)
+        attempt += 1
+
+def record_response(metrics, domain, res, stream=False):
+    """Count one response and its size, and add its per-phase timings if the transport measured them.
+
+    A streamed body is counted by response_chunks as it is read instead.
+    """
+    if getattr(res, "from_cache", False):
+        metrics.inc("scraper_cached_responses_total", domain=domain)
+        return
+    metrics.inc("scraper_requests_total", domain=domain, status=str(res.status_code))
+    if not stream:
+        metrics.inc("scraper_response_bytes_total", len(res.content), domain=domain)
+    for phase, seconds in (getattr(res, "timings", None) or {}).items():
+        metrics.observe("scraper_http_phase_seconds", seconds, domain=domain, phase=phase)
+
+def retry_after_seconds(value):
+    """Seconds asked for by a Retry-After header (delta-seconds or an HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+def source_rates(concurrency=None, rate=None):
+    """Starting request rate (per second) for each source's domain from the per-source CLI settings"""
+    rates = {}
+    for source, domain in SOURCE_DOMAINS.items():
+        per_minute = for_source(rate or {}, source, None)
+        if per_minute:
+            rates[domain] = per_minute / 60
+        else:
+            in_flight = for_source(concurrency or {}, source, DEFAULT_CONCURRENCY.get(source, 1))
+            rates[domain] = in_flight / BASE_REQUEST_INTERVAL
+    return rates
+
+class RateLimiter:
+    """Adaptive token-bucket rate limit per domain.
+
+    Each domain starts at `rates[domain]` requests per second and its bucket
+    (holding up to `burst` tokens) refills at the current rate. Every healthy
+    response raises the rate by `increase` x the starting rate, up to
+    `max_factor` x; a block or rate-limit answer multiplies it by `decrease`,
+    down to 1/`min_factor` of the start, and a Retry-After header pauses the
+    domain for as long as the site asks. A request takes a random 0.5-1.5
+    tokens so the gaps between requests stay irregular.
+
+    `state` and `lock` may be a multiprocessing Manager dict and lock, so all
+    worker processes of a batch run share one budget per site.
+    """
+
+    BACKOFF_STATUSES = (403, 429, 502, 503, 504)
+
+    def __init__(self, rates=None, state=None, lock=None, burst=1.0, increase=0.05, decrease=0.5, min_factor=8,
+                 max_factor=4):
+        self.rates = rates if rates is not None else source_rates()
+        self.state = state if state is not None else {}
+        self.lock = lock or threading.Lock()
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.min_factor = min_factor
+        self.max_factor = max_factor
+
+    def _bucket(self, domain, now):
+        # Caller holds the lock. Manager dicts only see whole-value writes, so work on a copy
+        bucket = dict(self.state.get(domain) or {})
+        if not bucket:
+            rate = self.rates.get(domain, 1 / BASE_REQUEST_INTERVAL)
+            bucket = {"rate": rate, "start_rate": rate, "announced": rate, "tokens": self.burst, "updated": now,
+                      "paused_until": 0.0, "requests": 0, "backoffs": 0}
+        bucket["tokens"] = min(self.burst, bucket["tokens"] + (now - bucket["updated"]) * bucket["rate"])
+        bucket["updated"] = now
+        return bucket
+
+    def wait(self, url):
+        """Block until a request to url's domain fits in its current rate"""
+        domain = urlsplit(url).hostname or ""
+        reserved = False
+        while True:
+            with self.lock:
+                now = time.time()
+                bucket = self._bucket(domain, now)
+                delay = max(bucket["paused_until"] - now, 0.0)
+                # The token is taken once; a Retry-After that arrives while we sleep only delays the request
+                if not reserved and not delay:
+                    bucket["tokens"] -= random.uniform(0.5, 1.5)
+                    reserved = True
+                    delay = max(-bucket["tokens"] / bucket["rate"], 0.0)
+                self.state[domain] = bucket
+            if reserved and not delay:
+                return
+            time.sleep(delay)
+
+    def feedback(self, url, status, retry_after=None):
+        """Adapt the rate of url's domain to a response status (and its Retry-After header)"""
+        domain = urlsplit(url).hostname or ""
+        pause = retry_after_seconds(retry_after)
+        message = None
+        with self.lock:
+            now = time.time()
+            bucket = self._bucket(domain, now)
+            bucket["requests"] += 1
+            start_rate = bucket["start_rate"]
+            if status in self.BACKOFF_STATUSES:
+                bucket["rate"] = max(start_rate / self.min_factor, bucket["rate"] * self.decrease)
+                bucket["announced"] = bucket["rate"]
+                bucket["backoffs"] += 1
+                message = f"🐢 {domain} answered HTTP {status}, backing off to {bucket['rate'] * 60:.1f} req/min"
+                if pause:
+                    bucket["paused_until"] = max(bucket["paused_until"], now + pause)
+                    message += f", pausing {pause:.0f}s as asked (Retry-After)"
+            elif status < 500:
+                bucket["rate"] = min(start_rate * self.max_factor, bucket["rate"] + start_rate * self.increase)
+                if bucket["rate"] >= bucket["announced"] * 1.25:
+                    bucket["announced"] = bucket["rate"]
+                    message = f"🚀 {domain} is responding fine, speeding up to {bucket['rate'] * 60:.1f} req/min"
+            self.state[domain] = bucket
+        if message:
+            print(message)
+
+    def report(self):
+        """Print each domain's request count, final rate and back-offs"""
+        for domain, bucket in sorted(self.state.items()):
+            if bucket["requests"]:
+                print(f"🚦 {domain}: {bucket['requests']} requests, now at {bucket['rate'] * 60:.1f} req/min "
+                      f"(started at {bucket['start_rate'] * 60:.1f}), {bucket['backoffs']} back-offs")
+
+class PageFetcher:
+    """Fetch the pages of a fetch plan with up to `concurrency` requests in flight.
+
+    `pages` is the plan: the page numbers to request, in the order they are
+    yielded (page order, or any priority order the caller wants). Without a
+    plan, pages are counted up from `first_page`, at most `max_pages` of them
+    or until the caller stops iterating. Pages are yielded in plan order as
+    soon as they (and every page before them) have completed, so callers can
+    parse page 1 while pages 2..N are still downloading. Responses already in
+    `prefetched` are not requested again. With `stream`, the bodies of pages
+    after the first are left unread for the caller to stream (page 1 is
+    always read whole, it holds the size of the listing). `on_response(page,
+    response)` runs in the fetching thread as soon as a page has arrived,
+    e.g. to start parsing it before the pages ahead of it are done. The
+    time the fetching threads spend working adds up in `busy`.
+    """
+
+    def __init__(self, session, url_for_page, concurrency=1, first_page=1, max_pages=None, prefetched=None,
+                 throttle=None, retry=None, metrics=None, pages=None, stream=False, on_response=None):
+        self.session = session
+        self.url_for_page = url_for_page
+        self.concurrency = max(1, concurrency)
+        if pages is None:
+            pages = itertools.count(first_page) if max_pages is None else range(first_page, first_page + max_pages)
+        self.pages = pages
+        self.prefetched = prefetched or {}
+        self.throttle = throttle
+        self.retry = retry
+        self.metrics = metrics
+        self.stream = stream
+        self.on_response = on_response
+        self.busy = 0.0
+        self.lock = threading.Lock()
+
+    def _fetch(self, page):
+        started = time.perf_counter()
+        try:
+            res = fetch_page(self.session, self.url_for_page(page), throttle=self.throttle, retry=self.retry,
+                             metrics=self.metrics, stream=self.stream and page != 1)
+            if self.on_response:
+                self.on_response(page, res)
+            return res
+        finally:
+            with self.lock:
+                self.busy += time.perf_counter() - started
+
+    def __iter__(self):
+        """Yield (page, url, response, error) tuples in plan order"""
+        pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        plan = iter(self.pages)
+        queued = deque()
+        in_flight = {}
+        done = {}
+        try:
+            while True:
+                # Keep the window full, but never run too far ahead of the
+                # page we are waiting on so the reorder buffer stays small
+                while len(in_flight) < self.concurrency and len(queued) < self.concurrency * 2:
+                    page = next(plan, None)
+                    if page is None:
+                        break
+                    queued.append(page)
+                    if page in self.prefetched:
+                        done[page] = Future()
+                        done[page].set_result(self.prefetched[page])
+                    else:
+                        # In a copy of our context, so the fetch thread's output is labelled like ours
+                        in_flight[pool.submit(contextvars.copy_context().run, self._fetch, page)] = page
+
+                if not queued:
+                    break
+                current = queued[0]
+                if current not in done:
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        done[in_flight.pop(future)] = future
+                    continue
+
+                queued.popleft()
+                future = done.pop(current)
+                try:
+                    yield current, self.url_for_page(current), future.result(), None
+                except requests.exceptions.RequestException as e:
+                    yield current, self.url_for_page(current), None, e
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            if self.stream:
+                # Nobody will read these bodies: hand their connections back, also for pages still downloading
+                for page, future in itertools.chain(((page, future) for future, page in in_flight.items()),
+                                                    done.items()):
+                    if page not in self.prefetched:
+                        future.add_done_callback(self._discard)
+
+    @staticmethod
+    def _discard(future):
+        if not future.cancelled() and future.exception() is None:
+            future.result().close()
+
+def parse_page_task(source, html, page, start_date, end_date, parser, restrict_parsing, embedded_json, timed):
+    """Parse one page in a ParsePool process.
+
+    Returns (result, seconds, printed output, metrics snapshot or None); the
+    output is printed by the scraping thread, so it stays in page order.
+    """
+    metrics = Metrics() if timed else None
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        result = parse_page(source, html, page, start_date, end_date, parser, restrict_parsing, embedded_json,
+                            metrics)
+    return result, time.perf_counter() - started, output.getvalue(), metrics.snapshot() if metrics else None
+
+class ParsePool:
+    """Worker processes that parse listing pages, so parsing uses more than one core.
+
+    paginate() hands every page over from the thread that downloaded it,
+    so pages are parsed while the next ones download, and collects the
+    results in page order. The fetch window (see PageFetcher) bounds how
+    many pages can wait here. `depth` is the number of pages queued or
+    being parsed right now; one pool can serve several sources at once.
+    """
+
+    def __init__(self, workers):
+        self.workers = max(1, workers)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.depth = 0
+        self.lock = threading.Lock()
+        # Start every worker now, before the scraping threads exist
+        wait([self.executor.submit(os.getpid) for _ in range(self.workers)])
+
+    def submit(self, source, html, page, start_date, end_date, options):
+        """Queue a page for parsing; returns (Future, queue depth including it)"""
+        with self.lock:
+            self.depth += 1
+            depth = self.depth
+        future = self.executor.submit(parse_page_task, source, html, page, start_date, end_date, options.parser,
+                                      options.restrict_parsing, options.embedded_json, options.metrics is not None)
+        future.add_done_callback(self._done)
+        return future, depth
+
+    def _done(self, future):
+        with self.lock:
+            self.depth -= 1
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+def page_span(card_dates):
+    """Return (newest, oldest) card date of a page, or (None, None) if none parsed"""
+    if not card_dates:
+        return None, None
+    return max(card_dates), min(card_dates)
+
+def find_first_page(probe, end_date, newer_page=1, last_page=None):
+    """Find the first page whose reviews reach back to end_date.
+
+    Listings are sorted newest first, so "the oldest card on the page is not
+    after end_date" flips from false to true exactly once. `newer_page` is
+    known to be entirely newer than end_date; gallop forward from it to
+    bracket the flip, then bisect. `probe(page)` returns a parsed page, or
+    None once we are past the end of the listing. With a known `last_page`
+    nothing past it is probed, and last_page + 1 means no page reaches back.
+    """
+    def reaches_end_date(page):
+        result = probe(page)
+        if result is None:
+            return True
+        newest, oldest = page_span(result[1])
+        return oldest is None or oldest <= end_date
+
+    lo, hi, step = newer_page, None, 1
+    while hi is None:
+        page = lo + step if last_page is None else min(lo + step, last_page)
+        if page > lo and reaches_end_date(page):
+            hi = page
+        elif page == last_page:
+            return last_page + 1
+        else:
+            lo, step = page, step * 2
+
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if reaches_end_date(mid):
+            hi = mid
+        else:
+            lo = mid
+    return hi
+
+# Consecutive pages that may fail (after retries) before pagination gives up
+MAX_FAILED_PAGES_IN_A_ROW = 3
+
+def paginate(session, source, url_for_page, start_date, end_date, options, on_bad_status=None, prefetched=None):
+    """Shared pagination loop: fetch pages concurrently and parse them in order.
+
+    Page 1 is parsed first for the size of the listing, and the fetch plan
+    ends at its last page (or at the options.max_pages budget); without a
+    size the pages are walked until one ends the listing. Pages entirely
+    newer than end_date are skipped by searching for the first page that
+    overlaps the window, and pagination stops at the first page that is
+    entirely older than start_date or at a 404. A page that still
+    fails after its retries is reported to options.on_failed_page and
+    skipped; only MAX_FAILED_PAGES_IN_A_ROW failures in a row end the run.
+    `prefetched` maps page numbers to responses the caller already has
+    (e.g. page 1 fetched to test the company slug). With options.stream,
+    pages after the first are parsed while they download (page 1 is read
+    whole, since the listing size comes after its reviews). With
+    options.parse_pool, pages are handed to its worker processes as soon as
+    they have downloaded and their results are collected in page order;
+    the time every stage (fetch, parse, write) spent working is reported
+    at the end.
+    """
+    reviews = []
+    failures_in_a_row = 0
+    responses = dict(prefetched or {})
+    parsed = {}
+
+    parse_times = []
+    metrics = options.metrics
+    # A streamed body can't be handed to another process, so streaming parses in this thread
+    pool = options.parse_pool if not options.stream else None
+    queued = {}
+    queue_lock = threading.Lock()
+    stopped = False
+    depths = []
+    busy = {"fetch": 0.0, "parse": 0.0, "write": 0.0}
+    # Parse time spent in the pool's processes (the rest is spent in this thread, e.g. on page 1)
+    pooled = []
+    started_at = time.perf_counter()
+
+    def queue_parse(page, res):
+        # Runs in the fetching thread
+        if res.status_code == 200:
+            html = res.text
+            with queue_lock:
+                if stopped:
+                    return
+                queued[page], depth = pool.submit(source, html, page, start_date, end_date, options)
+            depths.append(depth)
+            if metrics:
+                metrics.observe("scraper_parse_queue_depth", depth, source=source)
+
+    def parse(page, res):
+        if page not in parsed:
+            streamed = options.stream and page != 1
+            if page in queued:
+                parsed[page], seconds, output, snapshot = queued.pop(page).result()
+                pooled.append(seconds)
+                print(output, end="")
+                if snapshot:
+                    metrics.merge(snapshot)
+            elif streamed:
+                # The download is part of the parse here, so the time includes it
+                started = time.perf_counter()
+                parsed[page] = parse_page_stream(source, res, page, start_date, end_date, options.parser, metrics)
+                seconds = time.perf_counter() - started
+            else:
+                html = res.text
+                started = time.perf_counter()
+                parsed[page] = parse_page(source, html, page, start_date, end_date, options.parser,
+                                          options.restrict_parsing, options.embedded_json, metrics)
+                seconds = time.perf_counter() - started
+            parse_times.append(seconds)
+            print(f"⏱️ Parsed page {page} in {seconds * 1000:.1f} ms ({options.parser}"
+                  + (", streamed)" if streamed else ")"))
+            if metrics:
+                metrics.observe("scraper_parse_seconds", seconds, source=source, parser=options.parser)
+        return parsed[page]
+
+    def probe(page):
+        if page not in responses:
+            started = time.perf_counter()
+            try:
+                responses[page] = fetch_page(session, url_for_page(page), throttle=options.throttle,
+                                             retry=options.retry, metrics=metrics,
+                                             stream=options.stream and page != 1)
+            except requests.exceptions.RequestException as e:
+                print(f"❌ Probe of page {page} failed: {e}")
+                return None
+            finally:
+                busy["fetch"] += time.perf_counter() - started
+            print(f"🔎 Probed page {page}: {responses[page].status_code}")
+            if options.stream and page != 1 and responses[page].status_code != 200:
+                # Nothing reads the body of a failed page, and the fetch plan may never reach this one
+                responses[page].close()
+        res = responses[page]
+        return parse(page, res) if res.status_code == 200 else None
+
+    try:
+        # A resumed run already knows where its window starts
+        first_page = options.first_page
+        searched = first_page > 1
+
+        # Size the listing from page 1 so nothing is fetched past its end
+        last_page = None
+        jump_to = None
+        if first_page == 1:
+            result = probe(1)
+            if result is not None:
+                last_page, total = EXTRACTORS[source].listing_size(responses[1].text, len(result[1]))
+            if last_page:
+                print(f"🗺️ Page 1 lists {last_page} pages" + (f" ({total} reviews)" if total else ""))
+            # Historical window: find where it starts before fetching anything else
+            if result is not None and result[1] and min(result[1]) > end_date:
+                searched = True
+                print(f"⏩ Page 1 is entirely newer than {end_date:%Y-%m-%d}, "
+                      f"searching for the first overlapping page")
+                jump_to = find_first_page(probe, end_date, 1, last_page)
+
+        previous = None
+        while True:
+            if jump_to is not None:
+                if (last_page and jump_to > last_page) or probe(jump_to) is None:
+                    print(f"⚠️ No review page reaches back to {end_date:%Y-%m-%d}")
+                    break
+                print(f"⏩ Starting at page {jump_to}")
+                first_page = jump_to
+                jump_to = None
+
+            budget_end = None if options.max_pages is None else first_page + options.max_pages - 1
+            plan_end = last_page if budget_end is None else min(last_page or budget_end, budget_end)
+            fetcher = PageFetcher(
+                session,
+                url_for_page,
+                concurrency=options.concurrency,
+                first_page=first_page,
+                prefetched=responses,
+                throttle=options.throttle,
+                retry=options.retry,
+                metrics=metrics,
+                pages=range(first_page, plan_end + 1) if plan_end is not None else None,
+                stream=options.stream,
+                on_response=queue_parse if pool else None
+            )
+
+            for page, url, res, error in fetcher:
+                if error is None:
+                    print(f"Page {page}: {res.status_code}")
+                    if res.status_code != 200 and on_bad_status:
+                        on_bad_status(page, res)
+                    if classify_status(res.status_code) == "stop":
+                        if options.stream:
+                            res.close()
+                        break
+
+                if error is not None or res.status_code != 200:
+                    if options.stream and res is not None:
+                        res.close()  # Hand the unread body's connection back
+                    reason = str(error) if error is not None else f"HTTP {res.status_code}"
+                    print(f"❌ Skipping page {page} after retries: {reason}")
+                    if options.on_failed_page:
+                        options.on_failed_page(page, url, reason)
+                    if metrics:
+                        metrics.inc("scraper_pages_total", source=source, outcome="failed")
+                    failures_in_a_row += 1
+                    if failures_in_a_row >= MAX_FAILED_PAGES_IN_A_ROW:
+                        print(f"🛑 {failures_in_a_row} pages in a row failed, giving up on this listing")
+                        break
+                    continue
+                failures_in_a_row = 0
+
+                result = parse(page, res)
+                if result is None:
+                    break
+                page_reviews, card_dates = result
+                if metrics:
+                    metrics.inc("scraper_pages_total", source=source, outcome="parsed")
+                    metrics.inc("scraper_reviews_total", len(page_reviews), source=source)
+                newest, oldest = page_span(card_dates)
+
+                # Without a plan, a site that answers every page number with its last page would never end
+                signature = (card_dates, [(review.reviewer_name, review.title) for review in page_reviews])
+                if last_page is None and card_dates and signature == previous:
+                    print(f"🛑 Page {page} repeats the page before it, the listing has ended")
+                    break
+                previous = signature
+
+                # Historical window: don't walk through years of newer reviews
+                if not searched and oldest and oldest > end_date:
+                    searched = True
+                    print(f"⏩ Page {page} is entirely newer than {end_date:%Y-%m-%d}, "
+                          f"searching for the first overlapping page")
+                    jump_to = find_first_page(probe, end_date, page, last_page)
+                    break
+
+                started = time.perf_counter()
+                if options.keep_reviews:
+                    reviews.extend(page_reviews)
+                if options.on_page:
+                    options.on_page(page, page_reviews)
+                busy["write"] += time.perf_counter() - started
+
+                if newest and newest < start_date:
+                    print(f"🛑 Page {page} is entirely older than {start_date:%Y-%m-%d}, stopping")
+                    break
+
+                if page == budget_end and page != last_page:
+                    print(f"🛑 Reached the page budget ({options.max_pages} pages)")
+
+            busy["fetch"] += fetcher.busy
+            if jump_to is None:
+                break
+    finally:
+        # Pages fetched ahead of where pagination stopped are not needed any more; fetch threads
+        # still running must not queue theirs once we are gone
+        with queue_lock:
+            stopped = True
+            for future in queued.values():
+                future.cancel()
+
+    if parse_times:
+        print(f"⏱️ Parsed {len(parse_times)} pages with {options.parser}: "
+              f"{sum(parse_times) / len(parse_times) * 1000:.1f} ms/page on average")
+        busy["parse"] = sum(parse_times)
+        print_stage_usage(busy, sum(pooled), time.perf_counter() - started_at, options.concurrency, pool, depths)
+    if metrics:
+        for stage, seconds in busy.items():
+            metrics.inc("scraper_stage_busy_seconds_total", seconds, source=source, stage=stage)
+    return reviews
+
+def print_stage_usage(busy, pooled, elapsed, fetchers, pool, depths):
+    """Print how busy each pipeline stage was, to show which one to give more threads or processes.
+
+    `pooled` is the part of the parse time spent in the pool's processes;
+    the rest was spent in the scraping thread (e.g. on page 1).
+    """
+    if pool:
+        workers = pool.workers
+        parse = (f"parse {pooled / (elapsed * workers):.0%} of {workers} process{'es' if workers > 1 else ''} "
+                 f"(+{(busy['parse'] - pooled) / elapsed:.0%} in the scraping thread)")
+    else:
+        parse = f"parse {busy['parse'] / elapsed:.0%} of 1 thread"
+    usage = [
+        f"fetch {busy['fetch'] / (elapsed * fetchers):.0%} of {fetchers} thread{'s' if fetchers > 1 else ''}",
+        parse,
+        f"write {busy['write'] / elapsed:.0%}"
+    ]
+    print(f"🧮 Stage usage: {', '.join(usage)}"
+          + (f"; parse queue {sum(depths) / len(depths):.1f} pages on average, {max(depths)} at most"
+             if depths else ""))
+
+def resolve_parser(backend):
+    """Turn a --parser choice into an installed backend ('auto' = lxml when available)"""
+    if backend in (None, "auto"):
+        return "lxml" if lxml is not None else "html.parser"
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"❌ Unknown parser '{backend}'. Choose one of: auto, {', '.join(PARSER_BACKENDS)}")
+    if backend == "lxml" and lxml is None:
+        raise ValueError("❌ The lxml parser is not installed (pip install lxml)")
+    if backend == "selectolax" and LexborHTMLParser is None:
+        raise ValueError("❌ The selectolax parser is not installed (pip install selectolax)")
+    return backend
+
+class CardStrainer(SoupStrainer):
+    """Only build the subtrees of tags for which `match(name, attrs)` is true.
+
+    Lets BeautifulSoup skip the headers, footers and scripts around the
+    review cards entirely. Implements both the bs4 >= 4.13 hooks and the
+    older search_tag() one.
+    """
+
+    def __init__(self, match):
+        super().__init__()
+        self.match = match
+
+    @staticmethod
+    def _classes(attrs):
+        classes = attrs.get("class") or []
+        return classes.split() if isinstance(classes, str) else classes
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        attrs = attrs or {}
+        return self.match(name, attrs, self._classes(attrs))
+
+    def allow_string_creation(self, string):
+        return False
+
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        attrs = dict(markup_attrs or {})
+        return self.match(markup_name, attrs, self._classes(attrs))
+
+class LexborNode:
+    """Give a selectolax node the small slice of the BeautifulSoup API the scrapers use"""
+
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+    def select(self, selector):
+        return [LexborNode(node) for node in self.node.css(selector)]
+
+    def select_one(self, selector):
+        node = self.node.css_first(selector)
+        return LexborNode(node) if node is not None else None
+
+    def get(self, name, default=None):
+        value = self.node.attributes.get(name, default)
+        # Valueless attributes come back as None; BeautifulSoup reports ""
+        return "" if value is None and name in self.node.attributes else value
+
+    def get_text(self, separator="", strip=False):
+        return self.node.text(deep=True, separator=separator, strip=strip)
+
+def make_soup(html, parser="html.parser", strainer=None):
+    """Parse a page with the chosen backend, building only strainer-matched subtrees if given"""
+    if parser == "selectolax":
+        return LexborNode(LexborHTMLParser(html))
+    return BeautifulSoup(html, parser, parse_only=strainer)
+
+class CardStream(HTMLParser):
+    """Pick review cards out of a page while it is still downloading.
+
+    Feed it chunks of the body: the markup of every outermost tag the site's
+    CardStrainer matches is collected and queued in `cards` as
+    (markup, ancestors) as soon as its closing tag arrives. Cards the caller
+    passes to mark_list() belong to the review list, the deepest element
+    they all share; once two of them are known and that element has closed,
+    `ended` is true and the rest of the body can be left unread.
+    """
+
+    VOID_TAGS = frozenset(["area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param",
+                           "source", "track", "wbr"])
+
+    def __init__(self, strainer):
+        super().__init__(convert_charrefs=True)
+        self.strainer = strainer
+        self.open_tags = []  # (name, serial) of every open element
+        self.serials = itertools.count()
+        self.card_depth = None  # Index in open_tags of the card being collected
+        self.parts = []
+        self.cards = deque()
+        self.list_path = None
+        self.marked = 0
+
+    def mark_list(self, ancestors):
+        """Note that the card with these ancestors is part of the review list"""
+        if self.list_path is None:
+            self.list_path = ancestors
+        else:
+            shared = 0
+            while shared < min(len(ancestors), len(self.list_path)) and ancestors[shared] == self.list_path[shared]:
+                shared += 1
+            self.list_path = self.list_path[:shared]
+        self.marked += 1
+
+    @property
+    def ended(self):
+        if self.marked < 2 or not self.list_path:
+            return False
+        depth = len(self.list_path)
+        return len(self.open_tags) < depth or self.open_tags[depth - 1][1] != self.list_path[-1]
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if self.card_depth is None and self.strainer.match(tag, attrs, CardStrainer._classes(attrs)):
+            self.card_depth = len(self.open_tags)
+            self.parts = []
+        if self.card_depth is not None:
+            self.parts.append(self.get_starttag_text())
+        if tag not in self.VOID_TAGS:
+            self.open_tags.append((tag, next(self.serials)))
+
+    def handle_startendtag(self, tag, attrs):
+        if self.card_depth is not None:
+            self.parts.append(self.get_starttag_text())
+
+    def handle_endtag(self, tag):
+        if not any(name == tag for name, _ in self.open_tags):
+            # A stray end tag; keep it in the card for the real parser to sort out
+            if self.card_depth is not None:
+                self.parts.append(f"</{tag}>")
+            return
+        # Close everything up to the matching open tag, like a browser would
+        while True:
+            name, _ = self.open_tags.pop()
+            depth = len(self.open_tags)
+            if self.card_depth is not None:
+                self.parts.append(f"</{name}>")
+                if depth == self.card_depth:
+                    self.cards.append(("".join(self.parts), tuple(serial for _, serial in self.open_tags)))
+                    self.card_depth = None
+            if name == tag:
+                break
+
+    def handle_data(self, data):
+        if self.card_depth is not None:
+            # convert_charrefs has unescaped the text, so escape it again for the card's own parse
+            self.parts.append(escape_html(data, quote=False))
+
+    def handle_comment(self, data):
+        # Kept, since a comment splits the text around it into separate strings
+        if self.card_depth is not None:
+            self.parts.append(f"<!--{data}-->")
+
+    def close(self):
+        super().close()
+        if self.card_depth is not None:
+            # The body ended inside a card; hand over what did arrive
+            self.cards.append(("".join(self.parts), tuple(serial for _, serial in self.open_tags[:self.card_depth])))
+            self.card_depth = None
+
+def print_page_structure(html, limit, **filters):
+    """Debug helper: print a few elements of a page whose review cards could not be found"""
+    soup = BeautifulSoup(html, "html.parser")
+    print("🔍 Available elements on page:")
+    for elem in soup.find_all(['div', 'article'], limit=limit, **filters):
+        classes = elem.get('class', [])
+        test_id = elem.get('data-testid', '')
+        if classes or test_id:
+            print(f"   - Element: classes={classes}, testid={test_id}")
+
+# Tags that can hold a review card on each site, used to skip the rest of the page while parsing
+G2_CARD_STRAINER = CardStrainer(
+    lambda name, attrs, classes: (
+        attrs.get("data-testid") == "review-card"
+        or any(c in ("review-card", "paper--white", "review") for c in classes)
+    )
+)
+CAPTERRA_CARD_STRAINER = CardStrainer(
+    lambda name, attrs, classes: (
+        attrs.get("data-testid") in ("review-card", "review")
+        or "data-review-id" in attrs
+        or any(c in ("review-card", "review", "user-review") for c in classes)
+    )
+)
+TRUSTPILOT_CARD_STRAINER = CardStrainer(
+    lambda name, attrs, classes: (
+        (name == "article" and attrs.get("data-service-review-card-paper") == "true")
+        or any(c in ("styles_reviewCard__Qwhpy", "CDS_Card_card__485220") for c in classes)
+    )
+)
+
+def element_text(elem):
+    return elem.get_text(strip=True)
+
+def parse_card_date(value, formats, iso=False):
+    """Parse a card date with the first matching format (ISO timestamps are cut at the 'T' if `iso`)"""
+    if not value:
+        return None
+    if iso and 'T' in value:
+        value, formats = value.split('T')[0], ["%Y-%m-%d"]
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+def squash_text(text):
+    """Join the lines of a text the way get_text(strip=True) joins a <br>-separated paragraph"""
+    return "".join(line.strip() for line in (text or "").splitlines())
+
+def embedded_next_data(html):
+    """Return the decoded __NEXT_DATA__ JSON payload embedded in a page, or None"""
+    marker = html.find('id="__NEXT_DATA__"')
+    if marker == -1:
+        return None
+    start = html.find('>', marker) + 1
+    end = html.find('</script>', start)
+    if start == 0 or end == -1:
+        return None
+    try:
+        return json.loads(html[start:end])
+    except ValueError:
+        return None
+
+# Fields every record starts with, in output order, and the optional ones only Trustpilot fills in
+RECORD_FIELDS = ["title", "description", "date", "reviewer_name", "rating", "source"]
+TRUSTPILOT_FIELDS = ["country", "reviewer_total_reviews", "experience_date", "is_unprompted"]
+
+def rating_value(rating):
+    """Numeric rating from a number or scraped text ("4", "4.5", "Rated 4 out of 5 stars"); None if there is none"""
+    if rating is None or isinstance(rating, bool):
+        return None
+    if isinstance(rating, (int, float)):
+        value = float(rating)
+    else:
+        match = re.search(r'\d+(?:\.\d+)?', rating)
+        if not match:
+            return None
+        value = float(match.group())
+    return int(value) if value.is_integer() else value
+
+class Review:
+    """One scraped review, shared by all sources.
+
+    Slotted, with the rating as a number, the date as a `date` and the
+    repetitive source/country strings interned, so large runs hold many
+    reviews cheaply. The Trustpilot-only fields stay None elsewhere.
+    to_dict() gives the JSON output record and is only called when writing.
+    """
+
+    __slots__ = RECORD_FIELDS + TRUSTPILOT_FIELDS
+
+    def __init__(self, title, description, date, reviewer_name, rating, source, country=None,
+                 reviewer_total_reviews=None, experience_date=None, is_unprompted=None):
+        self.title = title
+        self.description = description
+        self.date = date
+        self.reviewer_name = reviewer_name
+        self.rating = rating_value(rating)
+        self.source = sys.intern(source)
+        self.country = sys.intern(country) if country else country
+        self.reviewer_total_reviews = reviewer_total_reviews
+        self.experience_date = experience_date
+        self.is_unprompted = is_unprompted
+
+    def to_dict(self):
+        """The output record: the common fields, then the Trustpilot ones if this review has them"""
+        record = {
+            "title": self.title,
+            "description": self.description,
+            "date": self.date.isoformat(),
+            "reviewer_name": self.reviewer_name,
+            "rating": self.rating,
+            "source": self.source
+        }
+        if self.country is not None:
+            for name in TRUSTPILOT_FIELDS:
+                record[name] = getattr(self, name)
+        return record
+
+    def __eq__(self, other):
+        return isinstance(other, Review) and all(getattr(self, n) == getattr(other, n) for n in self.__slots__)
+
+    def __repr__(self):
+        return f"Review({self.source}, {self.date}, {self.reviewer_name!r}, rating={self.rating})"
+
+def trustpilot_embedded_reviews(html):
+    """Read (review date, Review) pairs from Trustpilot's embedded JSON without building a DOM.
+
+    Reviews have the same fields and formatting as the DOM path (e.g.
+    "5reviews", "September 19, 2025"); titles are not truncated with "…"
+    like the rendered cards. Returns None if the page has no review payload.
+    """
+    try:
+        items = embedded_next_data(html)["props"]["pageProps"]["reviews"]
+    except (KeyError, TypeError):
+        return None
+    if not isinstance(items, list):
+        return None
+
+    entries = []
+    for item in items:
+        dates = item.get("dates") or {}
+        review_date = parse_card_date(dates.get("publishedDate"), ["%Y-%m-%d"], iso=True)
+        if review_date is None:
+            continue
+        consumer = item.get("consumer") or {}
+        experienced = parse_card_date(dates.get("experiencedDate"), ["%Y-%m-%d"], iso=True)
+        review_count = consumer.get("numberOfReviews")
+        verification = (item.get("labels") or {}).get("verification") or {}
+        entries.append((review_date, Review(
+            title=squash_text(item.get("title")),
+            description=squash_text(item.get("text")),
+            date=review_date.date(),
+            reviewer_name=squash_text(consumer.get("displayName")),
+            rating=item.get("rating"),
+            source="Trustpilot",
+            country=consumer.get("countryCode") or "",
+            reviewer_total_reviews=(
+                f"{review_count}review{'' if review_count == 1 else 's'}" if review_count is not None else ""
+            ),
+            experience_date=f"{experienced:%B} {experienced.day}, {experienced.year}" if experienced else "",
+            is_unprompted=verification.get("reviewSourceName") == "Organic"
+        )))
+    return entries
+
+def capterra_rating(elem):
+    # data-rating, else a number from an aria-label like "4.5 stars"
+    rating = elem.get("data-rating")
+    if not rating:
+        aria_label = elem.get("aria-label", "")
+        if "star" in aria_label.lower():
+            rating_match = re.search(r'(\d+(?:\.\d+)?)', aria_label)
+            if rating_match:
+                rating = rating_match.group(1)
+    return rating
+
+def trustpilot_rating(elem):
+    # Extract number from the star image's "Rated X out of 5 stars" alt text
+    rating_match = re.search(r'Rated (\d+) out of 5 stars', elem.get("alt", ""))
+    return rating_match.group(1) if rating_match else None
+
+# Declarative extraction rules per site. "cards" are tried in order until one
+# matches; each field lists its selectors in order of preference, how to read
+# the value from the matched element, and the value used when nothing matches.
+# The "date" field decides whether a card is usable at all: cards without a
+# parseable date are skipped. Records missing a "required" field are dropped.
+# "embedded" optionally reads the records straight from data shipped in the
+# page, skipping the DOM entirely when present. "describe" formats the line
+# logged per extracted review at DEBUG level. "pages" holds patterns run on
+# the raw HTML of page 1 to size the listing: "last_page" patterns capture
+# the number of the last page (the highest match wins), "review_count"
+# patterns the total number of reviews, divided by the cards on page 1.
+SITE_SPECS = {
+    "g2": {
+        "source": "G2",
+        "cards": [".review-card", "[data-testid='review-card']", ".paper--white", ".review"],
+        "strainer": G2_CARD_STRAINER,
+        "debug": {"limit": 5},
+        "date": {
+            "selectors": ["time", "[datetime]", ".review-date"],
+            "value": lambda elem: elem.get("datetime") or element_text(elem),
+            "parse": lambda value: parse_card_date(value, ["%Y-%m-%d", "%Y-%m-%dT%H:%M:%S"])
+        },
+        "fields": {
+            "title": {"selectors": [".review-title", "[data-testid='review-title']", "h3", "h4"]},
+            "description": {"selectors": [".review-body", "[data-testid='review-body']", ".review-content", "p"]},
+            "reviewer_name": {"selectors": [".reviewer-name", "[data-testid='reviewer-name']", ".author-name"]},
+            "rating": {
+                "selectors": [".star-rating", "[data-rating]", ".stars"],
+                "value": lambda elem: elem.get("data-rating") or elem.get("aria-label"),
+                "default": None
+            }
+        },
+        "required": [],
+        "pages": {
+            "last_page": [r'href="[^"]*[?&](?:amp;)?page=(\d+)[^"]*"[^>]*>\s*Last'],
+            "review_count": [r'"reviewCount":\s*"?(\d+)']
+        }
+    },
+    "capterra": {
+        "source": "Capterra",
+        "cards": [
+            '[data-testid="review-card"]',
+            '.review-card',
+            '[data-testid="review"]',
+            '.review',
+            '.user-review',
+            '[data-review-id]'
+        ],
+        "strainer": CAPTERRA_CARD_STRAINER,
+        "debug": {"limit": 10},
+        "date": {
+            "selectors": ["time[datetime]", ".review-date", "[data-testid='review-date']", ".date"],
+            "value": lambda elem: elem.get("datetime") or element_text(elem),
+            "parse": lambda value: parse_card_date(value, ["%Y-%m-%d", "%m/%d/%Y", "%B %d, %Y"], iso=True)
+        },
+        "fields": {
+            "title": {
+                "selectors": [".review-title", "[data-testid='review-title']", "h3", "h4", ".title", ".review-header"]
+            },
+            "description": {
+                "selectors": [".review-body", "[data-testid='review-body']", ".review-content", ".review-text", "p"]
+            },
+            "reviewer_name": {
+                "selectors": [".reviewer-name", "[data-testid='reviewer-name']", ".author-name", ".user-name", ".reviewer"]
+            },
+            "rating": {
+                "selectors": [".star-rating[data-rating]", "[data-rating]", ".stars", ".rating"],
+                "value": capterra_rating,
+                "default": None
+            }
+        },
+        "required": ["description", "reviewer_name"],
+        "describe": lambda r: f"✅ Extracted review from {r.reviewer_name} - Rating: {r.rating}",
+        "pages": {
+            "review_count": [r'Showing (?:[\d,]+\s*-\s*[\d,]+ of )?([\d,]+) reviews', r'"reviewCount":\s*"?(\d+)']
+        }
+    },
+    "trustpilot": {
+        "source": "Trustpilot",
+        "cards": ['article[data-service-review-card-paper="true"]', '.styles_reviewCard__Qwhpy, .CDS_Card_card__485220'],
+        "strainer": TRUSTPILOT_CARD_STRAINER,
+        "embedded": trustpilot_embedded_reviews,
+        "debug": {"limit": 5, "class_": lambda x: x and 'review' in str(x).lower()},
+        "date": {
+            "selectors": ["time[data-service-review-date-time-ago='true']", "time[datetime]"],
+            "value": lambda elem: elem.get("datetime"),
+            "parse": lambda value: parse_card_date(value, ["%Y-%m-%d"], iso=True)
+        },
+        "fields": {
+            "title": {"selectors": ["[data-service-review-title-typography='true']"]},
+            "description": {"selectors": ["[data-service-review-text-typography='true']"]},
+            "reviewer_name": {"selectors": ["[data-consumer-name-typography='true']"]},
+            "rating": {
+                "selectors": [".CDS_StarRating_starRating__614d2e"],
+                "value": trustpilot_rating,
+                "default": None
+            },
+            "country": {"selectors": ["[data-consumer-country-typography='true']"]},
+            "reviewer_total_reviews": {"selectors": ["[data-consumer-reviews-count-typography='true']"]},
+            "experience_date": {"selectors": ['[data-testid="review-badge-date"] .CDS_Badge_badgeText__9995a1']},
+            "is_unprompted": {
+                "selectors": ['[data-testid="review-badge-unprompted"]'],
+                "value": lambda elem: True,
+                "default": False
+            }
+        },
+        "required": ["description", "reviewer_name"],
+        "describe": lambda r: (
+            f"✅ Extracted review from {r.reviewer_name} ({r.country}) - Rating: {r.rating}/5\n"
+            f"   Title: {r.title[:50]}...\n"
+            f"   Experience Date: {r.experience_date}"
+        ),
+        "pages": {
+            "last_page": [r'"totalPages":\s*(\d+)', r'name="pagination-button-last"[^>]*href="[^"]*[?&]page=(\d+)'],
+            "review_count": [r'"totalCount":\s*(\d+)']
+        }
+    }
+}
+
+class CompiledSelector:
+    """A CSS selector compiled once, usable on BeautifulSoup tags and selectolax nodes"""
+
+    __slots__ = ("css", "pattern")
+
+    def __init__(self, css):
+        self.css = css
+        self.pattern = soupsieve.compile(css)
+
+    def select(self, node):
+        if isinstance(node, LexborNode):
+            return node.select(self.css)
+        return self.pattern.select(node)
+
+    def select_one(self, node):
+        if isinstance(node, LexborNode):
+            return node.select_one(self.css)
+        return self.pattern.select_one(node)
+
+class SiteExtractor:
+    """Extraction engine for one site, built from its SITE_SPECS entry.
+
+    Selectors are compiled once. For the card list and for every field they
+    are tried in the spec's order of preference on every card, so a card's
+    output never depends on the cards parsed before it.
+    """
+
+    def __init__(self, spec):
+        self.source = spec["source"]
+        self.strainer = spec.get("strainer")
+        self.debug = dict(spec.get("debug", {}))
+        self.required = spec.get("required", [])
+        self.describe = spec.get("describe")
+        self.embedded = spec.get("embedded")
+        self.cards = [CompiledSelector(css) for css in spec["cards"]]
+        self.date = self._compile("date", spec["date"])
+        self.fields = [self._compile(name, field) for name, field in spec["fields"].items()]
+        pages = spec.get("pages", {})
+        self.last_page_patterns = [re.compile(pattern) for pattern in pages.get("last_page", [])]
+        self.review_count_patterns = [re.compile(pattern) for pattern in pages.get("review_count", [])]
+
+    @staticmethod
+    def _compile(name, field):
+        return (
+            name,
+            [CompiledSelector(css) for css in field["selectors"]],
+            field.get("value", element_text),
+            field.get("default", ""),
+            field.get("parse")
+        )
+
+    @staticmethod
+    def _first_match(selectors, match):
+        """Return (selector, result) for the first selector, in order of preference, that matches"""
+        for selector in selectors:
+            found = match(selector)
+            if found:
+                return selector, found
+        return None, None
+
+    def select_cards(self, soup):
+        """Return (cards, selector) using the first card selector that finds anything"""
+        selector, cards = self._first_match(self.cards, lambda selector: selector.select(soup))
+        return (cards, selector.css) if cards else ([], None)
+
+    def find(self, card, field):
+        return self._first_match(field[1], lambda selector: selector.select_one(card))[1]
+
+    def extract(self, card, metrics=None):
+        """Return (review date, Review or None); the date is None if the card has no usable date.
+
+        With `metrics`, the time taken by every field is recorded.
+        """
+        started = time.perf_counter() if metrics else None
+        date_elem = self.find(card, self.date)
+        review_date = self.date[4](self.date[2](date_elem)) if date_elem is not None else None
+        if metrics:
+            metrics.observe("scraper_field_seconds", time.perf_counter() - started, source=self.source, field="date")
+        if review_date is None:
+            return None, None
+
+        values = {}
+        for field in self.fields:
+            name, _, value, default, _ = field
+            if metrics:
+                started = time.perf_counter()
+            elem = self.find(card, field)
+            values[name] = value(elem) if elem is not None else default
+            if metrics:
+                metrics.observe("scraper_field_seconds", time.perf_counter() - started, source=self.source, field=name)
+
+        return review_date, Review(date=review_date.date(), source=self.source, **values)
+
+    def _dom_cards(self, html, page, parser, restrict_parsing):
+        soup = make_soup(html, parser, self.strainer if restrict_parsing else None)
+
+        review_cards, selector = self.select_cards(soup)
+        if not review_cards:
+            print(f"❌ No review cards found on page {page}")
+            if page == 1:
+                # Debug: print some elements to understand page structure
+                print_page_structure(html, **self.debug)
+            return None
+
+        print(f"✅ Found {len(review_cards)} reviews on page {page} using selector: {selector}")
+        return review_cards
+
+    def parse_page(self, html, page, start_date, end_date, parser="html.parser", restrict_parsing=True,
+                   embedded_json=True, metrics=None):
+        """Extract in-range reviews and every card date from one listing page (None if no cards)"""
+        reviews = []
+        card_dates = []
+        describe = self.describe if self.describe and log.isEnabledFor(logging.DEBUG) else None
+
+        # Prefer records shipped as JSON in the page; fall back to the DOM cards
+        entries = self.embedded(html) if embedded_json and self.embedded else None
+        if entries:
+            print(f"✅ Found {len(entries)} reviews on page {page} in the embedded JSON")
+            cards = None
+        else:
+            started = time.perf_counter()
+            cards = self._dom_cards(html, page, parser, restrict_parsing)
+            if metrics:
+                metrics.observe("scraper_dom_seconds", time.perf_counter() - started, source=self.source,
+                                parser=parser)
+            if cards is None:
+                return None
+            entries = cards
+
+        for entry in entries:
+            try:
+                review_date, record = self.extract(entry, metrics) if cards is not None else entry
+                if review_date is not None:
+                    self._keep(review_date, record, start_date, end_date, reviews, card_dates, describe)
+            except Exception as e:
+                print(f"⚠️ Skipping a review due to error: {e}")
+
+        return reviews, card_dates
+
+    def _keep(self, review_date, record, start_date, end_date, reviews, card_dates, describe):
+        """Note a card's date, and keep its review if it is in range and complete"""
+        card_dates.append(review_date)
+
+        # Check if date is within range and we have essential data
+        if not (start_date <= review_date <= end_date):
+            return
+        if not all(getattr(record, name) for name in self.required):
+            return
+
+        reviews.append(record)
+        if describe:
+            log.debug(describe(record))
+
+    def parse_stream(self, chunks, page, start_date, end_date, parser="html.parser", metrics=None):
+        """Like parse_page, but for a body arriving as text `chunks`.
+
+        Every card is extracted as soon as it has closed, and `chunks` is
+        closed (ending the download) once the review list has ended. The
+        embedded JSON comes after the cards, so only the DOM cards are read.
+        """
+        reviews = []
+        card_dates = []
+        describe = self.describe if self.describe and log.isEnabledFor(logging.DEBUG) else None
+        stream = CardStream(self.strainer)
+        found = 0
+
+        def take_cards():
+            nonlocal found
+            while stream.cards:
+                markup, ancestors = stream.cards.popleft()
+                found += 1
+                try:
+                    cards, _ = self.select_cards(make_soup(markup, parser, self.strainer))
+                    review_date, record = self.extract(cards[0], metrics) if cards else (None, None)
+                    if review_date is not None:
+                        stream.mark_list(ancestors)
+                        self._keep(review_date, record, start_date, end_date, reviews, card_dates, describe)
+                except Exception as e:
+                    print(f"⚠️ Skipping a review due to error: {e}")
+
+        for chunk in chunks:
+            stream.feed(chunk)
+            take_cards()
+            if stream.ended:
+                getattr(chunks, "close", lambda: None)()
+                break
+        else:
+            stream.close()
+            take_cards()
+
+        if not found:
+            print(f"❌ No review cards found on page {page}")
+            return None
+        print(f"✅ Found {found} reviews on page {page} while streaming"
+              + (", stopped reading after the review list" if stream.ended else ""))
+        return reviews, card_dates
+
+    def listing_size(self, html, per_page):
+        """Return (pages, reviews) in the listing according to its page 1; either may be None"""
+        for pattern in self.last_page_patterns:
+            found = [int(number) for number in pattern.findall(html)]
+            if found:
+                return max(found), None
+        for pattern in self.review_count_patterns:
+            match = pattern.search(html)
+            if match:
+                total = int(match.group(1).replace(",", ""))
+                return (max(1, -(-total // per_page)) if per_page else None), total
+        return None, None
+
+# Compiled once at startup and shared by every page of a run
+EXTRACTORS = {source: SiteExtractor(spec) for source, spec in SITE_SPECS.items()}
+
+def parse_page(source, html, page, start_date, end_date, parser="html.parser", restrict_parsing=True,
+               embedded_json=True, metrics=None):
+    """Extract in-range reviews and every card date from one `source` listing page (None if no cards)"""
+    return EXTRACTORS[source].parse_page(html, page, start_date, end_date, parser, restrict_parsing, embedded_json,
+                                         metrics)
+
+# Bytes read from a streamed response at a time
+STREAM_CHUNK_SIZE = 16 * 1024
+
+def response_chunks(res, metrics=None):
+    """Yield the body of a stream=True response as text; the connection is closed once the caller stops"""
+    decoder = codecs.getincrementaldecoder(res.encoding or "utf-8")(errors="replace")
+    read = 0
+    try:
+        for chunk in res.iter_content(STREAM_CHUNK_SIZE):
+            read += len(chunk)
+            yield decoder.decode(chunk)
+        yield decoder.decode(b"", final=True)
+    finally:
+        res.close()
+        if metrics and not getattr(res, "from_cache", False):
+            metrics.inc("scraper_response_bytes_total", read, domain=urlsplit(res.url).hostname or "")
+
+def parse_page_stream(source, res, page, start_date, end_date, parser="html.parser", metrics=None):
+    """parse_page for a stream=True response, reading its body only as far as the review list goes"""
+    return EXTRACTORS[source].parse_stream(response_chunks(res, metrics), page, start_date, end_date, parser, metrics)
+
+def scrape_g2(company, start_date, end_date, session, options=None):
+    options = options or ScrapeOptions()
+    reviews = []
+    url_for_page = lambda page: LISTING_URLS["g2"].format(company=company, page=page)
+
+    # Test the slug with page 1 of the listing, which is then reused as the first page.
+    # A slug confirmed by an earlier run (or a resumed run) needs no test at all.
+    prefetched = {}
+    if options.first_page == 1 and not options.resolutions.get("g2", company):
+        test_url = url_for_page(1)
+        try:
+            test_response = fetch_page(session, test_url, throttle=options.throttle, retry=options.retry,
+                                       metrics=options.metrics)
+            print(f"🔍 Testing G2 URL: {test_url} - Status: {test_response.status_code}")
+
+            if test_response.status_code == 404:
+                print(f"❌ Company '{company}' not found on G2. Try checking the correct slug.")
+                suggested = find_company_slug(company, "G2")
+                print(f"💡 Try: python script.py --company {suggested} ...")
+                return reviews
+            elif test_response.status_code == 403:
+                print("❌ G2 is blocking requests. The site may have anti-bot protection.")
+                return reviews
+        except Exception as e:
+            print(f"❌ Error testing G2 URL: {e}")
+            return reviews
+        if test_response.status_code == 200:
+            prefetched[1] = test_response
+            options.resolutions.set("g2", company, {"slug": company})
+
+    def on_bad_status(page, res):
+        if res.status_code == 403:
+            print("❌ Access forbidden. G2 detected scraping attempt.")
+        elif res.status_code == 404 and page == 1:
+            print(f"❌ Company '{company}' not found on G2 any more. Try checking the correct slug.")
+            options.resolutions.forget("g2", company)
+
+    return paginate(
+        session,
+        "g2",
+        url_for_page,
+        start_date,
+        end_date,
+        options,
+        on_bad_status,
+        prefetched
+    )
+
+def find_capterra_product_url(company, session, throttle=None, retry=None, metrics=None):
+    """Search Capterra for the company and extract the product URL"""
+    search_url = f"https://www.capterra.com/search/?query={company}"
+    
+    try:
+        print(f"🔍 Searching Capterra for '{company}': {search_url}")
+        res = fetch_page(session, search_url, delay=(2, 4), throttle=throttle, retry=retry, metrics=metrics)
+        print(f"Search results status: {res.status_code}")
+        
+        if res.status_code != 200:
+            print(f"❌ Failed to search Capterra: HTTP {res.status_code}")
+            return None
+            
+        soup = BeautifulSoup(res.text, "html.parser")
+        
+        # Look for product cards in search results
+        product_cards = soup.select('[data-testid="search-product-card"]')
+        
+        if not product_cards:
+            print("❌ No product cards found in search results")
+            return None
+        
+        print(f"✅ Found {len(product_cards)} product(s) in search results")
+        
+        # Look for the best matching product
+        for card in product_cards:
+            try:
+                # Extract product name and URL
+                product_name_elem = card.select_one('[data-testid="product-name"]')
+                if not product_name_elem:
+                    continue
+                    
+                product_name = product_name_elem.get_text(strip=True).lower()
+                product_url = product_name_elem.get('href')
+                
+                if not product_url:
+                    continue
+                
+                print(f"📦 Found product: '{product_name}' - {product_url}")
+                
+                # Check if this matches our search (simple matching)
+                if company.lower() in product_name or product_name in company.lower():
+                    print(f"✅ Best match found: {product_name}")
+                    return product_url
+                    
+            except Exception as e:
+                print(f"⚠️ Error processing product card: {e}")
+                continue
+        
+        # If no exact match, return the first result
+        first_card = product_cards[0]
+        first_product_elem = first_card.select_one('[data-testid="product-name"]')
+        if first_product_elem:
+            first_url = first_product_elem.get('href')
+            first_name = first_product_elem.get_text(strip=True)
+            print(f"⚠️ No exact match found, using first result: {first_name}")
+            return first_url
+            
+        return None
+        
+    except Exception as e:
+        print(f"❌ Error searching Capterra: {e}")
+        return None
+
+def resolve_capterra_product(company, session, options):
+    """Return (product ID, product slug) of `company` on Capterra, searching only if no earlier run did"""
+    resolved = options.resolutions.get("capterra", company)
+    if resolved:
+        print(f"📌 Using the Capterra product found earlier - ID: {resolved['product_id']}, "
+              f"Slug: {resolved['product_slug']}")
+        return resolved["product_id"], resolved["product_slug"]
+
+    # First, search for the company to get the correct product URL
+    product_url = find_capterra_product_url(company, session, options.throttle, options.retry, options.metrics)
+
+    if not product_url:
+        print(f"❌ Could not find product URL for '{company}' on Capterra")
+        return None
+
+    # Extract the product ID and slug from the URL
+    # URL format: https://www.capterra.com/p/135003/Slack/
+    try:
+        url_match = re.search(r'/p/(\d+)/([^/]+)/', product_url)
+        if url_match:
+            product_id = url_match.group(1)
+            product_slug = url_match.group(2)
+            print(f"✅ Extracted product info - ID: {product_id}, Slug: {product_slug}")
+        else:
+            print(f"❌ Could not extract product info from URL: {product_url}")
+            return None
+    except Exception as e:
+        print(f"❌ Error parsing product URL: {e}")
+        return None
+    options.resolutions.set("capterra", company, {"product_id": product_id, "product_slug": product_slug,
+                                                  "product_url": product_url})
+    return product_id, product_slug
+
+def scrape_capterra(company, start_date, end_date, session, options=None):
+    options = options or ScrapeOptions()
+    reviews = []
+
+    product = resolve_capterra_product(company, session, options)
+    if not product:
+        return reviews
+    product_id, product_slug = product
+
+    # The product page is not fetched: page 1 of the reviews tells us just as well whether it exists
+    def on_bad_status(page, res):
+        if res.status_code == 404 and page == 1:
+            print("❌ Reviews page not found. Product might not have reviews.")
+            options.resolutions.forget("capterra", company)
+
+    # Now scrape reviews from the reviews page, built from the extracted product info
+    return paginate(
+        session,
+        "capterra",
+        lambda page: LISTING_URLS["capterra"].format(product_id=product_id, product_slug=product_slug, page=page),
+        start_date,
+        end_date,
+        options,
+        on_bad_status
+    )
+
+def scrape_trustpilot(company, start_date, end_date, session, options=None):
+    options = options or ScrapeOptions()
+    reviews = []
+    url_for_page = lambda page: LISTING_URLS["trustpilot"].format(company=company, page=page)
+
+    # Test with page 1 of the listing and reuse it as the first page (skipped once the slug is confirmed)
+    prefetched = {}
+    if options.first_page == 1 and not options.resolutions.get("trustpilot", company):
+        test_url = url_for_page(1)
+        try:
+            test_response = fetch_page(session, test_url, throttle=options.throttle, retry=options.retry,
+                                       metrics=options.metrics)
+            print(f"🔍 Testing Trustpilot URL: {test_url} - Status: {test_response.status_code}")
+
+            if test_response.status_code == 404:
+                print(f"❌ Company '{company}' not found on Trustpilot.")
+                # For Trustpilot, company might be a domain like slack.com
+                if not company.endswith('.com'):
+                    suggested = f"{company}.com"
+                    print(f"💡 Try: python script.py --company {suggested} --source trustpilot ...")
+                return reviews
+        except Exception as e:
+            print(f"❌ Error testing Trustpilot URL: {e}")
+            return reviews
+        if test_response.status_code == 200:
+            prefetched[1] = test_response
+            options.resolutions.set("trustpilot", company, {"slug": company})
+
+    def on_bad_status(page, res):
+        if res.status_code == 404 and page == 1:
+            print(f"❌ Company '{company}' not found on Trustpilot any more.")
+            options.resolutions.forget("trustpilot", company)
+
+    return paginate(
+        session,
+        "trustpilot",
+        url_for_page,
+        start_date,
+        end_date,
+        options,
+        on_bad_status,
+        prefetched
+    )
+
+def review_key(review):
+    """Identify a review well enough to recognise it again on a later run"""
+    return f"{review.date.isoformat()}|{review.reviewer_name}|{review.title}"
+
+def review_fingerprint(review):
+    """Stable identity of a review: source, reviewer, date, title and a hash of its text (32 hex chars)"""
+    text_hash = hashlib.sha256((review.description or "").encode("utf-8")).hexdigest()
+    parts = [review.source, review.reviewer_name, review.date.isoformat(), review.title, text_hash]
+    return hashlib.blake2b("\x1f".join(part or "" for part in parts).encode("utf-8"), digest_size=16).hexdigest()
+
+class SeenReviews:
+    """Persistent set of the fingerprints of every review emitted so far (per company), kept in SQLite.
+
+    A lookup is one primary-key probe, so checking a page costs the same
+    with a thousand stored reviews or millions, and memory stays within
+    SQLite's page cache (`cache_mb`). Several processes may share the file.
+    """
+
+    def __init__(self, path, cache_mb=16):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=60)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(f"PRAGMA cache_size=-{cache_mb * 1024}")
+        self.db.execute("CREATE TABLE IF NOT EXISTS seen (fingerprint BLOB, company TEXT, source TEXT, "
+                        "first_seen TEXT, PRIMARY KEY (fingerprint, company)) WITHOUT ROWID")
+        self.db.commit()
+
+    def unseen(self, reviews, company):
+        """Return the reviews of `company` whose fingerprint is not stored yet"""
+        return [
+            review for review in reviews
+            if self.db.execute("SELECT 1 FROM seen WHERE fingerprint = ? AND company = ?",
+                               (bytes.fromhex(review_fingerprint(review)), company)).fetchone() is None
+        ]
+
+    def add(self, reviews, company):
+        """Store the fingerprints of reviews that have been written out, in one transaction"""
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        with self.db:
+            self.db.executemany("INSERT OR IGNORE INTO seen VALUES (?, ?, ?, ?)", [
+                (bytes.fromhex(review_fingerprint(review)), company, review.source, now) for review in reviews
+            ])
+
+    def close(self):
+        self.db.close()
+
+class StateStore:
+    """Per-(source, company) scrape state that survives between runs.
+
+    state.json keeps the watermark (newest review date collected so far and
+    the keys of reviews on that date) and the checkpoint of an unfinished run:
+    its date window, last completed page, and how far the output file had
+    been written at that point, so a crashed run can be resumed without
+    losing or duplicating what it already wrote.
+
+    Saves only rewrite this run's own entry on top of what is on disk, under
+    `lock`, so batch workers sharing the directory don't clobber each other.
+    """
+
+    def __init__(self, state_dir=STATE_DIR, lock=None):
+        self.state_dir = state_dir
+        self.state_file = os.path.join(state_dir, "state.json")
+        self.lock = lock or threading.Lock()
+        os.makedirs(state_dir, exist_ok=True)
+        self.state = load_json_file(self.state_file, {})
+
+    def _entry(self, source, company):
+        return self.state.setdefault(f"{source}:{company}", {})
+
+    def _save(self, source, company):
+        key = f"{source}:{company}"
+        with self.lock:
+            on_disk = load_json_file(self.state_file, {})
+            on_disk[key] = self.state[key]
+            save_json_file(self.state_file, on_disk)
+
+    def watermark(self, source, company):
+        """Return (newest collected date, keys of reviews on that date), or (None, set())"""
+        entry = self._entry(source, company)
+        if not entry.get("newest_date"):
+            return None, set()
+        return datetime.strptime(entry["newest_date"], "%Y-%m-%d"), set(entry.get("newest_keys", []))
+
+    def update_watermark(self, source, company, newest_date, newest_keys):
+        """Move the watermark up to `newest_date` (a YYYY-MM-DD string)"""
+        if not newest_date:
+            return
+        entry = self._entry(source, company)
+        if newest_date == entry.get("newest_date"):
+            newest_keys = set(newest_keys) | set(entry.get("newest_keys", []))
+        elif entry.get("newest_date") and newest_date < entry["newest_date"]:
+            return
+        entry["newest_date"] = newest_date
+        entry["newest_keys"] = sorted(newest_keys)
+        self._save(source, company)
+
+    def resume_point(self, source, company, start, end, output):
+        """Return the checkpoint of an unfinished run of this window into `output`, or None"""
+        checkpoint = self._entry(source, company).get("checkpoint")
+        if not checkpoint or checkpoint["window"] != [start, end] or checkpoint["output"] != output:
+            return None
+        # The output must still hold everything the checkpoint says was written
+        if not os.path.exists(output) or os.path.getsize(output) < checkpoint["output_offset"]:
+            return None
+        return checkpoint
+
+    def checkpoint(self, source, company, start, end, output, page, progress):
+        """Record that `page` of this window is done and its reviews are on disk.
+
+        `progress` carries output_offset, reviews_written and the newest
+        date/keys seen so far by the run.
+        """
+        entry = self._entry(source, company)
+        checkpoint = entry.get("checkpoint")
+        if not checkpoint or checkpoint["window"] != [start, end] or checkpoint["output"] != output:
+            checkpoint = entry["checkpoint"] = {"window": [start, end], "output": output, "pages_done": 0}
+        checkpoint.update(progress)
+        checkpoint["last_page"] = page
+        checkpoint["pages_done"] += 1
+        self._save(source, company)
+
+    def finish(self, source, company, failed_pages=None):
+        """Drop the checkpoint once a run has completed, keeping the pages it had to skip"""
+        entry = self._entry(source, company)
+        had_checkpoint = entry.pop("checkpoint", None) is not None
+        had_failures = entry.pop("failed_pages", None) is not None
+        if failed_pages:
+            entry["failed_pages"] = failed_pages
+        if had_checkpoint or had_failures or failed_pages:
+            self._save(source, company)
+
+class ResolutionCache:
+    """How each company maps onto each site, remembered between runs.
+
+    Holds the G2/Trustpilot slugs whose listing answered and the Capterra
+    product ID and slug found by search, so later runs go straight to the
+    reviews. An entry is forgotten when its listing stops answering. Without
+    a `path` nothing is persisted; saves merge into the file under `lock`
+    like StateStore.
+    """
+
+    def __init__(self, path=None, lock=None):
+        self.path = path
+        self.lock = lock or threading.Lock()
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.entries = load_json_file(path, {}) if path else {}
+
+    def get(self, source, company):
+        return self.entries.get(f"{source}:{company}")
+
+    def set(self, source, company, resolution):
+        key = f"{source}:{company}"
+        self.entries[key] = dict(resolution, resolved_at=datetime.now().isoformat(timespec="seconds"))
+        self._save(key)
+
+    def forget(self, source, company):
+        key = f"{source}:{company}"
+        if self.entries.pop(key, None) is not None:
+            self._save(key)
+
+    def _save(self, key):
+        if not self.path:
+            return
+        with self.lock:
+            on_disk = load_json_file(self.path, {})
+            if key in self.entries:
+                on_disk[key] = self.entries[key]
+            else:
+                on_disk.pop(key, None)
+            save_json_file(self.path, on_disk)
+
+class JsonlSink:
+    """Append reviews to a newline-delimited JSON file one page at a time.
+
+    Each page is written as its own gzip member / zstd frame when compressed,
+    so the file is valid after every page and can be truncated back to any
+    page boundary (`offset`) when a run is resumed. The file is fsync'd every
+    `fsync_every` pages. It is only opened (and an older file of the same
+    name replaced) once there is something to write.
+    """
+
+    def __init__(self, filename, compression=None, fsync_every=1, offset=0):
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("❌ zstd compression needs the 'zstandard' package (pip install zstandard)")
+        self.filename = filename
+        self.compression = compression
+        self.fsync_every = max(1, fsync_every)
+        self.pages = 0
+        self.count = 0
+        self.f = None
+        self.offset = offset
+        self.compressor = zstandard.ZstdCompressor() if compression == "zstd" else None
+
+    def _open(self):
+        self.f = open(self.filename, "r+b" if self.offset and os.path.exists(self.filename) else "wb")
+        self.f.truncate(self.offset)
+        self.f.seek(self.offset)
+
+    def write(self, reviews):
+        """Append one page of reviews"""
+        if reviews:
+            if self.f is None:
+                self._open()
+            lines = (json.dumps(review.to_dict(), ensure_ascii=False) + "\n" for review in reviews)
+            data = "".join(lines).encode("utf-8")
+            if self.compression == "gzip":
+                data = gzip.compress(data)
+            elif self.compressor:
+                data = self.compressor.compress(data)
+            self.f.write(data)
+            self.f.flush()
+            self.count += len(reviews)
+
+        self.pages += 1
+        if self.f is None:
+            return
+        if self.pages % self.fsync_every == 0:
+            os.fsync(self.f.fileno())
+        self.offset = self.f.tell()
+
+    def close(self):
+        if self.f is None:
+            return
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.f.close()
+
+def jsonl_extension(compression=None):
+    """File extension used for JSONL output with the given compression"""
+    return {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}.get(compression, ".jsonl")
+
+def read_jsonl(filename):
+    """Yield records from a .jsonl, .jsonl.gz or .jsonl.zst file"""
+    if filename.endswith(".gz"):
+        f = gzip.open(filename, "rt", encoding="utf-8")
+    elif filename.endswith(".zst"):
+        if zstandard is None:
+            raise ValueError("❌ Reading .zst files needs the 'zstandard' package (pip install zstandard)")
+        raw = zstandard.ZstdDecompressor().stream_reader(open(filename, "rb"), read_across_frames=True)
+        f = io.TextIOWrapper(raw, encoding="utf-8")
+    else:
+        f = open(filename, "r", encoding="utf-8")
+    with f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def write_pretty_json(records, filename):
+    """Stream records into an indented JSON array (same layout as json.dump(..., indent=2))"""
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write("[")
+        first = True
+        for record in records:
+            f.write("\n" if first else ",\n")
+            f.write("\n".join("  " + line for line in json.dumps(record, indent=2, ensure_ascii=False).splitlines()))
+            first = False
+        f.write("\n]" if not first else "]")
+
+class ReviewStore:
+    """SQLite database of reviews from every run, keyed by company and review fingerprint.
+
+    Each page is upserted in one transaction: a review seen again updates
+    its stored record and last_seen instead of adding a row. Queries by
+    source, company and date use the (source, company, date) index. The
+    full record is kept as JSON so exports match the JSON output files.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=60)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS reviews (
+            fingerprint TEXT NOT NULL,
+            source TEXT NOT NULL,
+            company TEXT NOT NULL,
+            date TEXT NOT NULL,
+            rating REAL,
+            record TEXT NOT NULL,
+            first_seen TEXT NOT NULL,
+            last_seen TEXT NOT NULL,
+            PRIMARY KEY (fingerprint, company)
+        )""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS reviews_source_company_date ON reviews (source, company, date)")
+        self.db.commit()
+        self.count = 0
+
+    def write(self, source, company, reviews):
+        """Upsert one page of reviews in a single transaction"""
+        if not reviews:
+            return
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        with self.db:
+            self.db.executemany(
+                """INSERT INTO reviews VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(fingerprint, company) DO UPDATE SET
+                       record = excluded.record, rating = excluded.rating, last_seen = excluded.last_seen""",
+                [(review_fingerprint(review), source, company, review.date.isoformat(), review.rating,
+                  json.dumps(review.to_dict(), ensure_ascii=False), now, now) for review in reviews]
+            )
+        self.count += len(reviews)
+
+    def query(self, source=None, companies=None, start=None, end=None):
+        """Yield (company, record) for the stored reviews matching every given filter, in index order"""
+        conditions, params = [], []
+        if source:
+            conditions.append("source = ?")
+            params.append(source)
+        if companies:
+            conditions.append(f"company IN ({', '.join('?' * len(companies))})")
+            params.extend(companies)
+        if start:
+            conditions.append("date >= ?")
+            params.append(start)
+        if end:
+            conditions.append("date <= ?")
+            params.append(end)
+        sql = "SELECT company, record FROM reviews"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        for company, record in self.db.execute(sql + " ORDER BY source, company, date", params):
+            yield company, json.loads(record)
+
+    def close(self):
+        self.db.close()
+
+# Columns of a CSV export: the record fields every source has, then the Trustpilot extras
+EXPORT_FIELDS = ["company"] + RECORD_FIELDS + ["country", "reviewer_total_reviews", "experience_date", "is_unprompted"]
+
+def export_reviews(rows, filename):
+    """Write (company, record) rows to a .csv, .jsonl or (pretty) .json file; returns the row count"""
+    count = 0
+
+    def records():
+        nonlocal count
+        for company, record in rows:
+            count += 1
+            yield dict(company=company, **record)
+
+    if filename.endswith(".csv"):
+        with open(filename, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, EXPORT_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(records())
+    elif filename.endswith(".jsonl"):
+        with open(filename, "w", encoding="utf-8") as f:
+            for record in records():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    elif filename.endswith(COLUMNAR_SUFFIXES):
+        write_columnar(records(), filename, with_company=True)
+    else:
+        write_pretty_json(records(), filename)
+    return count
+
+# Typed-column output formats and their file extensions
+COLUMNAR_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+COLUMNAR_SUFFIXES = tuple(COLUMNAR_FORMATS.values())
+
+# Records converted and written per row group / record batch
+COLUMNAR_BATCH_ROWS = 65536
+
+def output_extension(output_format, compress=None):
+    """File extension of the final output in the given --format"""
+    if output_format == "json":
+        return ".json"
+    return COLUMNAR_FORMATS.get(output_format) or jsonl_extension(compress)
+
+def review_schema(with_company=False):
+    """Arrow schema of a review file: dates as date32, ratings as float64 and is_unprompted as bool"""
+    fields = [("company", pyarrow.string())] if with_company else []
+    fields += [
+        ("title", pyarrow.string()),
+        ("description", pyarrow.string()),
+        ("date", pyarrow.date32()),
+        ("reviewer_name", pyarrow.string()),
+        ("rating", pyarrow.float64()),
+        ("source", pyarrow.string()),
+        ("country", pyarrow.string()),
+        ("reviewer_total_reviews", pyarrow.string()),
+        ("experience_date", pyarrow.string()),
+        ("is_unprompted", pyarrow.bool_())
+    ]
+    return pyarrow.schema(fields)
+
+def write_columnar(records, filename, with_company=False):
+    """Write records to a Parquet (.parquet) or Arrow IPC (.arrow) file with typed columns; returns the row count.
+
+    Records are converted COLUMNAR_BATCH_ROWS at a time, so memory use
+    doesn't grow with the size of the file. Fields a source doesn't have
+    (e.g. country outside Trustpilot) are null.
+    """
+    if pyarrow is None:
+        raise ValueError(f"❌ Writing {filename} needs the 'pyarrow' package (pip install pyarrow)")
+    schema = review_schema(with_company)
+    if filename.endswith(".parquet"):
+        writer = pyarrow.parquet.ParquetWriter(filename, schema)
+    else:
+        writer = pyarrow.ipc.new_file(filename, schema)
+    records = iter(records)
+    count = 0
+    try:
+        while True:
+            batch = list(itertools.islice(records, COLUMNAR_BATCH_ROWS))
+            if not batch:
                 break
-                
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Request failed for page {page}: {e}")
-            break
-    
-    return reviews
+            columns = {name: [record.get(name) for record in batch] for name in schema.names}
+            columns["date"] = pyarrow.array(columns["date"], pyarrow.string()).cast(pyarrow.date32())
+            columns["rating"] = [rating_value(value) for value in columns["rating"]]
+            writer.write_batch(pyarrow.RecordBatch.from_pydict(columns, schema=schema))
+            count += len(batch)
+    finally:
+        writer.close()
+    return count
+
+def read_columnar(filename, columns=None):
+    """Read a Parquet or Arrow file written by write_columnar into a pyarrow Table"""
+    if pyarrow is None:
+        raise ValueError(f"❌ Reading {filename} needs the 'pyarrow' package (pip install pyarrow)")
+    if filename.endswith(".parquet"):
+        return pyarrow.parquet.read_table(filename, columns=columns)
+    with pyarrow.memory_map(filename, "r") as source:
+        table = pyarrow.ipc.open_file(source).read_all()
+    return table.select(columns) if columns else table
+
+def read_json_array(filename, chunk_size=64 * 1024):
+    """Yield the items of a JSON array file one at a time, without loading the whole file"""
+    decoder = json.JSONDecoder()
+    with open(filename, encoding="utf-8") as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"❌ {filename} is not a JSON array")
+        position = 1
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The item (or the closing bracket) continues in the next chunk
+                more = f.read(chunk_size)
+                if not more:
+                    raise
+                buffer = buffer[position:] + more
+                position = 0
+                continue
+            yield item
+            position = end
+
+def read_reviews_file(filename):
+    """Yield the records of an output file: .json, .jsonl (.gz/.zst), .parquet or .arrow"""
+    if filename.endswith(".json"):
+        yield from read_json_array(filename)
+    elif filename.endswith(".parquet") and pyarrow is not None:
+        # Batch by batch, so a large file is never in memory at once
+        for batch in pyarrow.parquet.ParquetFile(filename).iter_batches():
+            for record in batch.to_pylist():
+                record["date"] = record["date"].isoformat()
+                yield record
+    elif filename.endswith(COLUMNAR_SUFFIXES):
+        for batch in read_columnar(filename).to_batches():
+            for record in batch.to_pylist():
+                record["date"] = record["date"].isoformat()
+                yield record
+    else:
+        yield from read_jsonl(filename)
 
 def load_proxies_from_file(filename):
     """Load proxies from a text file (one proxy per line)"""
@@ -680,69 +2902,1398 @@ def load_proxies_from_file(filename):
         print(f"❌ Proxy file {filename} not found")
         return []
 
-def main(company, start, end, source, proxy_file=None, proxy_list=None):
+def parse_per_source(values, cast=int, option="concurrency"):
+    """Turn per-source CLI values ("4" or "g2=2,trustpilot=5") into a {source: value} dict ('*' = every source)"""
+    settings = {}
+    for value in values or []:
+        for item in value.split(','):
+            source, sep, setting = item.strip().rpartition('=')
+            try:
+                settings[source if sep else '*'] = cast(setting)
+            except ValueError:
+                raise ValueError(f"❌ Invalid {option} '{item}'. Use VALUE or source=VALUE")
+    return settings
+
+def for_source(settings, source, default):
+    """Pick a per-source setting: explicit source=VALUE, then a bare VALUE, then the default"""
+    return settings.get(source, settings.get('*', default))
+
+def configure_logging(level="info"):
+    """Print the scraper's log lines to stdout from `level` up ('debug' adds a line per extracted review)"""
+    if not log.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        log.addHandler(handler)
+        log.propagate = False
+    # Same stream print() uses, so log lines stay in order with the rest of the output
+    log.handlers[0].setStream(sys.stdout)
+    log.setLevel(level.upper())
+
+def parse_date(value):
+    """Parse a YYYY-MM-DD command-line or manifest date"""
     try:
-        start_date = datetime.strptime(start, "%Y-%m-%d")
-        end_date = datetime.strptime(end, "%Y-%m-%d")
-    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except (TypeError, ValueError):
         raise ValueError("❌ Invalid date format. Use YYYY-MM-DD")
 
-    if start_date > end_date:
-        raise ValueError("❌ Start date cannot be later than end date")
-
-    # Load proxies
+def load_working_proxies(proxy_file=None, proxy_list=None, offline=False, check_url=PROXY_CHECK_URL,
+                         check_workers=20, health_cache=PROXY_HEALTH_CACHE, health_ttl=3600):
+    """Load and health-check proxies; returns (working proxies fastest first, health records)"""
     proxies = []
     if proxy_file:
         proxies = load_proxies_from_file(proxy_file)
     elif proxy_list:
         proxies = proxy_list
 
-    # Test proxies if provided
+    # Offline runs never touch the network, so there is nothing to test
+    if offline and proxies:
+        print("📴 Offline mode: ignoring proxies")
+        proxies = []
+
+    # Test proxies if provided, fastest first
+    health = {}
     if proxies:
-        print(f"🔍 Testing {len(proxies)} proxies...")
-        working_proxies = [proxy for proxy in proxies if test_proxy(proxy)]
+        health = check_proxies(proxies, check_url, check_workers, health_cache, health_ttl)
+        working_proxies = sorted((proxy for proxy in proxies if health[proxy]["ok"]),
+                                 key=lambda proxy: health[proxy]["latency"])
         print(f"✅ Found {len(working_proxies)} working proxies")
         proxies = working_proxies
+    return proxies, health
 
-    # Create session with proxy
-    session = get_proxy_session(proxies if proxies else None)
-
-    # Scrape based on source
-    if source == "g2":
-        reviews = scrape_g2(company, start_date, end_date, session)
-    elif source == "capterra":
-        reviews = scrape_capterra(company, start_date, end_date, session)
-    elif source == "trustpilot":
-        reviews = scrape_trustpilot(company, start_date, end_date, session)
+def open_session(proxies, health=None, proxy_cooldown=300, cache=False, cache_dir=HTTP_CACHE_DIR, cache_ttl=3600,
+                 cache_max_mb=200, offline=False, shared_lock=None):
+    """Build the session pages are fetched with; returns (session, ProxyPool or None)"""
+    # Rotate through working proxies per request, or use a plain session without proxies
+    if proxies:
+        session = ProxyPool(proxies, health, cooldown=proxy_cooldown)
+        print(f"🔄 Rotating requests across {len(proxies)} proxies")
     else:
+        session = get_proxy_session()
+    pool = session if isinstance(session, ProxyPool) else None
+
+    if cache or offline:
+        session = CachedSession(session, cache_dir, ttl=cache_ttl, max_bytes=cache_max_mb * 1024 * 1024,
+                                offline=offline, shared_lock=shared_lock)
+        print(f"💾 Caching responses in {cache_dir}" + (" (offline, cache only)" if offline else ""))
+    return session, pool
+
+def source_options(source, concurrency=None, parser=None, restrict_parsing=True, embedded_json=True, throttle=None,
+                   retries=3, retry_budget=30, metrics=None, resolutions=None, max_pages=None, stream=False,
+                   parse_pool=None):
+    """ScrapeOptions for one source from the per-source CLI settings"""
+    return ScrapeOptions(
+        concurrency=for_source(concurrency or {}, source, DEFAULT_CONCURRENCY.get(source, 1)),
+        parser=resolve_parser(for_source(parser or {}, source, "auto")),
+        restrict_parsing=restrict_parsing,
+        embedded_json=embedded_json,
+        throttle=throttle,
+        retry=RetryPolicy(attempts=retries + 1, budget=retry_budget),
+        metrics=metrics,
+        resolutions=resolutions,
+        max_pages=max_pages,
+        stream=stream,
+        parse_pool=parse_pool
+    )
+
+SCRAPERS = {
+    "g2": scrape_g2,
+    "capterra": scrape_capterra,
+    "trustpilot": scrape_trustpilot
+}
+
+def scrape_job(company, source, start_date, end_date, session, options, state, incremental=False, resume=True,
+               output_format="json", compress=None, fsync_every=1, seen=None, store=None):
+    """Scrape one company from one source into its output file.
+
+    A review is written once even if it shows up on two pages (new reviews
+    push older ones onto the next page while we paginate), and with a
+    SeenReviews index `seen` not at all if an earlier run already wrote it.
+    Written reviews are also upserted into the ReviewStore `store` if given.
+    Returns (reviews written, output filename or None if nothing was found,
+    pages skipped because they kept failing).
+    """
+    if source not in SCRAPERS:
         raise ValueError("❌ Unsupported source. Choose g2, capterra, or trustpilot")
 
-    if not reviews:
+    # Incremental runs only need reviews newer than what earlier runs collected
+    watermark, known_keys = None, set()
+    if incremental:
+        watermark, known_keys = state.watermark(source, company)
+        if watermark and watermark > start_date:
+            print(f"📌 Already collected up to {watermark:%Y-%m-%d}, only fetching newer reviews")
+            start_date = watermark
+
+    # Reviews are streamed to a JSONL file page by page; pretty JSON or Parquet is written from it at the end.
+    # An incremental run after a finished one adds to that run's output, so its reviews go to a file of their own.
+    final = f"{company}_{source}_reviews{output_extension(output_format, compress)}"
+    previous = final if watermark and os.path.exists(final) else None
+    output = f"{company}_{source}_reviews{'.new' if previous else ''}{jsonl_extension(compress)}"
+    window = (start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
+    progress = {"output_offset": 0, "reviews_written": 0, "newest_date": None, "newest_keys": [], "failed_pages": []}
+
+    # Pick up where an interrupted run of the same window left off
+    checkpoint = state.resume_point(source, company, *window, output) if resume else None
+    if checkpoint:
+        options.first_page = checkpoint["last_page"] + 1
+        if options.max_pages is not None:
+            options.max_pages = max(0, options.max_pages - checkpoint["pages_done"])
+        progress.update((name, checkpoint.get(name, progress[name])) for name in progress)
+        print(f"♻️ Resuming at page {options.first_page} with {progress['reviews_written']} reviews "
+              f"from the interrupted run")
+
+    sink = JsonlSink(output, compress, fsync_every, offset=progress["output_offset"])
+    emitted = set()
+    duplicates = {"run": 0, "index": 0}
+
+    def drop_duplicates(page_reviews):
+        fresh = []
+        for review in page_reviews:
+            fingerprint = review_fingerprint(review)
+            if fingerprint not in emitted:
+                emitted.add(fingerprint)
+                fresh.append(review)
+        duplicates["run"] += len(page_reviews) - len(fresh)
+        if seen is not None:
+            stored = len(fresh)
+            fresh = seen.unseen(fresh, company)
+            duplicates["index"] += stored - len(fresh)
+        if options.metrics and len(fresh) < len(page_reviews):
+            options.metrics.inc("scraper_duplicates_total", len(page_reviews) - len(fresh), source=source)
+        return fresh
+
+    def on_page(page, page_reviews):
+        if known_keys:
+            page_reviews = [review for review in page_reviews if review_key(review) not in known_keys]
+        page_reviews = drop_duplicates(page_reviews)
+        sink.write(page_reviews)
+        if store is not None:
+            store.write(source, company, page_reviews)
+        for review in page_reviews:
+            date = review.date.isoformat()
+            if not progress["newest_date"] or date > progress["newest_date"]:
+                progress["newest_date"], progress["newest_keys"] = date, []
+            if date == progress["newest_date"]:
+                progress["newest_keys"].append(review_key(review))
+        progress["output_offset"] = sink.offset
+        progress["reviews_written"] += len(page_reviews)
+        state.checkpoint(source, company, *window, output, page, progress)
+        # Only once the page is on disk, so a crash can't mark unwritten reviews as seen
+        if seen is not None and page_reviews:
+            seen.add(page_reviews, company)
+
+    def on_failed_page(page, url, reason):
+        progress["failed_pages"].append({"page": page, "url": url, "reason": reason, "window": list(window)})
+
+    options.on_page = on_page
+    options.on_failed_page = on_failed_page
+    options.keep_reviews = False
+
+    try:
+        if start_date > end_date:
+            print(f"✅ Everything up to {window[1]} was already collected")
+        else:
+            SCRAPERS[source](company, start_date, end_date, session, options)
+    finally:
+        sink.close()
+
+    if duplicates["run"] or duplicates["index"]:
+        print(f"🧹 Dropped {duplicates['run']} reviews repeated across pages"
+              + (f" and {duplicates['index']} already written by earlier runs" if seen is not None else ""))
+    failed_pages = progress["failed_pages"]
+    state.finish(source, company, failed_pages)
+    if failed_pages:
+        print(f"⚠️ Skipped {len(failed_pages)} pages that kept failing: "
+              f"{', '.join(str(failure['page']) for failure in failed_pages)} (recorded in {state.state_file})")
+    if incremental:
+        state.update_watermark(source, company, progress["newest_date"], progress["newest_keys"])
+
+    # Nothing was written, so the sink never opened `output` and an earlier run's file is left as it was
+    if not progress["reviews_written"] and watermark:
+        print(f"✅ No new reviews since {watermark:%Y-%m-%d}")
+        return 0, None, failed_pages
+    if not progress["reviews_written"] and duplicates["index"]:
+        print("✅ No new reviews: everything found was already written by earlier runs")
+        return 0, None, failed_pages
+    if not progress["reviews_written"]:
         print("⚠️ No reviews found for given parameters.")
         print("\n💡 Troubleshooting tips:")
         print("1. Check if the company slug is correct")
         print("2. Try different date ranges")
         print("3. The website might be blocking scraping attempts")
         print("4. CSS selectors might have changed")
+        return 0, None, failed_pages
+    if previous:
+        # Both files are newest first, so the new reviews are merged in front of the earlier ones
+        merging = f"{company}_{source}_reviews.merging{output_extension(output_format, compress)}"
+        total = merge_outputs([output, previous], merging, compress)
+        os.replace(merging, final)
+        os.remove(output)
+        print(f"✅ Added {progress['reviews_written']} new reviews to {final} ({total} in all)")
+        return progress["reviews_written"], final, failed_pages
+    if output_format != "jsonl":
+        if output_format == "json":
+            write_pretty_json(read_jsonl(output), final)
+        else:
+            write_columnar(read_jsonl(output), final)
+        os.remove(output)
+    print(f"✅ Saved {progress['reviews_written']} reviews to {final}")
+    return progress["reviews_written"], final, failed_pages
+
+def site_company(company, source, company_for=None, fan_out=False):
+    """The name `company` goes by on `source`: an explicit --company-for, else a domain for Trustpilot
+    when scraping every source at once (slack -> slack.com), else `company` itself"""
+    default = f"{company}.com" if fan_out and source == "trustpilot" and "." not in company else company
+    return for_source(company_for or {}, source, default)
+
+def merge_outputs(outputs, filename, compress=None):
+    """Combine per-source output files into one, newest reviews first; returns the number of reviews.
+
+    Every per-source file is already newest first (pages are written in
+    listing order), so the files are merged while they are read and memory
+    use doesn't grow with the number of reviews.
+    """
+    count = 0
+
+    def merged():
+        nonlocal count
+        for record in heapq.merge(*(read_reviews_file(output) for output in outputs),
+                                  key=lambda record: record["date"], reverse=True):
+            count += 1
+            yield record
+
+    if filename.endswith(".json"):
+        write_pretty_json(merged(), filename)
+    elif filename.endswith(COLUMNAR_SUFFIXES):
+        write_columnar(merged(), filename)
     else:
-        filename = f"{company}_{source}_reviews.json"
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(reviews, f, indent=2, ensure_ascii=False)
-        print(f"✅ Saved {len(reviews)} reviews to {filename}")
+        sink = JsonlSink(filename, compress)
+        records = merged()
+        while True:
+            batch = list(itertools.islice(records, 1000))
+            if not batch:
+                break
+            sink.write([Review(**dict(record, date=datetime.strptime(record["date"], "%Y-%m-%d").date()))
+                        for record in batch])
+        sink.close()
+    return count
+
+# Label put in front of every line printed by the current source when several run at once
+output_label = contextvars.ContextVar("output_label", default=None)
+
+class LabelledOutput:
+    """sys.stdout wrapper that starts each line with the output_label of the context printing it.
+
+    Lines are written whole, so the output of concurrent threads can
+    interleave line by line but never within a line.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.lock = threading.Lock()
+        self.pending = threading.local()
+
+    def write(self, text):
+        label = output_label.get()
+        if label is None:
+            return self.stream.write(text)
+        *lines, self.pending.text = (getattr(self.pending, "text", "") + text).split("\n")
+        if lines:
+            with self.lock:
+                self.stream.write("".join(f"{label}{line}\n" for line in lines))
+        return len(text)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+@contextlib.contextmanager
+def labelled_output():
+    """Label the printed and logged lines of every source inside (see output_label)"""
+    stream = sys.stdout
+    sys.stdout = LabelledOutput(stream)
+    if log.handlers:
+        log.handlers[0].setStream(sys.stdout)
+    try:
+        yield
+    finally:
+        sys.stdout = stream
+        if log.handlers:
+            log.handlers[0].setStream(stream)
+
+def main(company, start, end, source, proxy_file=None, proxy_list=None, concurrency=None, rate=None, parser=None,
+         restrict_parsing=True, embedded_json=True, stream=False, parse_workers=0, retries=3, retry_budget=30,
+         max_pages=None, proxy_check_url=PROXY_CHECK_URL, proxy_check_workers=20,
+         proxy_health_cache=PROXY_HEALTH_CACHE, proxy_health_ttl=3600, proxy_cooldown=300, cache=False,
+         cache_dir=HTTP_CACHE_DIR, cache_ttl=3600, cache_max_mb=200, offline=False, incremental=False,
+         state_dir=STATE_DIR, resume=True, output_format="json", compress=None, fsync_every=1, dedupe=False,
+         db=None, log_level="info", metrics_file=None, prometheus_file=None, company_for=None):
+    """Scrape one company from one source, or with source "all" from every source at once.
+
+    The sources of an "all" run are separate hosts, so they run side by side,
+    each paced by its own domain bucket of the shared RateLimiter, and their
+    outputs are merged into {company}_all_reviews.*.
+    """
+    configure_logging(log_level)
+    start_date = parse_date(start)
+    end_date = parse_date(end)
+    if start_date > end_date:
+        raise ValueError("❌ Start date cannot be later than end date")
+    sources = list(SCRAPERS) if source == "all" else [source]
+    if stream and cache:
+        print("ℹ️ --stream is ignored with --cache, which stores every page whole")
+        stream = False
+    if parse_workers and stream:
+        print("ℹ️ --parse-workers is ignored with --stream, which parses pages as they download")
+        parse_workers = 0
+    # Started before any other thread, so the worker processes don't inherit running threads
+    parse_pool = ParsePool(parse_workers) if parse_workers else None
+    if parse_pool:
+        print(f"🧵 Parsing pages in {parse_pool.workers} worker processes")
+
+    proxies, health = load_working_proxies(proxy_file, proxy_list, offline, proxy_check_url, proxy_check_workers,
+                                           proxy_health_cache, proxy_health_ttl)
+    session, pool = open_session(proxies, health, proxy_cooldown, cache, cache_dir, cache_ttl, cache_max_mb, offline)
+
+    throttle = RateLimiter(source_rates(concurrency, rate))
+    metrics = Metrics()
+    resolutions = ResolutionCache(os.path.join(state_dir, RESOLUTIONS_FILE))
+    state = StateStore(state_dir)
+    upserted = []
+
+    def run(source):
+        if len(sources) > 1:
+            output_label.set(f"[{source}] ")
+        options = source_options(source, concurrency, parser, restrict_parsing, embedded_json, throttle, retries,
+                                 retry_budget, metrics, resolutions, max_pages, stream, parse_pool)
+        print(f"⚡ Fetching up to {options.concurrency} pages at a time from {source}, parsing with {options.parser}, "
+              f"starting at {throttle.rates[SOURCE_DOMAINS[source]] * 60:.1f} requests/min")
+        # SQLite connections can't be shared between threads, so every source opens its own
+        seen = SeenReviews(os.path.join(state_dir, SEEN_REVIEWS_FILE)) if dedupe else None
+        store = ReviewStore(db) if db else None
+        try:
+            return scrape_job(site_company(company, source, company_for, len(sources) > 1), source, start_date,
+                              end_date, session, options, state, incremental, resume, output_format, compress,
+                              fsync_every, seen, store)
+        finally:
+            if seen is not None:
+                seen.close()
+            if store is not None:
+                upserted.append(store.count)
+                store.close()
+
+    try:
+        if len(sources) == 1:
+            run(source)
+        else:
+            names = [f"{name} ({site_company(company, name, company_for, True)})" for name in sources]
+            print(f"🔀 Scraping {', '.join(names)} at the same time")
+            with labelled_output(), ThreadPoolExecutor(max_workers=len(sources)) as executor:
+                futures = {name: executor.submit(contextvars.copy_context().run, run, name) for name in sources}
+            outputs = []
+            for name, future in futures.items():
+                try:
+                    output = future.result()[1]
+                except Exception as e:
+                    print(f"❌ {name} failed: {e}")
+                    continue
+                if output:
+                    outputs.append(output)
+            if outputs:
+                filename = f"{company}_all_reviews{output_extension(output_format, compress)}"
+                count = merge_outputs(outputs, filename, compress)
+                print(f"✅ Merged {count} reviews from {len(outputs)} sources into {filename}")
+    finally:
+        if db:
+            print(f"🗄️ Upserted {sum(upserted)} reviews into {db}")
+        if parse_pool:
+            parse_pool.close()
+        throttle.report()
+        if pool:
+            pool.report()
+        if isinstance(session, CachedSession):
+            session.close()
+        metrics.print_summary()
+        metrics.write(metrics_file, prometheus_file, company=company, source=source, start=start, end=end)
+
+MANIFEST_FIELDS = ["company", "source", "start", "end"]
+
+def load_manifest(filename, start=None, end=None):
+    """Read batch jobs from a CSV file (with a header row) or a JSON list of objects.
+
+    Each job has company, source, start and end; start/end fall back to the
+    --start/--end given on the command line.
+    """
+    with open(filename, "r", encoding="utf-8", newline="") as f:
+        if filename.endswith(".json"):
+            rows = json.load(f)
+        else:
+            rows = list(csv.DictReader(f))
+
+    jobs = []
+    seen = set()
+    for number, row in enumerate(rows, 1):
+        job = {name: str(row.get(name) or "").strip() for name in MANIFEST_FIELDS}
+        job["start"] = job["start"] or start
+        job["end"] = job["end"] or end
+        missing = [name for name in MANIFEST_FIELDS if not job[name]]
+        if missing:
+            raise ValueError(f"❌ Manifest job {number} is missing {', '.join(missing)}")
+        if job["source"] not in SCRAPERS:
+            raise ValueError(f"❌ Manifest job {number}: unsupported source '{job['source']}'")
+        if parse_date(job["start"]) > parse_date(job["end"]):
+            raise ValueError(f"❌ Manifest job {number}: start date is later than end date")
+        # Jobs write to {company}_{source}_reviews.*, so a pair can only appear once
+        if (job["company"], job["source"]) in seen:
+            raise ValueError(f"❌ Manifest job {number}: {job['company']} on {job['source']} is listed twice")
+        seen.add((job["company"], job["source"]))
+        jobs.append(job)
+    return jobs
+
+def interleave_sources(jobs):
+    """Order jobs round-robin by source so busy workers are spread over different sites"""
+    by_source = {}
+    for job in jobs:
+        by_source.setdefault(job["source"], []).append(job)
+    queues = list(by_source.values())
+    ordered = []
+    while queues:
+        ordered.extend(queue.pop(0) for queue in queues)
+        queues = [queue for queue in queues if queue]
+    return ordered
+
+BATCH_STATUS_ICONS = {"ok": "✅", "empty": "⚠️", "failed": "❌"}
+
+# Per-process state of a batch worker, set up once by init_batch_worker and reused by every job
+_batch_worker = {}
+
+def init_batch_worker(settings, proxies, health, rate_state, shared_lock):
+    """Process pool initializer: build the session, throttle and state store this worker's jobs share"""
+    configure_logging(settings["log_level"])
+    session, pool = open_session(proxies, health, settings["proxy_cooldown"], settings["cache"],
+                                 settings["cache_dir"], settings["cache_ttl"], settings["cache_max_mb"],
+                                 settings["offline"], shared_lock)
+    # One rate budget per site for all workers: a site sees the rate of a single run, however many jobs hit it
+    _batch_worker.update(
+        settings=settings,
+        session=session,
+        pool=pool,
+        throttle=RateLimiter(source_rates(settings["concurrency"], settings["rate"]), rate_state, shared_lock),
+        state=StateStore(settings["state_dir"], shared_lock),
+        seen=SeenReviews(os.path.join(settings["state_dir"], SEEN_REVIEWS_FILE)) if settings["dedupe"] else None,
+        store=ReviewStore(settings["db"]) if settings["db"] else None,
+        resolutions=ResolutionCache(os.path.join(settings["state_dir"], RESOLUTIONS_FILE), shared_lock),
+        metrics=Metrics()
+    )
+
+def run_batch_job(job):
+    """Run one manifest job in a batch worker and return its summary row"""
+    settings = _batch_worker["settings"]
+    result = dict(job, status="ok", reviews=0, output=None, failed_pages=[], error=None, worker=os.getpid())
+    started = time.monotonic()
+    try:
+        options = source_options(job["source"], settings["concurrency"], settings["parser"],
+                                 settings["restrict_parsing"], settings["embedded_json"], _batch_worker["throttle"],
+                                 settings["retries"], settings["retry_budget"], _batch_worker["metrics"],
+                                 _batch_worker["resolutions"], settings["max_pages"], settings["stream"])
+        print(f"▶️ [{os.getpid()}] {job['company']} on {job['source']} ({job['start']} → {job['end']})")
+        result["reviews"], result["output"], result["failed_pages"] = scrape_job(
+            job["company"], job["source"], parse_date(job["start"]), parse_date(job["end"]),
+            _batch_worker["session"], options, _batch_worker["state"], settings["incremental"],
+            settings["resume"], settings["output_format"], settings["compress"], settings["fsync_every"],
+            _batch_worker["seen"], _batch_worker["store"]
+        )
+        if not result["reviews"]:
+            result["status"] = "empty"
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = str(e)
+    finally:
+        # Workers are never closed, so each job leaves its cache entries on disk for the other workers
+        if isinstance(_batch_worker["session"], CachedSession):
+            _batch_worker["session"].flush()
+    result["seconds"] = round(time.monotonic() - started, 1)
+    # This job's share of the worker's metrics, merged into the run report by the parent
+    result["metrics"] = _batch_worker["metrics"].snapshot(reset=True)
+    return result
+
+def run_manifest(manifest, start=None, end=None, workers=4, summary_file="batch_summary.json", proxy_file=None,
+                 proxy_list=None, concurrency=None, rate=None, parser=None, restrict_parsing=True, embedded_json=True,
+                 stream=False, parse_workers=0, retries=3, retry_budget=30, max_pages=None,
+                 proxy_check_url=PROXY_CHECK_URL, proxy_check_workers=20, proxy_health_cache=PROXY_HEALTH_CACHE,
+                 proxy_health_ttl=3600, proxy_cooldown=300, cache=False, cache_dir=HTTP_CACHE_DIR, cache_ttl=3600,
+                 cache_max_mb=200, offline=False, incremental=False, state_dir=STATE_DIR, resume=True,
+                 output_format="json", compress=None, fsync_every=1, dedupe=False, db=None, log_level="info",
+                 metrics_file=None, prometheus_file=None):
+    """Run every job of a manifest across a pool of worker processes and write a summary.
+
+    Proxies are health-checked once up front. Each worker builds its session
+    once and reuses it (and its proxy scores) for all of its jobs, and
+    requests to the same site are spaced out across all workers together.
+    The remaining options are the same as main()'s and apply to every job.
+    """
+    manifest_jobs = load_manifest(manifest, start, end)
+    if stream and cache:
+        print("ℹ️ --stream is ignored with --cache, which stores every page whole")
+        stream = False
+    if parse_workers:
+        print("ℹ️ --parse-workers is ignored with --manifest, which already parses in --workers processes")
+    jobs = interleave_sources(manifest_jobs)
+    workers = max(1, min(workers, len(jobs)))
+    print(f"📋 {len(jobs)} jobs from {manifest}, running {workers} at a time")
+
+    proxies, health = load_working_proxies(proxy_file, proxy_list, offline, proxy_check_url, proxy_check_workers,
+                                           proxy_health_cache, proxy_health_ttl)
+    settings = dict(
+        concurrency=concurrency, rate=rate, parser=parser, restrict_parsing=restrict_parsing,
+        embedded_json=embedded_json, stream=stream, retries=retries, retry_budget=retry_budget, max_pages=max_pages,
+        proxy_cooldown=proxy_cooldown,
+        cache=cache, cache_dir=cache_dir, cache_ttl=cache_ttl, cache_max_mb=cache_max_mb, offline=offline,
+        incremental=incremental, state_dir=state_dir, resume=resume, output_format=output_format, compress=compress,
+        fsync_every=fsync_every, dedupe=dedupe, db=db, log_level=log_level
+    )
+
+    results = []
+    metrics = Metrics()
+    started = time.monotonic()
+    with multiprocessing.Manager() as manager:
+        rate_state = manager.dict()
+        shared_lock = manager.Lock()
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_batch_worker,
+                                 initargs=(settings, proxies, health, rate_state, shared_lock)) as executor:
+            futures = [executor.submit(run_batch_job, job) for job in jobs]
+            for future in as_completed(futures):
+                result = future.result()
+                metrics.merge(result.pop("metrics"))
+                results.append(result)
+                print(f"{BATCH_STATUS_ICONS[result['status']]} [{len(results)}/{len(jobs)}] {result['company']} "
+                      f"on {result['source']}: {result['status']}, {result['reviews']} reviews in {result['seconds']}s")
+        RateLimiter(state=rate_state).report()
+
+    order = {(job["company"], job["source"]): i for i, job in enumerate(manifest_jobs)}
+    results.sort(key=lambda result: order[(result["company"], result["source"])])
+    elapsed = round(time.monotonic() - started, 1)
+
+    print(f"\n📊 Batch summary ({elapsed}s):")
+    for result in results:
+        detail = result["output"] or result["error"] or "no reviews"
+        if result["failed_pages"]:
+            detail += f", {len(result['failed_pages'])} pages skipped"
+        print(f"   - {result['company']} on {result['source']}: {result['status']}, {result['reviews']} reviews, "
+              f"{result['seconds']}s ({detail})")
+    print(", ".join(f"{icon} {sum(1 for result in results if result['status'] == status)} {status}"
+                    for status, icon in BATCH_STATUS_ICONS.items()))
+
+    save_json_file(summary_file, {"elapsed": elapsed, "workers": workers, "jobs": results})
+    print(f"📝 Wrote batch summary to {summary_file}")
+    metrics.print_summary()
+    metrics.write(metrics_file, prometheus_file, manifest=manifest, workers=workers, jobs=len(jobs))
+    return results
+
+def query_command(argv):
+    """`query` subcommand: export a slice of a --db review database to JSON, JSONL or CSV"""
+    parser = argparse.ArgumentParser(prog="scrapy.py query", description="Export stored reviews from a --db database")
+    parser.add_argument("--db", required=True, help="SQLite database written with --db")
+    parser.add_argument("--source", choices=sorted(SCRAPERS), help="Only reviews from this source")
+    parser.add_argument("--company", action="append",
+                        help="Only these companies (repeat or comma-separate, e.g. slack.com,zoom.us)")
+    parser.add_argument("--start", help="Only reviews on or after YYYY-MM-DD")
+    parser.add_argument("--end", help="Only reviews on or before YYYY-MM-DD")
+    parser.add_argument("--output", required=True,
+                        help="File to write; the format follows the extension "
+                             "(.json, .jsonl, .csv, .parquet or .arrow)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        parser.error(f"{args.db} does not exist")
+    if args.output.endswith(COLUMNAR_SUFFIXES) and pyarrow is None:
+        parser.error(f"writing {args.output} needs the 'pyarrow' package (pip install pyarrow)")
+    companies = [company.strip() for value in args.company or [] for company in value.split(",") if company.strip()]
+    for value in (args.start, args.end):
+        if value:
+            try:
+                parse_date(value)
+            except ValueError as e:
+                parser.error(str(e))
+
+    store = ReviewStore(args.db)
+    try:
+        count = export_reviews(store.query(args.source, companies, args.start, args.end), args.output)
+    finally:
+        store.close()
+    print(f"✅ Exported {count} reviews to {args.output}")
+
+# Columns the stats command loads from every file
+STATS_COLUMNS = ["date", "rating", "source", "country", "is_unprompted"]
+
+def load_review_columns(filenames):
+    """Load the columns stats needs from output files into NumPy arrays.
+
+    Parquet and Arrow files are read column by column without building a
+    record per review. JSON and JSONL records are gathered into one list per
+    column and converted once. Returns date (datetime64[D]), rating (float,
+    NaN if missing), source and country (objects, None if missing) and
+    is_unprompted (1.0, 0.0, or NaN where the source doesn't say).
+    """
+    parts = []
+    for filename in filenames:
+        if filename.endswith(COLUMNAR_SUFFIXES):
+            table = read_columnar(filename, STATS_COLUMNS)
+            unprompted = table.column("is_unprompted")
+            parts.append({
+                "date": table.column("date").cast(pyarrow.int32()).to_numpy().astype("datetime64[D]"),
+                "rating": table.column("rating").to_numpy().astype(float),
+                "source": table.column("source").to_numpy(),
+                "country": table.column("country").to_numpy(),
+                "is_unprompted": numpy.where(unprompted.is_null().to_numpy(), numpy.nan,
+                                             unprompted.fill_null(False).to_numpy())
+            })
+            continue
+        columns = {name: [] for name in STATS_COLUMNS}
+        for record in read_reviews_file(filename):
+            columns["date"].append(record["date"])
+            columns["rating"].append(rating_value(record.get("rating")))
+            columns["source"].append(record.get("source"))
+            columns["country"].append(record.get("country"))
+            columns["is_unprompted"].append(record.get("is_unprompted"))
+        parts.append({
+            "date": numpy.array(columns["date"], dtype="datetime64[D]"),
+            "rating": numpy.array(columns["rating"], dtype=float),
+            "source": numpy.array(columns["source"], dtype=object),
+            "country": numpy.array(columns["country"], dtype=object),
+            "is_unprompted": numpy.array(columns["is_unprompted"], dtype=float)
+        })
+    return {name: numpy.concatenate([part[name] for part in parts]) for name in STATS_COLUMNS}
+
+def group_ratings(keys, ratings):
+    """Return (distinct keys, reviews, average rating) per key, using unique/bincount instead of a loop"""
+    values, inverse, counts = numpy.unique(keys, return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+    rated = ~numpy.isnan(ratings)
+    rated_counts = numpy.bincount(inverse[rated], minlength=len(values))
+    sums = numpy.bincount(inverse[rated], weights=ratings[rated], minlength=len(values))
+    averages = numpy.divide(sums, rated_counts, out=numpy.full(len(values), numpy.nan), where=rated_counts > 0)
+    return values, counts, averages
+
+def review_stats(columns, top=20):
+    """Rating distribution, monthly volume, per-source and per-country breakdowns and the unprompted share"""
+    dates, ratings = columns["date"], columns["rating"]
+    rated = ~numpy.isnan(ratings)
+
+    def rows(values, counts, averages, name):
+        return [{name: str(value), "reviews": int(count),
+                 "average_rating": None if numpy.isnan(average) else round(float(average), 2)}
+                for value, count, average in zip(values, counts, averages)]
+
+    summary = {
+        "reviews": int(len(dates)),
+        "first_date": str(dates.min()) if len(dates) else None,
+        "last_date": str(dates.max()) if len(dates) else None,
+        "average_rating": round(float(ratings[rated].mean()), 2) if rated.any() else None
+    }
+    values, counts = numpy.unique(ratings[rated], return_counts=True)
+    summary["ratings"] = {f"{value:g}": int(count) for value, count in zip(values, counts)}
+    summary["sources"] = rows(*group_ratings(columns["source"].astype(str), ratings), "source")
+    summary["months"] = rows(*group_ratings(dates.astype("datetime64[M]"), ratings), "month")
+
+    # Only Trustpilot reviews have a country; an empty one means the reviewer didn't give it
+    has_country = numpy.not_equal(columns["country"], None)
+    countries = columns["country"][has_country].astype(str)
+    countries = numpy.where(countries == "", "unknown", countries)
+    values, counts, averages = group_ratings(countries, ratings[has_country])
+    order = numpy.argsort(-counts, kind="stable")[:top]
+    summary["countries"] = rows(values[order], counts[order], averages[order], "country")
+
+    unprompted = columns["is_unprompted"]
+    known = ~numpy.isnan(unprompted)
+    summary["unprompted"] = {
+        "reviews": int(known.sum()),
+        "share": round(float(unprompted[known].mean()), 4) if known.any() else None
+    }
+    return summary
+
+def print_stats(summary, files):
+    print(f"📊 {summary['reviews']} reviews from {files} files"
+          + (f" ({summary['first_date']} → {summary['last_date']})" if summary["reviews"] else ""))
+    if not summary["reviews"]:
+        return
+    if summary["average_rating"] is not None:
+        print(f"⭐ Average rating {summary['average_rating']}")
+    rated = sum(summary["ratings"].values())
+    for rating, count in sorted(summary["ratings"].items(), key=lambda item: -float(item[0])):
+        print(f"   {rating:>4}: {count:>8} ({count / rated:.1%})")
+    print("🏷️ Sources:")
+    for row in summary["sources"]:
+        print(f"   {row['source']:<12} {row['reviews']:>8} reviews, average {row['average_rating']}")
+    print("📅 Reviews per month:")
+    for row in summary["months"]:
+        print(f"   {row['month']}  {row['reviews']:>8} reviews, average {row['average_rating']}")
+    if summary["countries"]:
+        print(f"🌍 Top {len(summary['countries'])} countries:")
+        for row in summary["countries"]:
+            print(f"   {row['country']:<8} {row['reviews']:>8} reviews, average {row['average_rating']}")
+    if summary["unprompted"]["share"] is not None:
+        print(f"🙋 Unprompted: {summary['unprompted']['share']:.1%} of the {summary['unprompted']['reviews']} "
+              f"Trustpilot reviews")
+
+def stats_command(argv):
+    """`stats` subcommand: aggregate ratings, monthly volume and countries over review output files"""
+    parser = argparse.ArgumentParser(prog="scrapy.py stats", description="Summarize reviews from output files")
+    parser.add_argument("files", nargs="+",
+                        help="Output files to combine: .json, .jsonl (.gz/.zst), .parquet or .arrow")
+    parser.add_argument("--source", choices=sorted(SCRAPERS), help="Only reviews from this source")
+    parser.add_argument("--start", help="Only reviews on or after YYYY-MM-DD")
+    parser.add_argument("--end", help="Only reviews on or before YYYY-MM-DD")
+    parser.add_argument("--top", type=int, default=20, help="Countries listed, most reviews first")
+    parser.add_argument("--output", help="Also write the summary to this JSON file")
+    args = parser.parse_args(argv)
+
+    if numpy is None:
+        parser.error("the stats command needs the 'numpy' package (pip install numpy)")
+    if pyarrow is None and any(filename.endswith(COLUMNAR_SUFFIXES) for filename in args.files):
+        parser.error("reading .parquet and .arrow files needs the 'pyarrow' package (pip install pyarrow)")
+    for filename in args.files:
+        if not os.path.exists(filename):
+            parser.error(f"{filename} does not exist")
+    for value in (args.start, args.end):
+        if value:
+            try:
+                parse_date(value)
+            except ValueError as e:
+                parser.error(str(e))
+
+    started = time.perf_counter()
+    columns = load_review_columns(args.files)
+    loaded = time.perf_counter()
+    keep = numpy.ones(len(columns["date"]), dtype=bool)
+    if args.source:
+        keep &= columns["source"] == SITE_SPECS[args.source]["source"]
+    if args.start:
+        keep &= columns["date"] >= numpy.datetime64(args.start)
+    if args.end:
+        keep &= columns["date"] <= numpy.datetime64(args.end)
+    if not keep.all():
+        columns = {name: values[keep] for name, values in columns.items()}
+    summary = review_stats(columns, args.top)
+
+    print_stats(summary, len(args.files))
+    print(f"⏱️ Loaded in {loaded - started:.2f}s, aggregated in {time.perf_counter() - loaded:.2f}s")
+    if args.output:
+        save_json_file(args.output, summary)
+        print(f"📝 Saved the summary to {args.output}")
+
+class Broker(abc.ABC):
+    """Interface of the task queue shared by `enqueue` and any number of `worker`s.
+
+    A task is one listing page, a dict with id, company, source, start, end,
+    page, url (the listing URL with a {page} placeholder, None until the
+    page 1 task has resolved it), last_page (last page of the plan, None
+    while unknown), open_ended (whether each page queues the next one),
+    max_pages, attempts and max_attempts. Delivery is at least once: a task
+    whose lease runs out is handed to another worker, so results must be
+    idempotent (ReviewStore upserts are). Implementations are registered
+    under a URL scheme in BROKERS.
+    """
+
+    @abc.abstractmethod
+    def enqueue(self, tasks):
+        """Queue task dicts, ignoring pages already queued; returns how many were added"""
+
+    @abc.abstractmethod
+    def lease(self, worker, visibility_timeout):
+        """Hand the next available task to `worker` for `visibility_timeout` seconds, or return None"""
+
+    @abc.abstractmethod
+    def extend(self, task, worker, visibility_timeout):
+        """Renew a lease; False if it was lost to another worker"""
+
+    @abc.abstractmethod
+    def complete(self, task, worker, spawn=(), cancel_after=None):
+        """Finish a task, queuing `spawn` and cancelling queued pages of its listing after
+        `cancel_after` at the same time; False if the lease was lost"""
+
+    @abc.abstractmethod
+    def fail(self, task, worker, error, retry_in=None):
+        """Put a task back to be tried again in `retry_in` seconds, or fail it for good if it is
+        out of attempts or `retry_in` is None; returns the new status"""
+
+    @abc.abstractmethod
+    def counts(self):
+        """Return {status: number of tasks}"""
+
+    @abc.abstractmethod
+    def rate_state(self):
+        """Return (state, lock) for a RateLimiter shared by every worker of this queue"""
+
+    def close(self):
+        pass
+
+class SQLiteTransaction:
+    """Reusable `with` block running an immediate-mode transaction on a shared connection"""
+
+    def __init__(self, db, lock):
+        self.db = db
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            self.db.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self.lock.release()
+            raise
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.lock.release()
+
+class SQLiteRateState:
+    """Dict-like view of a SQLiteBroker's rate_buckets table, used as RateLimiter state"""
+
+    def __init__(self, db, lock):
+        self.db = db
+        self.lock = lock
+
+    def get(self, domain, default=None):
+        with self.lock:
+            row = self.db.execute("SELECT bucket FROM rate_buckets WHERE domain = ?", (domain,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def __setitem__(self, domain, bucket):
+        with self.lock:
+            self.db.execute("INSERT INTO rate_buckets VALUES (?, ?) ON CONFLICT(domain) DO UPDATE SET "
+                            "bucket = excluded.bucket", (domain, json.dumps(bucket)))
+
+    def items(self):
+        with self.lock:
+            rows = self.db.execute("SELECT domain, bucket FROM rate_buckets").fetchall()
+        return [(domain, json.loads(bucket)) for domain, bucket in rows]
+
+class SQLiteBroker(Broker):
+    """Broker backed by one SQLite file, for workers on the same machine.
+
+    Leasing, completing and failing each run in one immediate transaction,
+    so concurrent workers never take the same task. Pages are leased lowest
+    page number first, so new listings are sized before deep pages are
+    fetched. The rate_buckets table holds the RateLimiter buckets every
+    worker draws from, keeping the whole queue within each site's budget.
+    """
+
+    TASK_COLUMNS = ["id", "company", "source", "start", "end", "page", "url", "last_page", "open_ended", "max_pages",
+                    "attempts", "max_attempts"]
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY,
+            company TEXT NOT NULL,
+            source TEXT NOT NULL,
+            window_start TEXT NOT NULL,
+            window_end TEXT NOT NULL,
+            page INTEGER NOT NULL,
+            url TEXT,
+            last_page INTEGER,
+            open_ended INTEGER NOT NULL DEFAULT 0,
+            max_pages INTEGER,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL,
+            available_at REAL NOT NULL DEFAULT 0,
+            lease_owner TEXT,
+            lease_expires REAL,
+            error TEXT,
+            UNIQUE (company, source, window_start, window_end, page)
+        )""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS tasks_status_page ON tasks (status, page)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS rate_buckets (domain TEXT PRIMARY KEY, bucket TEXT NOT NULL)")
+        self.transaction = SQLiteTransaction(self.db, self.lock)
+
+    def _insert(self, tasks):
+        # Caller holds the transaction
+        before = self.db.total_changes
+        self.db.executemany(
+            """INSERT OR IGNORE INTO tasks (company, source, window_start, window_end, page, url, last_page,
+                                            open_ended, max_pages, max_attempts)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            [(task["company"], task["source"], task["start"], task["end"], task["page"], task.get("url"),
+              task.get("last_page"), int(task.get("open_ended", False)), task.get("max_pages"),
+              task.get("max_attempts", 4)) for task in tasks]
+        )
+        return self.db.total_changes - before
+
+    def enqueue(self, tasks):
+        with self.transaction:
+            return self._insert(tasks)
+
+    def lease(self, worker, visibility_timeout):
+        with self.transaction:
+            now = time.time()
+            self.db.execute("UPDATE tasks SET status = 'failed', error = 'lease expired on the last attempt' "
+                            "WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts", (now,))
+            row = self.db.execute(
+                """SELECT id, company, source, window_start, window_end, page, url, last_page, open_ended, max_pages,
+                          attempts, max_attempts FROM tasks
+                   WHERE (status = 'queued' AND available_at <= ?) OR (status = 'leased' AND lease_expires < ?)
+                   ORDER BY page, id LIMIT 1""", (now, now)).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                            "attempts = attempts + 1 WHERE id = ?", (worker, now + visibility_timeout, row[0]))
+        task = dict(zip(self.TASK_COLUMNS, row))
+        task["attempts"] += 1
+        task["open_ended"] = bool(task["open_ended"])
+        return task
+
+    def _owned(self, task, worker):
+        # Caller holds the transaction
+        row = self.db.execute("SELECT status, lease_owner FROM tasks WHERE id = ?", (task["id"],)).fetchone()
+        return row == ("leased", worker)
+
+    def extend(self, task, worker, visibility_timeout):
+        with self.transaction:
+            if not self._owned(task, worker):
+                return False
+            self.db.execute("UPDATE tasks SET lease_expires = ? WHERE id = ?",
+                            (time.time() + visibility_timeout, task["id"]))
+            return True
+
+    def complete(self, task, worker, spawn=(), cancel_after=None):
+        with self.transaction:
+            if not self._owned(task, worker):
+                return False
+            self.db.execute("UPDATE tasks SET status = 'done', lease_owner = NULL, error = NULL WHERE id = ?",
+                            (task["id"],))
+            if cancel_after is not None:
+                self.db.execute("""UPDATE tasks SET status = 'skipped' WHERE status = 'queued' AND company = ?
+                                   AND source = ? AND window_start = ? AND window_end = ? AND page > ?""",
+                                (task["company"], task["source"], task["start"], task["end"], cancel_after))
+            self._insert(spawn)
+        return True
+
+    def fail(self, task, worker, error, retry_in=None):
+        with self.transaction:
+            if not self._owned(task, worker):
+                return "lost"
+            status = "queued" if retry_in is not None and task["attempts"] < task["max_attempts"] else "failed"
+            self.db.execute("UPDATE tasks SET status = ?, lease_owner = NULL, error = ?, available_at = ? "
+                            "WHERE id = ?", (status, error, time.time() + (retry_in or 0), task["id"]))
+            return status
+
+    def counts(self):
+        with self.lock:
+            return dict(self.db.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+
+    def rate_state(self):
+        return SQLiteRateState(self.db, self.lock), self.transaction
+
+    def close(self):
+        self.db.close()
+
+# Broker implementations by URL scheme; a bare path means sqlite
+BROKERS = {"sqlite": SQLiteBroker}
+
+def open_broker(url):
+    """Open the broker at `url` (scheme://location, or a SQLite file path)"""
+    scheme, sep, location = url.partition("://")
+    if not sep:
+        scheme, location = "sqlite", url
+    if scheme not in BROKERS:
+        raise ValueError(f"❌ Unknown broker '{scheme}'. Choose one of: {', '.join(sorted(BROKERS))}")
+    return BROKERS[scheme](location)
+
+class LeaseKeeper:
+    """`with` block renewing a task's lease in the background while the worker runs it.
+
+    The lease is extended every third of `visibility_timeout`, so a task that
+    takes longer than the timeout (find_first_page probes, retries backing off)
+    isn't handed to another worker. `lost` is set once the broker refuses a
+    renewal.
+    """
+
+    def __init__(self, broker, task, worker, visibility_timeout):
+        self.broker = broker
+        self.task = task
+        self.worker = worker
+        self.visibility_timeout = visibility_timeout
+        self.lost = threading.Event()
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._renew, name=f"lease-{task['id']}", daemon=True)
+
+    def _renew(self):
+        while not self.done.wait(self.visibility_timeout / 3):
+            try:
+                renewed = self.broker.extend(self.task, self.worker, self.visibility_timeout)
+            except Exception as e:
+                print(f"⚠️ Couldn't renew the lease on task {self.task['id']}: {e}")
+                continue
+            if not renewed:
+                self.lost.set()
+                return
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.done.set()
+        self.thread.join()
+
+class TaskFailed(Exception):
+    """A page task that can't succeed by trying again (unknown company, page without reviews)"""
+
+def listing_url(source, company, session, options):
+    """URL of `company`'s review listing on `source` with a {page} placeholder"""
+    if source == "capterra":
+        product = resolve_capterra_product(company, session, options)
+        if not product:
+            raise TaskFailed(f"'{company}' not found on Capterra")
+        return LISTING_URLS["capterra"].format(product_id=product[0], product_slug=product[1], page="{page}")
+    return LISTING_URLS[source].format(company=company, page="{page}")
+
+def run_page_task(task, session, options, store):
+    """Scrape the page of one queue task into `store`.
+
+    Returns (follow-up tasks, page after which the rest of the listing is
+    cancelled or None). The page 1 task resolves the listing, sizes it and
+    queues the fetch plan, jumping straight to the first page that overlaps
+    a historical window like paginate() does; the pages that search already
+    downloaded are stored by this task rather than queued again. Raises
+    TaskFailed when trying again can't help, and any other exception for
+    failures worth a retry.
+    """
+    source, company, page = task["source"], task["company"], task["page"]
+    start_date, end_date = parse_date(task["start"]), parse_date(task["end"])
+    url = task["url"] or listing_url(source, company, session, options)
+
+    parsed = {}
+
+    def probe(number):
+        if number not in parsed:
+            res = fetch_page(session, url.format(page=number), throttle=options.throttle, retry=options.retry,
+                             metrics=options.metrics)
+            if res.status_code == 404:
+                parsed[number] = None
+            elif res.status_code != 200:
+                raise requests.exceptions.HTTPError(f"HTTP {res.status_code} for page {number}")
+            else:
+                parsed[number] = res.text, parse_page(source, res.text, number, start_date, end_date, options.parser,
+                                                      options.restrict_parsing, options.embedded_json,
+                                                      options.metrics)
+        result = parsed[number]
+        return result[1] if result else None
+
+    result = probe(page)
+    if result is None:
+        if page == 1:
+            options.resolutions.forget(source, company)
+            raise TaskFailed(f"no reviews found for '{company}' on {source}")
+        print(f"🛑 {company} on {source}: page {page} is past the end of the listing")
+        return [], page
+    reviews, card_dates = result
+    store.write(source, company, reviews)
+    newest, oldest = page_span(card_dates)
+    print(f"✅ {company} on {source}: page {page}, {len(reviews)} reviews in range")
+
+    follow_up = dict(company=company, source=source, start=task["start"], end=task["end"], url=url,
+                     max_pages=task["max_pages"], max_attempts=task["max_attempts"])
+    if task["url"] is None:
+        # Page 1: confirm the company, size the listing and queue the plan
+        if source != "capterra":
+            options.resolutions.set(source, company, {"slug": company})
+        last_page, total = EXTRACTORS[source].listing_size(parsed[page][0], len(card_dates))
+        first, window_first = 2, 1
+        if oldest and oldest > end_date:
+            print(f"⏩ {company} on {source}: page 1 is entirely newer than {end_date:%Y-%m-%d}, searching")
+            first = window_first = find_first_page(probe, end_date, 1, last_page)
+            if (last_page and first > last_page) or probe(first) is None:
+                print(f"⚠️ {company} on {source}: no review page reaches back to {end_date:%Y-%m-%d}")
+                return [], None
+        elif newest and newest < start_date:
+            return [], page
+        # The page budget counts from the first page that overlaps the window
+        budget_end = window_first + task["max_pages"] - 1 if task["max_pages"] else None
+        # Pages the search already downloaded and parsed are stored here instead of being queued again
+        while first in parsed and (budget_end is None or first <= budget_end):
+            if parsed[first] is None or parsed[first][1] is None:
+                return [], None  # Past the end of the listing
+            found_reviews, found_dates = parsed[first][1]
+            store.write(source, company, found_reviews)
+            print(f"✅ {company} on {source}: page {first}, {len(found_reviews)} reviews in range")
+            found_newest = page_span(found_dates)[0]
+            if found_newest and found_newest < start_date:
+                return [], None
+            first += 1
+        if last_page:
+            end = min(last_page, budget_end or last_page)
+            print(f"🗺️ {company} on {source}: {last_page} pages, queuing pages {first}-{end}" if end >= first
+                  else f"🗺️ {company} on {source}: nothing more to queue")
+            return [dict(follow_up, page=number, last_page=end) for number in range(first, end + 1)], None
+        if budget_end is not None and first > budget_end:
+            return [], None
+        return [dict(follow_up, page=first, last_page=budget_end, open_ended=True)], None
+
+    if newest and newest < start_date:
+        return [], page
+    # Without a known size each page queues the next one
+    if task["open_ended"] and card_dates and (task["last_page"] is None or page < task["last_page"]):
+        return [dict(follow_up, page=page + 1, last_page=task["last_page"], open_ended=True)], None
+    return [], None
+
+# Longest wait before a failed task is tried again
+MAX_TASK_RETRY_DELAY = 600
+
+def enqueue_command(argv):
+    """`enqueue` subcommand: queue scrape jobs as page tasks for `worker`s"""
+    parser = argparse.ArgumentParser(prog="scrapy.py enqueue", description="Queue scrape jobs for workers")
+    parser.add_argument("--broker", default=QUEUE_FILE, help="Queue to add to: a SQLite file or scheme://location")
+    parser.add_argument("--company", help="Company slug used in the review site URL")
+    parser.add_argument("--source", choices=sorted(SCRAPERS) + ["all"], help="Review source, or all")
+    parser.add_argument("--company-for", action="append",
+                        help="Company name on one site when it differs, source=NAME (e.g. trustpilot=slack.com)")
+    parser.add_argument("--start", help="Start date YYYY-MM-DD (default for manifest jobs without one)")
+    parser.add_argument("--end", help="End date YYYY-MM-DD (default for manifest jobs without one)")
+    parser.add_argument("--manifest", help="CSV or JSON file of jobs (company, source, start, end) to queue")
+    parser.add_argument("--max-pages", type=int, help="Fetch at most N pages per listing")
+    parser.add_argument("--max-attempts", type=int, default=4, help="Tries per page before it is marked failed")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.manifest:
+            jobs = load_manifest(args.manifest, args.start, args.end)
+        elif args.company and args.start and args.end and args.source:
+            if parse_date(args.start) > parse_date(args.end):
+                parser.error("start date is later than end date")
+            company_for = parse_per_source(args.company_for, str, "company-for")
+            sources = sorted(SCRAPERS) if args.source == "all" else [args.source]
+            jobs = [dict(company=site_company(args.company, source, company_for, args.source == "all"),
+                         source=source, start=args.start, end=args.end) for source in sources]
+        else:
+            parser.error("--company, --start, --end and --source are required unless --manifest is given")
+    except ValueError as e:
+        parser.error(str(e))
+
+    broker = open_broker(args.broker)
+    try:
+        added = broker.enqueue([dict(job, page=1, max_pages=args.max_pages, max_attempts=args.max_attempts)
+                                for job in jobs])
+        print(f"📥 Queued {added} listings in {args.broker}"
+              + (f" ({len(jobs) - added} were already queued)" if added < len(jobs) else ""))
+        print(f"📊 Tasks: {broker.counts()}")
+    finally:
+        broker.close()
+
+def worker_command(argv):
+    """`worker` subcommand: lease page tasks from a queue and upsert their reviews into a database"""
+    parser = argparse.ArgumentParser(prog="scrapy.py worker", description="Scrape page tasks from a queue")
+    parser.add_argument("--broker", default=QUEUE_FILE, help="Queue to work on: a SQLite file or scheme://location")
+    parser.add_argument("--db", required=True, help="SQLite review database every worker writes to")
+    parser.add_argument("--state-dir", default=STATE_DIR, help="Directory for remembered company lookups")
+    parser.add_argument("--visibility-timeout", type=int, default=300,
+                        help="Seconds a leased task stays hidden from other workers before it is handed out again")
+    parser.add_argument("--poll", type=float, default=5.0, help="Seconds to wait when no task is ready")
+    parser.add_argument("--forever", action="store_true", help="Keep waiting for new tasks once the queue is empty")
+    parser.add_argument("--proxy-file", help="Path to file containing proxy list (one per line)")
+    parser.add_argument("--proxy", help="Single proxy to use (format: http://ip:port or socks5://ip:port)")
+    parser.add_argument("--rate", action="append",
+                        help="Starting request rate per site in requests/minute for the whole queue, N or source=N")
+    parser.add_argument("--parser", action="append", help="HTML parser, for every source or source=NAME")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per request within one task")
+    parser.add_argument("--log-level", choices=["debug", "info", "warning"], default="info",
+                        help="debug also logs every extracted review")
+    args = parser.parse_args(argv)
+    configure_logging(args.log_level)
+
+    proxies, health = load_working_proxies(args.proxy_file, [args.proxy] if args.proxy else None)
+    session, pool = open_session(proxies, health)
+    broker = open_broker(args.broker)
+    # Every worker draws from the buckets kept in the queue, so the sites see one budget for all of them
+    state, lock = broker.rate_state()
+    throttle = RateLimiter(source_rates({'*': 1}, parse_per_source(args.rate, float, "rate")), state, lock)
+    store = ReviewStore(args.db)
+    resolutions = ResolutionCache(os.path.join(args.state_dir, RESOLUTIONS_FILE))
+    metrics = Metrics()
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    parsers = parse_per_source(args.parser, str, "parser")
+    print(f"👷 Worker {worker} taking tasks from {args.broker}")
+
+    tasks = 0
+    try:
+        while True:
+            task = broker.lease(worker, args.visibility_timeout)
+            if task is None:
+                counts = broker.counts()
+                if args.forever or counts.get("queued") or counts.get("leased"):
+                    time.sleep(args.poll)
+                    continue
+                break
+            tasks += 1
+            label = f"{task['company']} on {task['source']} page {task['page']}"
+            options = source_options(task["source"], {'*': 1}, parsers, throttle=throttle, retries=args.retries,
+                                     metrics=metrics, resolutions=resolutions)
+            try:
+                with LeaseKeeper(broker, task, worker, args.visibility_timeout) as lease:
+                    spawn, cancel_after = run_page_task(task, session, options, store)
+            except TaskFailed as e:
+                broker.fail(task, worker, str(e))
+                print(f"❌ {label}: {e}")
+                continue
+            except Exception as e:
+                retry_in = min(MAX_TASK_RETRY_DELAY, 30 * 2 ** (task["attempts"] - 1))
+                status = broker.fail(task, worker, f"{type(e).__name__}: {e}", retry_in)
+                print(f"⚠️ {label} failed ({e}); " + (f"retrying in {retry_in}s" if status == "queued" else
+                                                      f"gave up after {task['attempts']} attempts"))
+                continue
+            if lease.lost.is_set() or not broker.complete(task, worker, spawn, cancel_after):
+                print(f"⚠️ Lease on {label} was lost before it finished; another worker redoes it")
+        print(f"🏁 Queue drained after {tasks} tasks from this worker: {broker.counts()}")
+    finally:
+        print(f"🗄️ Upserted {store.count} reviews into {args.db}")
+        store.close()
+        throttle.report()
+        if pool:
+            pool.report()
+        broker.close()
+        metrics.print_summary()
+
+# Subcommands run as `python scrapy.py <name> ...`; without one the scraper runs as usual
+COMMANDS = {"query": query_command, "stats": stats_command, "enqueue": enqueue_command, "worker": worker_command}
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        COMMANDS[sys.argv[1]](sys.argv[2:])
+        sys.exit(0)
+
     parser = argparse.ArgumentParser(description="Scrape SaaS reviews from G2, Capterra, or Trustpilot")
-    parser.add_argument("--company", required=True, help="Company slug used in the review site URL")
-    parser.add_argument("--start", required=True, help="Start date YYYY-MM-DD")
-    parser.add_argument("--end", required=True, help="End date YYYY-MM-DD")
-    parser.add_argument("--source", required=True, choices=["g2", "capterra", "trustpilot"], help="Review source")
+    parser.add_argument("--company", help="Company slug used in the review site URL")
+    parser.add_argument("--start", help="Start date YYYY-MM-DD (default for manifest jobs without one)")
+    parser.add_argument("--end", help="End date YYYY-MM-DD (default for manifest jobs without one)")
+    parser.add_argument("--source", choices=["g2", "capterra", "trustpilot", "all"],
+                        help="Review source, or all to scrape every source at the same time")
+    parser.add_argument("--company-for", action="append",
+                        help="Company name on one site when it differs, source=NAME (e.g. trustpilot=slack.com); "
+                             "with --source all, Trustpilot defaults to COMPANY.com")
+    parser.add_argument("--manifest",
+                        help="CSV or JSON file of jobs (company, source, start, end) to run instead of one company")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes running manifest jobs")
+    parser.add_argument("--summary-file", default="batch_summary.json",
+                        help="Where the per-job status and timing of a manifest run are written")
     parser.add_argument("--proxy-file", help="Path to file containing proxy list (one per line)")
     parser.add_argument("--proxy", help="Single proxy to use (format: http://ip:port or socks5://ip:port)")
+    parser.add_argument("--proxy-check-url", default=PROXY_CHECK_URL,
+                        help="URL used to health-check proxies (point it at a local stand-in if needed)")
+    parser.add_argument("--proxy-check-workers", type=int, default=20, help="Proxies health-checked in parallel")
+    parser.add_argument("--proxy-health-cache", default=PROXY_HEALTH_CACHE,
+                        help="File where proxy health results are cached between runs")
+    parser.add_argument("--proxy-health-ttl", type=int, default=3600,
+                        help="Seconds a cached proxy check stays valid (0 re-checks every proxy)")
+    parser.add_argument("--proxy-cooldown", type=int, default=300,
+                        help="Seconds a proxy is rested after repeated blocks or errors")
+    parser.add_argument("--cache", action="store_true", help="Cache fetched pages on disk and revalidate them")
+    parser.add_argument("--cache-dir", default=HTTP_CACHE_DIR, help="Directory for the response cache")
+    parser.add_argument("--cache-ttl", type=int, default=3600,
+                        help="Seconds a cached page is served without revalidation")
+    parser.add_argument("--cache-max-mb", type=int, default=200,
+                        help="Cache size limit; least recently used pages are evicted first")
+    parser.add_argument("--offline", action="store_true",
+                        help="Serve pages only from the cache, never from the network")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only collect reviews newer than those collected by earlier incremental runs")
+    parser.add_argument("--state-dir", default=STATE_DIR, help="Directory for watermarks and resume checkpoints")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Start from scratch even if an earlier run of this window was interrupted")
+    parser.add_argument("--parser", action="append",
+                        help="HTML parser per source: auto, html.parser, lxml or selectolax, "
+                             "for every source or source=NAME (e.g. trustpilot=selectolax)")
+    parser.add_argument("--full-parse", action="store_true",
+                        help="Build the whole page DOM instead of only the review cards")
+    parser.add_argument("--no-embedded-json", action="store_true",
+                        help="Always extract Trustpilot reviews from the page DOM, ignoring the embedded JSON")
+    parser.add_argument("--stream", action="store_true",
+                        help="Parse review pages while they download and stop downloading once the reviews end")
+    parser.add_argument("--parse-workers", type=int, default=0,
+                        help="Parse pages in N worker processes while the next ones download (default: parse in "
+                             "the scraping thread)")
+    parser.add_argument("--format", choices=["json", "jsonl"] + list(COLUMNAR_FORMATS), default="json",
+                        help="Write a pretty JSON file at the end of the run, keep the streamed JSONL file, or write "
+                             "typed columns to Parquet or Arrow")
+    parser.add_argument("--compress", choices=["gzip", "zstd"], help="Compress the JSONL output")
+    parser.add_argument("--fsync-every", type=int, default=1, help="Flush output to disk every N pages")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="Skip reviews that earlier runs already wrote (fingerprints kept in the state directory)")
+    parser.add_argument("--db", help="Also upsert every review into this SQLite database (see the query command)")
+    parser.add_argument("--log-level", choices=["debug", "info", "warning"], default="info",
+                        help="debug also logs every extracted review")
+    parser.add_argument("--metrics-file", help="Write a JSON run report with request, sleep and parse timings")
+    parser.add_argument("--prometheus-file", help="Write the run's metrics in Prometheus text format")
+    parser.add_argument("--concurrency", action="append",
+                        help="Pages fetched in parallel per host: N for every source or source=N (e.g. g2=2,trustpilot=4)")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="Retries per request for timeouts, 429 and 5xx answers (and 403s through another proxy)")
+    parser.add_argument("--retry-budget", type=int, default=30,
+                        help="Most retries a run (or each manifest job) may spend in total")
+    parser.add_argument("--max-pages", type=int,
+                        help="Fetch at most N pages per listing, counted from the first page in the date range "
+                             "(default: every page the listing has)")
+    parser.add_argument("--rate", action="append",
+                        help="Starting request rate per site in requests/minute, N or source=N; it is then adjusted "
+                             "to how the site responds (default: about 11 per minute per concurrent page)")
 
     args = parser.parse_args()
+    if not args.manifest and not (args.company and args.start and args.end and args.source):
+        parser.error("--company, --start, --end and --source are required unless --manifest is given")
+    if args.manifest and args.company_for:
+        parser.error("--company-for can't be used with --manifest: give every site's company name its own row")
+    if args.format in COLUMNAR_FORMATS and pyarrow is None:
+        parser.error(f"--format {args.format} needs the 'pyarrow' package (pip install pyarrow)")
     
     proxy_list = None
     if args.proxy:
         proxy_list = [args.proxy]
-    
-    main(args.company, args.start, args.end, args.source, args.proxy_file, proxy_list)
\ No newline at end of file
+
+    settings = dict(
+        concurrency=parse_per_source(args.concurrency),
+        rate=parse_per_source(args.rate, float, "rate"),
+        retries=args.retries,
+        retry_budget=args.retry_budget,
+        max_pages=args.max_pages,
+        parser=parse_per_source(args.parser, str, "parser"),
+        restrict_parsing=not args.full_parse,
+        embedded_json=not args.no_embedded_json,
+        stream=args.stream,
+        parse_workers=args.parse_workers,
+        proxy_cooldown=args.proxy_cooldown,
+        cache=args.cache,
+        cache_dir=args.cache_dir,
+        cache_ttl=args.cache_ttl,
+        cache_max_mb=args.cache_max_mb,
+        offline=args.offline,
+        incremental=args.incremental,
+        state_dir=args.state_dir,
+        resume=not args.no_resume,
+        output_format=args.format,
+        compress=args.compress,
+        fsync_every=args.fsync_every,
+        dedupe=args.dedupe,
+        db=args.db,
+        log_level=args.log_level,
+        metrics_file=args.metrics_file,
+        prometheus_file=args.prometheus_file
+    )
+    proxy_settings = dict(
+        proxy_file=args.proxy_file,
+        proxy_list=proxy_list,
+        proxy_check_url=args.proxy_check_url,
+        proxy_check_workers=args.proxy_check_workers,
+        proxy_health_cache=args.proxy_health_cache,
+        proxy_health_ttl=args.proxy_health_ttl
+    )
+
+    if args.manifest:
+        run_manifest(args.manifest, args.start, args.end, args.workers, args.summary_file,
+                     **proxy_settings, **settings)
+    else:
+        main(args.company, args.start, args.end, args.source, **proxy_settings, **settings,
+             company_for=parse_per_source(args.company_for, str, "company-for"))
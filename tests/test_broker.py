@@ -0,0 +1,158 @@
+"""SQLiteBroker leases, retries and the rate buckets its workers share"""
+import time
+
+import pytest
+
+import scrapy
+
+def page_task(page=1, max_attempts=3):
+    return dict(company="slack", source="g2", start="2025-01-01", end="2025-12-31", page=page,
+                max_attempts=max_attempts)
+
+@pytest.fixture
+def queue_file(tmp_path):
+    return str(tmp_path / "queue.sqlite3")
+
+@pytest.fixture
+def broker(queue_file):
+    broker = scrapy.SQLiteBroker(queue_file)
+    yield broker
+    broker.close()
+
+def test_enqueue_ignores_duplicates(broker):
+    assert broker.enqueue([page_task(1), page_task(2)]) == 2
+    assert broker.enqueue([page_task(1), page_task(3)]) == 1
+    assert broker.counts() == {"queued": 3}
+
+def test_leases_lowest_page_first(broker):
+    broker.enqueue([page_task(3), page_task(1), page_task(2)])
+    assert [broker.lease("w", 60)["page"] for _ in range(3)] == [1, 2, 3]
+    assert broker.lease("w", 60) is None
+
+def test_expired_lease_is_redelivered(broker):
+    broker.enqueue([page_task()])
+    first = broker.lease("w1", 0.05)
+    assert first["attempts"] == 1
+    assert broker.lease("w2", 60) is None  # Still leased to w1
+    time.sleep(0.1)
+
+    again = broker.lease("w2", 60)
+    assert again["id"] == first["id"]
+    assert again["attempts"] == 2
+    # w1 lost the task: its late answers are refused, w2's count
+    assert not broker.complete(first, "w1")
+    assert broker.fail(first, "w1", "late", retry_in=0) == "lost"
+    assert not broker.extend(first, "w1", 60)
+    assert broker.complete(again, "w2")
+    assert broker.counts() == {"done": 1}
+
+def test_extended_lease_is_not_redelivered(broker):
+    broker.enqueue([page_task()])
+    task = broker.lease("w1", 0.05)
+    assert broker.extend(task, "w1", 60)
+    time.sleep(0.1)
+    assert broker.lease("w2", 60) is None
+
+def test_failed_task_is_retried_until_max_attempts(broker):
+    broker.enqueue([page_task(max_attempts=3)])
+    for attempt in (1, 2):
+        task = broker.lease("w", 60)
+        assert task["attempts"] == attempt
+        assert broker.fail(task, "w", "HTTP 503", retry_in=0) == "queued"
+    task = broker.lease("w", 60)
+    assert task["attempts"] == 3
+    assert broker.fail(task, "w", "HTTP 503", retry_in=0) == "failed"
+    assert broker.lease("w", 60) is None
+    assert broker.counts() == {"failed": 1}
+
+def test_retry_waits_for_its_delay(broker):
+    broker.enqueue([page_task()])
+    broker.fail(broker.lease("w", 60), "w", "HTTP 503", retry_in=60)
+    assert broker.lease("w", 60) is None
+    assert broker.counts() == {"queued": 1}
+
+def test_permanent_failure_is_not_retried(broker):
+    broker.enqueue([page_task()])
+    assert broker.fail(broker.lease("w", 60), "w", "no reviews") == "failed"
+    assert broker.lease("w", 60) is None
+
+def test_expired_lease_on_the_last_attempt_dead_letters(broker):
+    broker.enqueue([page_task(max_attempts=1)])
+    broker.lease("w1", 0.05)
+    time.sleep(0.1)
+    assert broker.lease("w2", 60) is None
+    assert broker.counts() == {"failed": 1}
+    error = broker.db.execute("SELECT error FROM tasks").fetchone()[0]
+    assert "lease expired" in error
+
+def test_complete_spawns_and_cancels(broker):
+    broker.enqueue([page_task(1), page_task(5)])
+    task = broker.lease("w", 60)
+    # Pages already queued past the cancel point are skipped; the spawned ones are queued
+    assert broker.complete(task, "w", spawn=[page_task(2), page_task(3)], cancel_after=2)
+    assert broker.counts() == {"done": 1, "queued": 2, "skipped": 1}
+    assert [broker.lease("w", 60)["page"] for _ in range(2)] == [2, 3]
+
+def test_workers_share_rate_buckets(queue_file, monkeypatch):
+    slept = []
+    monkeypatch.setattr(scrapy.time, "sleep", slept.append)
+    monkeypatch.setattr(scrapy.random, "uniform", lambda low, high: 1.0)
+    url = "https://www.g2.com/products/slack/reviews?page=1"
+    rates = {"www.g2.com": 0.5}
+
+    brokers = [scrapy.SQLiteBroker(queue_file), scrapy.SQLiteBroker(queue_file)]
+    try:
+        first, second = (scrapy.RateLimiter(rates, *broker.rate_state()) for broker in brokers)
+        first.wait(url)  # Takes the one token the bucket starts with
+        assert slept == []
+        second.wait(url)  # A separate worker, but the same bucket: it has to wait for the refill
+        assert slept and slept[0] == pytest.approx(2.0, abs=0.1)
+        assert second.state.get("www.g2.com")["tokens"] < 0
+        first.feedback(url, 200)
+        assert second.state.get("www.g2.com")["requests"] == 1
+    finally:
+        for broker in brokers:
+            broker.close()
+
+def test_incomplete_broker_fails_when_created():
+    class NoRateState(scrapy.Broker):
+        def enqueue(self, tasks): pass
+        def lease(self, worker, visibility_timeout): pass
+        def extend(self, task, worker, visibility_timeout): pass
+        def complete(self, task, worker, spawn=(), cancel_after=None): pass
+        def fail(self, task, worker, error, retry_in=None): pass
+        def counts(self): pass
+
+    with pytest.raises(TypeError, match="rate_state"):
+        NoRateState()
+
+def test_worker_keeps_its_lease_while_a_task_outlasts_the_timeout(queue_file, tmp_path, monkeypatch, capsys):
+    scrapy.SQLiteBroker(queue_file).enqueue([page_task()])
+    leased_by_others = []
+
+    def slow_task(task, session, options, store):
+        other = scrapy.SQLiteBroker(queue_file)
+        try:
+            for _ in range(5):  # 2.5 s against a 1 s visibility timeout
+                time.sleep(0.5)
+                leased_by_others.append(other.lease("other", 60))
+        finally:
+            other.close()
+        return [], None
+
+    monkeypatch.setattr(scrapy, "run_page_task", slow_task)
+    scrapy.worker_command(["--broker", queue_file, "--db", str(tmp_path / "reviews.sqlite3"),
+                           "--state-dir", str(tmp_path), "--visibility-timeout", "1", "--poll", "0.1"])
+
+    assert leased_by_others == [None] * 5
+    assert "was lost" not in capsys.readouterr().out
+    assert scrapy.SQLiteBroker(queue_file).counts() == {"done": 1}
+
+def test_lease_keeper_reports_a_lost_lease(broker):
+    broker.enqueue([page_task()])
+    task = broker.lease("w1", 60)
+    with scrapy.LeaseKeeper(broker, task, "w2", 0.15) as lease:
+        assert lease.lost.wait(1)
+    with scrapy.LeaseKeeper(broker, task, "w1", 0.15) as lease:
+        time.sleep(0.2)
+    assert not lease.lost.is_set()
@@ -0,0 +1,92 @@
+"""CachedSession: freshness, revalidation, offline mode, index saves and LRU eviction"""
+import json
+import os
+
+import requests
+
+import scrapy
+
+def response(url, status=200, body=b"", headers=None):
+    res = requests.Response()
+    res.status_code = status
+    res._content = body
+    res.headers.update(headers or {})
+    res.url = url
+    return res
+
+class FakeSession:
+    """Serves `pages` (url -> body); answers 304 when the request's ETag matches the page's"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append((url, dict(headers or {})))
+        body = self.pages[url]
+        etag = f'"{len(body)}"'
+        if (headers or {}).get("If-None-Match") == etag:
+            return response(url, 304)
+        return response(url, 200, body, {"ETag": etag, "Content-Type": "text/html"})
+
+def url(page):
+    return f"https://www.g2.com/products/slack/reviews?page={page}"
+
+def test_fresh_entry_is_served_from_disk(tmp_path):
+    session = FakeSession({url(1): b"<html>one</html>"})
+    cache = scrapy.CachedSession(session, str(tmp_path))
+    assert cache.get(url(1)).content == b"<html>one</html>"
+    again = cache.get(url(1))
+    assert again.content == b"<html>one</html>" and again.from_cache
+    assert len(session.requests) == 1 and (cache.hits, cache.misses) == (1, 1)
+
+def test_stale_entry_is_revalidated(tmp_path):
+    session = FakeSession({url(1): b"<html>one</html>"})
+    cache = scrapy.CachedSession(session, str(tmp_path), ttl=0)
+    cache.get(url(1))
+    again = cache.get(url(1))
+    assert session.requests[1][1]["If-None-Match"] == '"16"'
+    assert again.status_code == 200 and again.content == b"<html>one</html>"
+    assert cache.revalidated == 1
+
+def test_offline_mode_never_touches_the_network(tmp_path):
+    cache = scrapy.CachedSession(FakeSession({url(1): b"one"}), str(tmp_path))
+    cache.get(url(1))
+    cache.close()
+
+    session = FakeSession({})
+    offline = scrapy.CachedSession(session, str(tmp_path), ttl=0, offline=True)
+    assert offline.get(url(1)).content == b"one"
+    assert offline.get(url(2)).status_code == 504
+    assert session.requests == []
+
+def test_index_is_saved_in_batches_and_on_close(tmp_path, monkeypatch):
+    saves = []
+    save_json_file = scrapy.save_json_file
+    monkeypatch.setattr(scrapy, "save_json_file", lambda filename, data: (saves.append(len(data)),
+                                                                          save_json_file(filename, data)))
+    pages = {url(page): f"page {page}".encode() for page in range(1, 61)}
+    cache = scrapy.CachedSession(FakeSession(pages), str(tmp_path))
+    for page in range(1, 61):
+        cache.get(url(page))
+    assert saves == [scrapy.CachedSession.INDEX_SAVE_EVERY]
+    cache.close()
+    assert saves == [50, 60]
+    with open(os.path.join(str(tmp_path), "index.json")) as f:
+        assert len(json.load(f)) == 60
+
+def test_eviction_drops_least_recently_used_and_keeps_shared_bodies(tmp_path):
+    shared = b"x" * 100
+    pages = {url(1): shared, url(2): shared, url(3): b"y" * 100, url(4): b"z" * 100}
+    cache = scrapy.CachedSession(FakeSession(pages), str(tmp_path), max_bytes=250)
+    for page in (1, 2, 3):
+        cache.get(url(page))
+    cache.index[url(1)]["last_used"] = cache.index[url(3)]["last_used"] = 0
+    cache.get(url(4))
+    cache.flush()
+
+    # Evicting page 1 frees nothing (page 2 shares its body), so page 3 goes too
+    assert sorted(cache.index) == [url(2), url(4)]
+    assert os.path.exists(cache._body_path(cache.index[url(2)]["body"]))
+    assert not any(name.startswith(scrapy.hashlib.sha256(b"y" * 100).hexdigest())
+                   for _, _, files in os.walk(str(tmp_path)) for name in files)
@@ -0,0 +1,76 @@
+"""CardStream / parse_stream: streamed cards must match the whole-page parse, however the body is split"""
+import gzip
+import os
+import random
+from datetime import datetime
+
+import pytest
+
+import scrapy
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+WINDOW = (datetime(1900, 1, 1), datetime(2100, 1, 1))
+
+def load_page(site, page):
+    with gzip.open(os.path.join(FIXTURES_DIR, site, f"page-{page}.html.gz"), "rt", encoding="utf-8") as f:
+        return f.read()
+
+def fixed_chunks(html, size):
+    return (html[i:i + size] for i in range(0, len(html), size))
+
+def random_chunks(html, seed):
+    rng = random.Random(seed)
+    i = 0
+    while i < len(html):
+        size = rng.choice([1, 2, 5, 17, 300, 4096])
+        yield html[i:i + size]
+        i += size
+
+def records(result):
+    reviews, card_dates = result
+    return [review.to_dict() for review in reviews], card_dates
+
+@pytest.mark.parametrize("site", ["g2", "capterra", "trustpilot"])
+@pytest.mark.parametrize("page", [1, 2])
+def test_same_cards_as_the_full_parse(site, page):
+    html = load_page(site, page)
+    expected = records(scrapy.parse_page(site, html, page, *WINDOW, "html.parser", True, False))
+    extractor = scrapy.EXTRACTORS[site]
+    for chunks in [fixed_chunks(html, len(html)), fixed_chunks(html, 16 * 1024), fixed_chunks(html, 97),
+                   random_chunks(html, page)]:
+        assert records(extractor.parse_stream(chunks, page, *WINDOW)) == expected
+
+def test_stops_reading_once_the_review_list_ends():
+    html = load_page("trustpilot", 1)
+    footer = "<footer>" + "<p>filler</p>" * 20000 + "</footer>"
+    body = html.replace("</main>", "</main>" + footer, 1) if "</main>" in html else html + footer
+    served = []
+
+    def chunks():
+        for chunk in fixed_chunks(body, 1024):
+            served.append(len(chunk))
+            yield chunk
+
+    result = scrapy.EXTRACTORS["trustpilot"].parse_stream(chunks(), 1, *WINDOW)
+    expected = scrapy.parse_page("trustpilot", html, 1, *WINDOW, "html.parser", True, False)
+    assert records(result) == records(expected)
+    assert sum(served) < len(body) - len(footer)
+
+def test_keeps_comments_stray_end_tags_and_entities_inside_cards():
+    card = ('<div class="review-card"><time datetime="2025-05-01">May 1</time>'
+            '<h3 class="review-title">Fast &amp; <b>reliable</b></span></h3>'
+            '<div class="review-body">4<!-- -->2 reviews &lt;3<br></div>'
+            '<div class="reviewer-name">Ann</div><img class="stars" data-rating="5"></div>')
+    html = f"<html><body><section class='reviews'>{card}{card.replace('Ann', 'Bob')}</section><p>end</p></body></html>"
+    expected = records(scrapy.parse_page("g2", html, 1, *WINDOW, "html.parser", True, False))
+    assert [record["reviewer_name"] for record in expected[0]] == ["Ann", "Bob"]
+    for size in (1, 3, 10, len(html)):
+        assert records(scrapy.EXTRACTORS["g2"].parse_stream(fixed_chunks(html, size), 1, *WINDOW)) == expected
+
+def test_card_left_open_at_the_end_of_the_body():
+    stream = scrapy.CardStream(scrapy.EXTRACTORS["g2"].strainer)
+    stream.feed('<div><div class="review-card"><time datetime="2025-05-01">x</time>')
+    assert not stream.cards
+    stream.close()
+    assert len(stream.cards) == 1
+    assert stream.cards[0][0].startswith('<div class="review-card">')
@@ -0,0 +1,70 @@
+"""Review fingerprints, and dropping repeated reviews within a run and (with SeenReviews) across runs"""
+import contextlib
+import io
+from datetime import date, datetime
+
+import pytest
+
+import scrapy
+
+def review(i, text="Body", source="G2"):
+    return scrapy.Review(f"Title {i}", text, date(2025, 5, 1 + i), f"Reviewer {i}", 4, source)
+
+def test_fingerprint_depends_on_identity_not_rating():
+    assert scrapy.review_fingerprint(review(1)) == scrapy.review_fingerprint(review(1))
+    same_but_rating = review(1)
+    same_but_rating.rating = 2
+    assert scrapy.review_fingerprint(same_but_rating) == scrapy.review_fingerprint(review(1))
+    assert scrapy.review_fingerprint(review(1, text="Edited")) != scrapy.review_fingerprint(review(1))
+    assert scrapy.review_fingerprint(review(1, source="Capterra")) != scrapy.review_fingerprint(review(1))
+    assert len(scrapy.review_fingerprint(review(1))) == 32
+
+def test_seen_reviews_persist_per_company(tmp_path):
+    path = str(tmp_path / "seen.sqlite3")
+    seen = scrapy.SeenReviews(path)
+    assert seen.unseen([review(1), review(2)], "slack") == [review(1), review(2)]
+    seen.add([review(1)], "slack")
+    seen.add([review(1)], "slack")  # Adding twice is harmless
+    seen.close()
+
+    reopened = scrapy.SeenReviews(path)
+    assert reopened.unseen([review(1), review(2)], "slack") == [review(2)]
+    assert reopened.unseen([review(1)], "zoom") == [review(1)]
+    reopened.close()
+
+@pytest.fixture
+def job(tmp_path, monkeypatch):
+    """Run scrape_job for slack on g2 with a fake scraper serving `pages` (lists of reviews)"""
+    monkeypatch.chdir(tmp_path)
+
+    def run(pages, seen=None):
+        def fake_scraper(company, start_date, end_date, session, options):
+            for number, page_reviews in enumerate(pages, 1):
+                options.on_page(number, page_reviews)
+
+        monkeypatch.setitem(scrapy.SCRAPERS, "g2", fake_scraper)
+        state = scrapy.StateStore(str(tmp_path / "state"))
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            written, output, _ = scrapy.scrape_job("slack", "g2", datetime(2025, 1, 1), datetime(2025, 12, 31),
+                                                   None, scrapy.ScrapeOptions(), state, resume=False,
+                                                   output_format="jsonl", seen=seen)
+        titles = [record["title"] for record in scrapy.read_jsonl(output)] if output else []
+        return written, titles, out.getvalue()
+
+    return run
+
+def test_review_repeated_on_the_next_page_is_written_once(job):
+    # A new review pushed review 2 from page 1 onto page 2
+    written, titles, out = job([[review(1), review(2)], [review(2), review(3)]])
+    assert written == 3 and titles == ["Title 1", "Title 2", "Title 3"]
+    assert "Dropped 1 reviews repeated across pages" in out
+
+def test_reviews_written_by_an_earlier_run_are_skipped(job, tmp_path):
+    seen = scrapy.SeenReviews(str(tmp_path / "seen.sqlite3"))
+    assert job([[review(1), review(2)]], seen)[:2] == (2, ["Title 1", "Title 2"])
+    written, titles, out = job([[review(0), review(1)], [review(2)]], seen)
+    assert written == 1 and titles == ["Title 0"]
+    assert "2 already written by earlier runs" in out
+    written, _, out = job([[review(0), review(1), review(2)]], seen)
+    assert written == 0 and "No new reviews" in out
+    seen.close()
@@ -0,0 +1,83 @@
+"""Trustpilot reviews read from the embedded __NEXT_DATA__ JSON, and the fallback to the DOM cards"""
+import json
+from datetime import date, datetime
+
+import scrapy
+
+WINDOW = (datetime(1900, 1, 1), datetime(2100, 1, 1))
+
+CARD = '''<article data-service-review-card-paper="true">
+  <aside><span data-consumer-name-typography="true">Ana P.</span>
+    <span data-consumer-country-typography="true">PT</span>
+    <span data-consumer-reviews-count-typography="true">1<!-- --> <!-- -->review</span></aside>
+  <section><img class="CDS_StarRating_starRating__614d2e" alt="Rated 2 out of 5 stars" src="stars-2.svg"/>
+    <time datetime="2025-03-04T10:15:00.000Z">Mar 4, 2025</time>
+    <h2 data-service-review-title-typography="true">Slow support</h2>
+    <p data-service-review-text-typography="true">Waited a week.<br/>Then nothing.</p>
+    <div data-testid="review-badge-date"><span class="CDS_Badge_badgeText__9995a1">February 28, 2025</span></div>
+    <div data-testid="review-badge-unprompted"><span>Unprompted review</span></div>
+  </section>
+</article>'''
+
+ITEM = {
+    "title": "Slow support",
+    "text": "Waited a week.\nThen nothing.",
+    "rating": 2,
+    "labels": {"verification": {"reviewSourceName": "Organic"}},
+    "dates": {"publishedDate": "2025-03-04T10:15:00.000Z", "experiencedDate": "2025-02-28T00:00:00.000Z"},
+    "consumer": {"displayName": "Ana P.", "numberOfReviews": 1, "countryCode": "PT"}
+}
+
+def page(cards=CARD, payload=None):
+    script = ""
+    if payload is not None:
+        script = f'<script id="__NEXT_DATA__" type="application/json">{payload}</script>'
+    return f"<html><body><main><section>{cards}</section></main>{script}</body></html>"
+
+def records(html, embedded_json=True):
+    reviews, card_dates = scrapy.parse_page("trustpilot", html, 1, *WINDOW, "html.parser", True, embedded_json)
+    return [review.to_dict() for review in reviews], card_dates
+
+def next_data(items):
+    return json.dumps({"props": {"pageProps": {"reviews": items}}})
+
+def test_embedded_record_matches_the_dom_card():
+    html = page(payload=next_data([ITEM]))
+    embedded, embedded_dates = records(html)
+    dom, dom_dates = records(html, embedded_json=False)
+    assert embedded == dom
+    assert embedded_dates == dom_dates == [datetime(2025, 3, 4)]
+    assert embedded[0] == {
+        "title": "Slow support",
+        "description": "Waited a week.Then nothing.",
+        "date": "2025-03-04",
+        "reviewer_name": "Ana P.",
+        "rating": 2,
+        "source": "Trustpilot",
+        "country": "PT",
+        "reviewer_total_reviews": "1review",
+        "experience_date": "February 28, 2025",
+        "is_unprompted": True
+    }
+
+def test_embedded_json_is_used_without_any_cards():
+    embedded, _ = records(page(cards="", payload=next_data([ITEM, dict(ITEM, rating=5)])))
+    assert [record["rating"] for record in embedded] == [2, 5]
+
+def test_missing_fields_get_the_dom_defaults():
+    item = {"dates": {"publishedDate": "2025-03-04T10:15:00.000Z"}, "rating": 4}
+    [(review_date, review)] = scrapy.trustpilot_embedded_reviews(page(cards="", payload=next_data([item])))
+    assert review_date == datetime(2025, 3, 4) and review.date == date(2025, 3, 4)
+    assert (review.reviewer_total_reviews, review.experience_date, review.country) == ("", "", "")
+    assert review.is_unprompted is False
+
+def test_items_without_a_date_are_skipped():
+    items = [dict(ITEM, dates={}), ITEM]
+    assert len(scrapy.trustpilot_embedded_reviews(page(payload=next_data(items)))) == 1
+
+def test_falls_back_to_the_dom_without_a_usable_payload():
+    dom = records(page(), embedded_json=False)
+    unusable = [None, "{not json", json.dumps({"props": {}}), json.dumps({"props": {"pageProps": {"reviews": {}}}})]
+    for payload in unusable:
+        assert scrapy.trustpilot_embedded_reviews(page(payload=payload)) is None
+        assert records(page(payload=payload)) == dom
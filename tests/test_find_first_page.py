@@ -0,0 +1,89 @@
+"""find_first_page's gallop + bisect against a plain linear scan of the listing"""
+from datetime import datetime, timedelta
+
+import pytest
+
+import scrapy
+
+NEWEST = datetime(2025, 9, 30)
+
+def make_listing(pages, per_page=10, step_days=1):
+    """Page number -> (reviews, card dates), newest first like the real listings"""
+    listing = {}
+    for page in range(1, pages + 1):
+        first = (page - 1) * per_page
+        listing[page] = ([], [NEWEST - timedelta(days=(first + i) * step_days) for i in range(per_page)])
+    return listing
+
+def make_probe(listing, probed):
+    def probe(page):
+        probed.append(page)
+        return listing.get(page)
+    return probe
+
+def linear_first_page(listing, end_date, newer_page, last_page):
+    page = newer_page + 1
+    while True:
+        if last_page is not None and page > last_page:
+            return last_page + 1
+        result = listing.get(page)
+        if result is None or min(result[1]) <= end_date:
+            return page
+        page += 1
+
+def end_dates(listing):
+    """Boundary end dates: each page's oldest card, just before it, and before the whole listing"""
+    dates = []
+    for _, card_dates in listing.values():
+        dates += [min(card_dates), min(card_dates) - timedelta(hours=1), max(card_dates)]
+    oldest = min(min(card_dates) for _, card_dates in listing.values())
+    return dates + [oldest - timedelta(days=365)]
+
+@pytest.mark.parametrize("pages", [2, 3, 5, 8, 17, 40])
+@pytest.mark.parametrize("known_size", [True, False])
+def test_matches_linear_scan(pages, known_size):
+    listing = make_listing(pages)
+    last_page = pages if known_size else None
+    for end_date in end_dates(listing):
+        if min(listing[1][1]) <= end_date:
+            continue  # find_first_page is only used once page 1 is entirely newer than end_date
+        probed = []
+        found = scrapy.find_first_page(make_probe(listing, probed), end_date, 1, last_page)
+        assert found == linear_first_page(listing, end_date, 1, last_page), end_date
+        if known_size:
+            assert all(page <= pages for page in probed)
+
+def test_first_page_after_the_newer_one():
+    listing = make_listing(10)
+    end_date = min(listing[2][1])
+    assert scrapy.find_first_page(make_probe(listing, []), end_date, 1, 10) == 2
+
+def test_last_page():
+    listing = make_listing(10)
+    end_date = min(listing[10][1])
+    assert scrapy.find_first_page(make_probe(listing, []), end_date, 1, 10) == 10
+    assert scrapy.find_first_page(make_probe(listing, []), end_date, 1) == 10
+
+def test_no_page_reaches_back():
+    listing = make_listing(10)
+    end_date = NEWEST - timedelta(days=1000)
+    # With a known size nothing past the last page is requested
+    probed = []
+    assert scrapy.find_first_page(make_probe(listing, probed), end_date, 1, 10) == 11
+    assert max(probed) == 10
+    # Without one, the first page past the end of the listing is returned
+    assert scrapy.find_first_page(make_probe(listing, []), end_date, 1) == 11
+
+def test_starts_from_a_later_newer_page():
+    listing = make_listing(30)
+    end_date = min(listing[23][1])
+    probed = []
+    assert scrapy.find_first_page(make_probe(listing, probed), end_date, 12, 30) == 23
+    assert min(probed) > 12
+
+def test_probes_logarithmically():
+    listing = make_listing(1000)
+    end_date = min(listing[700][1])
+    probed = []
+    assert scrapy.find_first_page(make_probe(listing, probed), end_date, 1, 1000) == 700
+    assert len(probed) <= 2 * 10 + 2
@@ -0,0 +1,64 @@
+"""JsonlSink: one page at a time, resumable from the offset of the last page written"""
+import gzip
+from datetime import date
+
+import pytest
+
+import scrapy
+
+def page_of(first, count=3):
+    return [scrapy.Review(f"title {i}", f"text {i}", date(2025, 1, 1 + i), f"reviewer {i}", 4, "G2")
+            for i in range(first, first + count)]
+
+def titles(filename):
+    return [record["title"] for record in scrapy.read_jsonl(filename)]
+
+@pytest.mark.parametrize("compression", [
+    None,
+    "gzip",
+    pytest.param("zstd", marks=pytest.mark.skipif(scrapy.zstandard is None, reason="zstandard is not installed"))
+])
+def test_resume_truncates_what_came_after_the_last_page(tmp_path, compression):
+    filename = str(tmp_path / f"reviews{scrapy.jsonl_extension(compression)}")
+    sink = scrapy.JsonlSink(filename, compression)
+    sink.write(page_of(0))
+    sink.write(page_of(3))
+    checkpoint = sink.offset
+    sink.write(page_of(6))  # Written, but the run dies before checkpointing it
+    sink.close()
+    with open(filename, "ab") as f:
+        f.write(b'{"title": "half a li')  # ...in the middle of the next page
+
+    resumed = scrapy.JsonlSink(filename, compression, offset=checkpoint)
+    resumed.write(page_of(6))
+    resumed.close()
+    assert titles(filename) == [f"title {i}" for i in range(9)]
+
+def test_every_page_is_its_own_gzip_member(tmp_path):
+    filename = str(tmp_path / "reviews.jsonl.gz")
+    sink = scrapy.JsonlSink(filename, "gzip")
+    sink.write(page_of(0))
+    first_page = sink.offset
+    sink.write(page_of(3))
+    sink.close()
+    with open(filename, "rb") as f:
+        head = f.read(first_page)
+    assert gzip.decompress(head).decode().count("\n") == 3
+
+def test_nothing_written_leaves_an_earlier_file_alone(tmp_path):
+    filename = tmp_path / "reviews.jsonl"
+    filename.write_text('{"title": "from an earlier run"}\n')
+    sink = scrapy.JsonlSink(str(filename))
+    sink.write([])
+    sink.close()
+    assert titles(str(filename)) == ["from an earlier run"]
+    assert sink.pages == 1 and sink.count == 0
+
+def test_offset_follows_each_page(tmp_path):
+    filename = tmp_path / "reviews.jsonl"
+    sink = scrapy.JsonlSink(str(filename))
+    sink.write(page_of(0))
+    assert sink.offset == filename.stat().st_size
+    sink.write([])
+    assert sink.offset == filename.stat().st_size
+    sink.close()
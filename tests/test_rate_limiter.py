@@ -0,0 +1,115 @@
+"""RateLimiter: token-bucket pacing per domain, adaptive rate and Retry-After pauses"""
+import pytest
+
+import scrapy
+
+G2 = "https://www.g2.com/products/slack/reviews?page=1"
+TRUSTPILOT = "https://www.trustpilot.com/review/slack.com?page=1"
+
+class Clock:
+    """Stands in for time.time / time.sleep: sleeping moves the clock forward"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+        self.during_sleep = None
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+        if self.during_sleep:
+            self.during_sleep, action = None, self.during_sleep
+            action()
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(scrapy.time, "time", clock.time)
+    monkeypatch.setattr(scrapy.time, "sleep", clock.sleep)
+    monkeypatch.setattr(scrapy.random, "uniform", lambda low, high: 1.0)
+    return clock
+
+def test_requests_are_spaced_at_the_rate(clock):
+    throttle = scrapy.RateLimiter({"www.g2.com": 2.0})
+    started = clock.now
+    for _ in range(11):
+        throttle.wait(G2)
+    # The first request uses the token the bucket starts with, the next ten wait half a second each
+    assert clock.now - started == pytest.approx(5.0)
+
+def test_idle_time_refills_at_most_the_burst(clock):
+    throttle = scrapy.RateLimiter({"www.g2.com": 1.0}, burst=2.0)
+    throttle.wait(G2)
+    clock.now += 60
+    throttle.wait(G2)
+    throttle.wait(G2)
+    assert clock.sleeps == []
+    throttle.wait(G2)
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+def test_domains_have_separate_buckets(clock):
+    throttle = scrapy.RateLimiter({"www.g2.com": 0.1, "www.trustpilot.com": 0.1})
+    throttle.wait(G2)
+    throttle.wait(TRUSTPILOT)
+    assert clock.sleeps == []
+
+def test_unknown_domain_uses_the_base_interval(clock):
+    throttle = scrapy.RateLimiter({})
+    throttle.wait(G2)
+    throttle.wait(G2)
+    assert clock.sleeps == [pytest.approx(scrapy.BASE_REQUEST_INTERVAL)]
+
+def test_block_halves_the_rate_down_to_the_floor(clock, capsys):
+    throttle = scrapy.RateLimiter({"www.g2.com": 1.0})
+    throttle.feedback(G2, 429)
+    assert throttle.state["www.g2.com"]["rate"] == 0.5
+    for _ in range(10):
+        throttle.feedback(G2, 403)
+    bucket = throttle.state["www.g2.com"]
+    assert bucket["rate"] == pytest.approx(1.0 / throttle.min_factor)
+    assert bucket["backoffs"] == 11 and bucket["requests"] == 11
+    assert "backing off" in capsys.readouterr().out
+
+def test_healthy_responses_speed_up_to_the_cap(clock):
+    throttle = scrapy.RateLimiter({"www.g2.com": 1.0})
+    throttle.feedback(G2, 200)
+    assert throttle.state["www.g2.com"]["rate"] == pytest.approx(1.05)
+    for _ in range(200):
+        throttle.feedback(G2, 200)
+    assert throttle.state["www.g2.com"]["rate"] == pytest.approx(throttle.max_factor)
+    throttle.feedback(G2, 500)  # A plain server error neither speeds up nor backs off
+    assert throttle.state["www.g2.com"]["rate"] == pytest.approx(throttle.max_factor)
+
+def test_retry_after_pauses_the_domain(clock):
+    throttle = scrapy.RateLimiter({"www.g2.com": 1.0})
+    throttle.wait(G2)
+    throttle.feedback(G2, 503, retry_after="30")
+    throttle.wait(G2)
+    assert sum(clock.sleeps) >= 30
+    throttle.wait(TRUSTPILOT)  # Other sites are not paused
+    assert sum(clock.sleeps) < 31 + scrapy.BASE_REQUEST_INTERVAL
+
+def test_pause_arriving_during_a_wait_takes_no_second_token(clock, monkeypatch):
+    taken = []
+    monkeypatch.setattr(scrapy.random, "uniform", lambda low, high: taken.append(1.0) or 1.0)
+    throttle = scrapy.RateLimiter({"www.g2.com": 1.0})
+    throttle.wait(G2)
+    # While the second request sleeps for its token, another thread is told to back off for 10 s
+    clock.during_sleep = lambda: throttle.feedback(G2, 429, retry_after="10")
+    started = clock.now
+    throttle.wait(G2)
+    assert len(taken) == 2
+    assert clock.now - started == pytest.approx(11.0)
+    # The pause doesn't leave a debt behind: the refill during it covers the next request at the slower rate
+    assert throttle.state["www.g2.com"]["tokens"] == pytest.approx(1.0)
+
+def test_limiters_sharing_state_share_the_budget(clock):
+    state = {}
+    first = scrapy.RateLimiter({"www.g2.com": 0.5}, state)
+    second = scrapy.RateLimiter({"www.g2.com": 0.5}, state)
+    first.wait(G2)
+    second.wait(G2)
+    assert clock.sleeps == [pytest.approx(2.0)]
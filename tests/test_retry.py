@@ -0,0 +1,129 @@
+"""Retries with backoff in fetch_page, and pages that keep failing being skipped by paginate"""
+import contextlib
+import io
+from datetime import date, datetime, timedelta
+
+import pytest
+import requests
+
+import scrapy
+
+URL = "https://www.g2.com/products/slack/reviews?page={page}"
+
+def response(status, body=""):
+    res = requests.Response()
+    res.status_code = status
+    res._content = body.encode()
+    res.url = "https://www.g2.com/"
+    return res
+
+class ScriptedSession:
+    """Answers each URL with the next item of its script: a status, an exception or a (status, body) pair"""
+
+    def __init__(self, scripts, default=(404, ""), proxy="http://proxy-a"):
+        self.scripts = {url: list(script) for url, script in scripts.items()}
+        self.default = default
+        self.proxy = proxy
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        self.calls.append((url, kwargs.get("avoid")))
+        script = self.scripts.get(url)
+        answer = script.pop(0) if script else self.default
+        if isinstance(answer, Exception):
+            raise answer
+        status, body = answer if isinstance(answer, tuple) else (answer, "")
+        res = response(status, body)
+        res.proxy = self.proxy
+        return res
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    slept = []
+    monkeypatch.setattr(scrapy.time, "sleep", slept.append)
+    return slept
+
+def fetch(session, retry, page=1):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return scrapy.fetch_page(session, URL.format(page=page), delay=None, retry=retry)
+
+@pytest.mark.parametrize("status, action", [(200, "ok"), (304, "ok"), (404, "stop"), (410, "stop"), (403, "rotate"),
+                                            (429, "retry"), (503, "retry"), (400, "fail")])
+def test_classify_status(status, action):
+    assert scrapy.classify_status(status) == action
+
+def test_server_errors_are_retried_until_one_succeeds(no_sleep):
+    session = ScriptedSession({URL.format(page=1): [503, 429, 200]})
+    assert fetch(session, scrapy.RetryPolicy(attempts=4)).status_code == 200
+    assert len(session.calls) == 3 and len(no_sleep) == 2
+
+def test_last_answer_is_returned_once_attempts_run_out():
+    session = ScriptedSession({URL.format(page=1): [503, 503, 503, 200]})
+    assert fetch(session, scrapy.RetryPolicy(attempts=3)).status_code == 503
+    assert len(session.calls) == 3
+
+def test_connection_errors_are_retried_then_raised():
+    error = requests.exceptions.ConnectionError("refused")
+    session = ScriptedSession({URL.format(page=1): [error, error]})
+    with pytest.raises(requests.exceptions.ConnectionError):
+        fetch(session, scrapy.RetryPolicy(attempts=2))
+    assert len(session.calls) == 2
+
+@pytest.mark.parametrize("status", [404, 400])
+def test_final_answers_are_not_retried(status):
+    session = ScriptedSession({URL.format(page=1): [status, 200]})
+    assert fetch(session, scrapy.RetryPolicy()).status_code == status
+    assert len(session.calls) == 1
+
+def test_403_is_retried_right_away_through_another_proxy(no_sleep):
+    session = ScriptedSession({URL.format(page=1): [403, 200]})
+    assert fetch(session, scrapy.RetryPolicy()).status_code == 200
+    assert [avoid for _, avoid in session.calls] == [None, {"http://proxy-a"}]
+    assert no_sleep == [0.0]
+
+def test_403_without_proxies_is_final():
+    session = ScriptedSession({URL.format(page=1): [403, 200]}, proxy=None)
+    assert fetch(session, scrapy.RetryPolicy()).status_code == 403
+
+def test_budget_is_shared_by_every_request_of_a_run():
+    retry = scrapy.RetryPolicy(attempts=5, budget=3)
+    session = ScriptedSession({}, default=(503, ""))
+    for page in (1, 2):
+        fetch(session, retry, page)
+    assert len(session.calls) == 2 + 3
+    assert not retry.allow(0)
+
+def test_backoff_grows_exponentially_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(scrapy.random, "uniform", lambda low, high: high)
+    retry = scrapy.RetryPolicy(base=2.0, cap=60.0)
+    assert [retry.backoff(attempt) for attempt in range(7)] == [2.0, 4.0, 8.0, 16.0, 32.0, 60.0, 60.0]
+
+def g2_page(page, per_page=3):
+    newest = date(2025, 6, 30)
+    cards = "".join(
+        f'<div class="review-card"><time datetime="{newest - timedelta(days=(page - 1) * per_page + i):%Y-%m-%d}">'
+        f'</time><h3 class="review-title">{page}</h3><div class="review-body">Body</div></div>'
+        for i in range(per_page))
+    return f"<html><body>{cards}</body></html>"
+
+def scrape(session):
+    failed = []
+    options = scrapy.ScrapeOptions(retry=scrapy.RetryPolicy(attempts=2),
+                                   on_failed_page=lambda page, url, reason: failed.append((page, reason)))
+    with contextlib.redirect_stdout(io.StringIO()):
+        reviews = scrapy.paginate(session, "g2", lambda page: URL.format(page=page), datetime(2025, 1, 1),
+                                  datetime(2025, 12, 31), options)
+    return sorted({int(review.title) for review in reviews}), failed
+
+def test_a_page_that_keeps_failing_is_skipped():
+    scripts = {URL.format(page=page): [(200, g2_page(page))] for page in (1, 2, 4, 5)}
+    scripts[URL.format(page=3)] = [503, 503]
+    pages, failed = scrape(ScriptedSession(scripts))
+    assert pages == [1, 2, 4, 5]
+    assert failed == [(3, "HTTP 503")]
+
+def test_too_many_failures_in_a_row_end_the_listing():
+    scripts = {URL.format(page=1): [(200, g2_page(1))], URL.format(page=9): [(200, g2_page(9))]}
+    pages, failed = scrape(ScriptedSession(scripts, default=(503, "")))
+    assert pages == [1]
+    assert [page for page, _ in failed] == list(range(2, 2 + scrapy.MAX_FAILED_PAGES_IN_A_ROW))
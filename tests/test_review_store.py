@@ -0,0 +1,64 @@
+"""ReviewStore: upserts keyed by review fingerprint and company, and filtered queries"""
+import contextlib
+import csv
+import io
+from datetime import date
+
+import pytest
+
+import scrapy
+
+def review(day, title="Title", rating=4, source="G2"):
+    return scrapy.Review(title, f"Text {title}", date(2025, 5, day), f"Reviewer {title}", rating, source)
+
+@pytest.fixture
+def store(tmp_path):
+    store = scrapy.ReviewStore(str(tmp_path / "reviews.sqlite3"))
+    yield store
+    store.close()
+
+def rows(store, *args, **kwargs):
+    return [(company, record["title"], record["date"]) for company, record in store.query(*args, **kwargs)]
+
+def test_seeing_a_review_again_updates_it_instead_of_adding_a_row(store):
+    store.write("g2", "slack", [review(1, "A", rating=2)])
+    first_seen = store.db.execute("SELECT first_seen FROM reviews").fetchone()[0]
+    store.write("g2", "slack", [review(1, "A", rating=5), review(2, "B")])
+    assert store.db.execute("SELECT COUNT(*) FROM reviews").fetchone()[0] == 2
+    stored = dict(store.query("g2", ["slack"], "2025-05-01", "2025-05-01"))
+    assert stored["slack"]["rating"] == 5
+    assert store.db.execute("SELECT first_seen FROM reviews WHERE date = '2025-05-01'").fetchone()[0] == first_seen
+    assert store.count == 3  # Every upsert is counted
+
+def test_same_review_under_two_companies_is_kept_for_each(store):
+    store.write("g2", "slack", [review(1, "A")])
+    store.write("g2", "slack-technologies", [review(1, "A")])
+    assert sorted(company for company, _ in store.query()) == ["slack", "slack-technologies"]
+
+def test_query_filters_and_order(store):
+    store.write("g2", "slack", [review(3, "C"), review(1, "A")])
+    store.write("g2", "zoom", [review(2, "Z")])
+    store.write("trustpilot", "slack", [review(2, "T", source="Trustpilot")])
+    assert rows(store) == [("slack", "A", "2025-05-01"), ("slack", "C", "2025-05-03"), ("zoom", "Z", "2025-05-02"),
+                           ("slack", "T", "2025-05-02")]
+    assert rows(store, "g2", ["slack"]) == [("slack", "A", "2025-05-01"), ("slack", "C", "2025-05-03")]
+    assert rows(store, companies=["zoom"]) == [("zoom", "Z", "2025-05-02")]
+    assert rows(store, start="2025-05-02", end="2025-05-02") == [("zoom", "Z", "2025-05-02"),
+                                                                  ("slack", "T", "2025-05-02")]
+
+def test_empty_page_writes_nothing(store):
+    store.write("g2", "slack", [])
+    assert store.count == 0 and rows(store) == []
+
+def test_query_command_exports_csv(store, tmp_path):
+    store.write("g2", "slack", [review(1, "A"), review(2, "B")])
+    store.write("g2", "zoom", [review(3, "Z")])
+    output = str(tmp_path / "export.csv")
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        scrapy.query_command(["--db", store.path, "--company", "slack", "--start", "2025-05-02",
+                              "--output", output])
+    assert "Exported 1 reviews" in out.getvalue()
+    with open(output, newline="", encoding="utf-8") as f:
+        exported = list(csv.DictReader(f))
+    assert [(row["company"], row["title"], row["rating"]) for row in exported] == [("slack", "B", "4")]
+    assert list(exported[0]) == scrapy.EXPORT_FIELDS
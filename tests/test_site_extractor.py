@@ -0,0 +1,33 @@
+"""SiteExtractor: every card is matched in the spec's order of preference, whatever came before it"""
+from datetime import datetime
+
+import scrapy
+
+WINDOW = (datetime(1900, 1, 1), datetime(2100, 1, 1))
+
+def g2_card(body):
+    return f'<div class="review-card"><time datetime="2024-03-01">March 1</time>{body}</div>'
+
+def descriptions(html, parser="html.parser"):
+    reviews, _ = scrapy.parse_page("g2", f"<html><body>{html}</body></html>", 1, *WINDOW, parser, True, False)
+    return [review.description for review in reviews]
+
+def test_lower_priority_match_does_not_stick():
+    first = g2_card("<p>Only a paragraph</p>")
+    second = g2_card('<p>Pros label</p><div class="review-body">Real body</div>')
+    assert descriptions(first + second) == ["Only a paragraph", "Real body"]
+
+def test_same_card_same_output_across_pages():
+    second = g2_card('<p>Pros label</p><div class="review-body">Real body</div>')
+    before = descriptions(second)
+    descriptions(g2_card("<p>Only a paragraph</p>"))
+    assert descriptions(second) == before == ["Real body"]
+
+def test_card_selector_follows_preference_order():
+    extractor = scrapy.EXTRACTORS["g2"]
+    late = scrapy.make_soup('<div class="review">a</div>')
+    early = scrapy.make_soup('<div class="review">a</div><div class="review-card">b</div>')
+    assert extractor.select_cards(late)[1] == ".review"
+    cards, selector = extractor.select_cards(early)
+    assert selector == ".review-card" and [card.get_text() for card in cards] == ["b"]
+    assert extractor.select_cards(scrapy.make_soup("<div>none</div>")) == ([], None)
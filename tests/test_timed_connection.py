@@ -0,0 +1,73 @@
+"""TimedHTTPAdapter: per-phase timings, and connecting to each resolved address in turn"""
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import scrapy
+
+class Handler(BaseHTTPRequestHandler):
+    hosts = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        Handler.hosts.append(self.headers["Host"])
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+@pytest.fixture(scope="module")
+def port():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def resolve(monkeypatch):
+    """Make multi.test resolve to the addresses in the returned list, in order"""
+    addresses = []
+    getaddrinfo = socket.getaddrinfo
+
+    def fake_getaddrinfo(host, port, *args, **kwargs):
+        if host == "multi.test":
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port)) for address in addresses]
+        return getaddrinfo(host, port, *args, **kwargs)
+
+    monkeypatch.setattr(scrapy.socket, "getaddrinfo", fake_getaddrinfo)
+    return addresses
+
+def get(url):
+    session = requests.Session()
+    session.mount("http://", scrapy.TimedHTTPAdapter())
+    with session:
+        return session.get(url, timeout=5)
+
+def test_timings_cover_every_phase(port):
+    res = get(f"http://127.0.0.1:{port}/")
+    assert res.text == "ok"
+    assert set(res.timings) == {"dns", "connect", "ttfb", "download"}
+    assert all(seconds >= 0 for seconds in res.timings.values())
+
+def test_refused_address_moves_on_to_the_next(port, resolve):
+    # Nothing listens on 127.0.0.2 (the server is bound to 127.0.0.1 only), so it refuses
+    resolve.extend(["127.0.0.2", "127.0.0.1"])
+    Handler.hosts.clear()
+    res = get(f"http://multi.test:{port}/")
+    assert res.status_code == 200 and res.text == "ok"
+    assert Handler.hosts == [f"multi.test:{port}"]  # Connected by address, still asked for the host
+
+def test_every_address_refusing_is_a_connection_error(port, resolve):
+    resolve.extend(["127.0.0.2", "127.0.0.3"])
+    with pytest.raises(requests.exceptions.ConnectionError):
+        get(f"http://multi.test:{port}/")
+
+def test_no_addresses_is_a_connection_error(port, resolve):
+    with pytest.raises(requests.exceptions.ConnectionError, match="resolved to no addresses"):
+        get(f"http://multi.test:{port}/")